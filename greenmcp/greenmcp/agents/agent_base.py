@@ -1,7 +1,15 @@
 import os
+import re
+import threading
+import time
 from typing import List, Dict, Any, Optional
 
 from .llm_runner import query_model, query_chat_model
+from .context_packer import DEFAULT_BUDGET, get_token_counter, pack_context
+from .cascade import build_cascade
+from ..utils.log import get_logger, event, DEBUG
+
+_log = get_logger("agent")
 
 # Tüm ajanlarda ortak dil politikası (tek system mesajında birleştirilecek)
 LANG_SYSTEM = (
@@ -11,6 +19,87 @@ LANG_SYSTEM = (
     "Net, motive edici ve saygılı bir üslup kullan. Gereksiz süslemelerden kaçın."
 )
 
+# ---------------------- Prompt şablonları ----------------------
+# Prompt dosyaları süreç genelinde bir kez okunup derlenir (aynı dosyayı kullanan ajanlar paylaşır);
+# değişiklik dosyanın mtime'ı ile algılanır, reload_prompts() ile de zorla yenilenir.
+#   PROMPT_CHECK_INTERVAL_S → mtime kontrol aralığı (varsayılan: 2; 0: her çağrıda, <0: yalnızca reload_prompts())
+
+_PLACEHOLDER = re.compile(r"\{\{(input|history)\}\}|\{(input|history)\}")
+_CHECK_S = float(os.getenv("PROMPT_CHECK_INTERVAL_S", "2"))
+_PROMPTS: Dict[str, "PromptTemplate"] = {}
+_PROMPTS_LOCK = threading.Lock()
+
+
+class PromptTemplate:
+    """
+    Derlenmiş şablon: sabit parçalar + yer tutucular ({input}/{{input}}, {history}/{{history}}).
+    render() tek geçişte doldurur; ardışık str.replace zinciri yerine tek join.
+    """
+    __slots__ = ("text", "mtime", "checked", "_parts", "_slots")
+
+    def __init__(self, text: str, mtime: float):
+        self.text = text
+        self.mtime = mtime
+        self.checked = time.monotonic()
+        self._parts: List[str] = []
+        self._slots: List[tuple] = []   # (ad, dosyadaki yazımı)
+        pos = 0
+        for m in _PLACEHOLDER.finditer(text):
+            self._parts.append(text[pos:m.start()])
+            self._slots.append((m.group(1) or m.group(2), m.group(0)))
+            pos = m.end()
+        self._parts.append(text[pos:])
+
+    @property
+    def has_history(self) -> bool:
+        return any(name == "history" for name, _ in self._slots)
+
+    def render(self, input_text: str, history: Optional[str] = None) -> str:
+        """history None ise {history} yer tutucusu olduğu gibi bırakılır."""
+        out = [self._parts[0]]
+        for (name, raw), part in zip(self._slots, self._parts[1:]):
+            if name == "input":
+                out.append(input_text)
+            else:
+                out.append(raw if history is None else history)
+            out.append(part)
+        return "".join(out)
+
+
+def get_prompt_template(path: str) -> Optional[PromptTemplate]:
+    """Dosyanın derlenmiş şablonunu döndürür; dosya yoksa None."""
+    tpl = _PROMPTS.get(path)
+    now = time.monotonic()
+    if tpl is not None and (_CHECK_S < 0 or now - tpl.checked < _CHECK_S):
+        return tpl
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if tpl is not None and tpl.mtime == mtime:
+        tpl.checked = now
+        return tpl
+    with _PROMPTS_LOCK:
+        tpl = _PROMPTS.get(path)
+        if tpl is not None and tpl.mtime == mtime:
+            return tpl
+        with open(path, "r", encoding="utf-8") as f:
+            tpl = PromptTemplate(f.read(), mtime)
+        _PROMPTS[path] = tpl
+    event(_log, DEBUG, "prompt_loaded", path=os.path.basename(path), slots=len(tpl._slots))
+    return tpl
+
+
+def reload_prompts(path: Optional[str] = None) -> int:
+    """Önbelleği boşaltır (path verilirse yalnızca o dosya); sonraki çağrı diskten okur."""
+    with _PROMPTS_LOCK:
+        if path is None:
+            n = len(_PROMPTS)
+            _PROMPTS.clear()
+            return n
+        return 1 if _PROMPTS.pop(path, None) is not None else 0
+
+
 class Agent:
     """
     Config-driven ajanın temel sınıfı.
@@ -22,6 +111,13 @@ class Agent:
       - temperature: float (opsiyonel)
       - max_tokens: int (opsiyonel)
       - system_prompt: str (opsiyonel; prompt dosyasına ek olarak birleşir)
+      - draft_model: str (opsiyonel; yalnızca transformers — spekülatif üretim için taslak model)
+      - draft_tokens: int (opsiyonel; taslak modelin adım başına önerdiği token sayısı)
+      - context_tokens: int (opsiyonel; system + hafıza + geçmiş + girdi için prompt token bütçesi)
+      - token_counter: "estimate" | "tokenizer" (opsiyonel; varsayılan: "estimate")
+      - history_limit: int (opsiyonel; bütçeden bağımsız azami geçmiş mesajı, varsayılan: 8)
+      - cascade: dict (opsiyonel; önce küçük model, düşük güvende bu ajanın modeli — agents/cascade.py)
+      - agent_name: str (build_agents verir; metrik etiketi)
       - description vb. fazladan alanlar görmezden gelinir.
     """
     def __init__(
@@ -33,6 +129,13 @@ class Agent:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         system_prompt: Optional[str] = None,
+        draft_model: Optional[str] = None,
+        draft_tokens: Optional[int] = None,
+        context_tokens: Optional[int] = None,
+        token_counter: str = "estimate",
+        history_limit: Optional[int] = 8,
+        cascade: Optional[Dict[str, Any]] = None,
+        agent_name: Optional[str] = None,
         **_: Any,  # YAML'dan gelebilecek kullanılmayan anahtarlar için
     ):
         self.model = model
@@ -42,39 +145,63 @@ class Agent:
         self.temperature = 0.2 if temperature is None else float(temperature)
         self.max_tokens = 512 if max_tokens is None else int(max_tokens)
         self.extra_system_prompt = system_prompt or ""
+        self.draft_model = draft_model or None
+        self.draft_tokens = None if draft_tokens is None else int(draft_tokens)
+        self.context_tokens = DEFAULT_BUDGET if context_tokens is None else int(context_tokens)
+        self.token_counter = token_counter
+        self.history_limit = None if history_limit is None else int(history_limit)
+        self._counter = None  # ilk kullanımda oluşturulur (tokenizer yükleme maliyeti)
+        self.cascade = build_cascade(agent_name or model, cascade, self.model, self.backend, self.max_tokens)
+        # şablon nesnesine bağlı türetilmiş değerler; şablon yeniden yüklenince yeniden hesaplanır
+        self._system_cache: Optional[tuple] = None     # (şablon, system metni)
+        self._template_cost: Optional[tuple] = None    # (şablon, token)
 
     # --------------------------- Yardımcılar ---------------------------
 
     def _prompt_file_path(self) -> Optional[str]:
         if not self.prompt_path:
             return None
-        return os.path.join(os.path.dirname(__file__), "..", self.prompt_path)
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", self.prompt_path))
+
+    def _template(self) -> Optional[PromptTemplate]:
+        """TEMPLATE tipi için derlenmiş şablon; prompt_path yoksa None, dosya yoksa hata."""
+        path = self._prompt_file_path()
+        if not path:
+            return None
+        tpl = get_prompt_template(path)
+        if tpl is None:
+            raise FileNotFoundError(f"Prompt dosyası bulunamadı: {path}")
+        return tpl
+
+    def reload_prompts(self) -> None:
+        """Bu ajanın prompt dosyasını bir sonraki çağrıda diskten yeniden okutur."""
+        path = self._prompt_file_path()
+        if path:
+            reload_prompts(path)
+        self._system_cache = None
+        self._template_cost = None
 
     def load_prompt(self, input_text: str) -> str:
         """
-        TEMPLATE tipinde, prompt dosyasını okuyup {input}/{history} yerlerine değer basar.
+        TEMPLATE tipinde, prompt şablonunda {input} yerine değer basar ({history} olduğu gibi kalır).
         CHAT tipinde prompt dosyası system prompt olarak kullanılır (aşağıda birleşir).
         """
-        path = self._prompt_file_path()
-        if not path:
-            return input_text
-        with open(path, "r", encoding="utf-8") as f:
-            template = f.read()
-        return template.replace("{{input}}", input_text).replace("{input}", input_text)
+        tpl = self._template()
+        return tpl.render(input_text) if tpl is not None else input_text
 
     def _load_system_prompt(self) -> str:
         """
         CHAT modunda system prompt olarak kullanılacak metni döndürür.
-        Dosya + LANG_SYSTEM + (varsa) config.system_prompt birleştirilir.
+        Dosya + LANG_SYSTEM + (varsa) config.system_prompt birleştirilir; sonuç şablon değişene dek önbellekte.
         """
-        file_text = ""
         path = self._prompt_file_path()
-        if path and os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                file_text = f.read()
-        
-        file_text = (file_text or "").replace("{input}", "").replace("{{input}}", "") \
-                                     .replace("{history}", "").replace("{{history}}", "")
+        tpl = get_prompt_template(path) if path else None
+        cached = self._system_cache
+        if cached is not None and cached[0] is tpl:
+            return cached[1]
+
+        # yer tutucular system metninde boş bırakılır
+        file_text = tpl.render("", "") if tpl is not None else ""
         parts = []
         if self.extra_system_prompt is not None:
            
@@ -86,7 +213,24 @@ class Agent:
 
         if file_text.strip():
             parts.append(file_text.strip())
-        return "\n\n".join(parts).strip()
+        system_text = "\n\n".join(parts).strip()
+        self._system_cache = (tpl, system_text)
+        return system_text
+
+    def _template_tokens(self, tpl: Optional[PromptTemplate]) -> int:
+        """Şablon gövdesinin (girdi hariç) token maliyeti; şablon başına bir kez sayılır."""
+        if tpl is None:
+            return 0
+        cached = self._template_cost
+        if cached is None or cached[0] is not tpl:
+            cached = (tpl, self._count_tokens(tpl.render("")))
+            self._template_cost = cached
+        return cached[1]
+
+    def _count_tokens(self, text: str) -> int:
+        if self._counter is None:
+            self._counter = get_token_counter(self.model, self.backend, self.token_counter)
+        return self._counter(text)
 
     def _format_history_for_template(self, history: List[Dict[str, str]], limit: int = 8) -> str:
         if not history:
@@ -101,7 +245,14 @@ class Agent:
 
    
 
-    def run(self, user_input: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+    def _finish(self, user_input: str, generate) -> Any:
+        """Kademe tanımlıysa küçük → büyük model seçimi; yoksa doğrudan ajanın modeli."""
+        if self.cascade is None:
+            return generate(self.model, self.backend, False, False)
+        return self.cascade.run(user_input, generate)
+
+    def run(self, user_input: str, history: Optional[List[Dict[str, str]]] = None) -> Any:
+        """Yanıt metni; kademe tanımlıysa (metin, meta) — meta seçilen modeli içerir."""
         if not isinstance(user_input, str):
             return "[HATA] Yalnızca metin (str) destekleniyor."
 
@@ -109,42 +260,62 @@ class Agent:
 
       
         if self.type == "chat":
-            system_text = self._load_system_prompt()
+            system_text, memory, turns, user_input = pack_context(
+                self._load_system_prompt(), history, user_input,
+                budget=self.context_tokens, count=self._count_tokens, max_turns=self.history_limit,
+            )
+            # Enjekte edilen hafıza parçacıkları tek system mesajında birleşir
+            if memory:
+                system_text = "\n\n".join(p for p in (system_text, "\n".join(memory)) if p)
 
             messages: List[Dict[str, str]] = []
             messages.append({"role": "system", "content": system_text})
-
-            for msg in history[-8:]:
-                role = msg.get("role", "user")
-                if role not in ("user", "assistant", "system"):
-                    role = "user"
-                
-                if role == "system":
-                    continue
-                messages.append({"role": role, "content": msg.get("content", "")})
-
+            messages.extend(turns)
             messages.append({"role": "user", "content": user_input})
 
          
-            return query_chat_model(
-                self.model,
-                messages,
-                system_prompt="",               
-                backend=self.backend,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            # küçük (kademe) modelde taslak model kullanılmaz
+            def generate(model: str, backend: str, small: bool, logprobs: bool) -> str:
+                return query_chat_model(
+                    model,
+                    messages,
+                    system_prompt="",               
+                    backend=backend,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    draft_model=None if small else self.draft_model,
+                    draft_tokens=self.draft_tokens,
+                    logprobs=logprobs,
+                    rewrite=not small,
+                )
+            return self._finish(user_input, generate)
 
       
-        prompt = self.load_prompt(user_input)
-        hist_str = self._format_history_for_template(history, limit=8)
-        if "{history}" in prompt or "{{history}}" in prompt:
-            prompt = prompt.replace("{history}", hist_str).replace("{{history}}", hist_str)
-
-        return query_model(
-            self.model,
-            prompt,
-            backend=self.backend,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
+        # TEMPLATE: şablon gövdesi sabit maliyet, kalan bütçe hafıza + geçmiş + girdiye
+        tpl = self._template()
+        template_cost = self._template_tokens(tpl)
+        _, memory, turns, packed_input = pack_context(
+            "", history, user_input,
+            budget=self.context_tokens - template_cost, count=self._count_tokens, max_turns=self.history_limit,
         )
+        if tpl is None:
+            prompt = packed_input
+        elif tpl.has_history:
+            packed = [{"role": "system", "content": m} for m in memory] + turns
+            prompt = tpl.render(packed_input, self._format_history_for_template(packed, limit=len(packed) or 1))
+        else:
+            prompt = tpl.render(packed_input)
+
+        def generate(model: str, backend: str, small: bool, logprobs: bool) -> str:
+            return query_model(
+                model,
+                prompt,
+                backend=backend,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                draft_model=None if small else self.draft_model,
+                draft_tokens=self.draft_tokens,
+                logprobs=logprobs,
+                rewrite=not small,
+            )
+        return self._finish(user_input, generate)
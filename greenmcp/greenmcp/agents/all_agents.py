@@ -1,7 +1,31 @@
-from .load_configs import AGENT_CONFIGS
+import threading
+
+from .load_configs import agent_configs
 from .agent_base import Agent
 
-# Agent nesnelerini config'e göre oluştur
-AGENTS = {
-    name: Agent(**config) for name, config in AGENT_CONFIGS.items()
-}
+
+def build_agents(configs: dict, previous: dict | None = None) -> dict:
+    """
+    Agent nesnelerini config'e göre oluşturur.
+    previous: önceki {ad: (config, Agent)} eşlemesi; config'i değişmeyen ajan nesnesi aynen kullanılır
+    (token sayacı vb. ısınmış durumu korunur).
+    """
+    agents = {}
+    for name, config in (configs or {}).items():
+        old = (previous or {}).get(name)
+        agents[name] = old[1] if old is not None and old[0] == config else Agent(agent_name=name, **config)
+    return agents
+
+
+_DEFAULT: dict | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_agents() -> dict:
+    """Açılış config'inden Agent nesneleri; ilk erişimde bir kez oluşturulur (import'ta değil)."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        with _DEFAULT_LOCK:
+            if _DEFAULT is None:
+                _DEFAULT = build_agents(agent_configs())
+    return _DEFAULT
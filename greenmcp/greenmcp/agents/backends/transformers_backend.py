@@ -1,13 +1,44 @@
 from __future__ import annotations
+from contextlib import ExitStack, contextmanager
 from functools import lru_cache
 import os
+import threading
+import time
 import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers.generation.streamers import BaseStreamer
 
+from ...utils.log import get_logger, event, DEBUG, WARNING
+from ...utils.telemetry import record, make_stats, SPEC_AGGREGATE
+
+_log = get_logger("hf_backend")
 
 torch.set_num_threads(int(os.getenv("HF_CPU_THREADS", "2")))
 
-@lru_cache(maxsize=2)
+# Aynı model nesnesi üzerinde eşzamanlı generate() çağrılarını sıraya sokar
+# (sunucu alt görevleri thread havuzunda paralel çalışır; CPU'da paralel decode kazanç sağlamaz
+#  ve forward hook sayaçları karışır). Assisted generation'da taslak model de kilitlenir: aynı taslak
+# birden çok hedefin taslağı ya da başka bir ajanın kendi modeli olabilir.
+_GEN_LOCKS: dict[str, threading.Lock] = {}
+_GEN_LOCKS_GUARD = threading.Lock()
+
+
+def _gen_lock(model_id: str) -> threading.Lock:
+    with _GEN_LOCKS_GUARD:
+        return _GEN_LOCKS.setdefault(model_id, threading.Lock())
+
+
+@contextmanager
+def _gen_locks(*model_ids: str):
+    """Birden çok modelin kilidini sabit (ada göre sıralı) sırada alır; çapraz taslak kilitlenmesi olmaz."""
+    with ExitStack() as stack:
+        for mid in sorted(set(m for m in model_ids if m)):
+            stack.enter_context(_gen_lock(mid))
+        yield
+
+
+# Hedef model + taslak (draft) model aynı anda bellekte tutulabilsin diye 4
+@lru_cache(maxsize=4)
 def _load(model_id: str):
     tok = AutoTokenizer.from_pretrained(model_id, trust_remote_code=False)
 
@@ -29,68 +60,224 @@ def _load(model_id: str):
 def _fallback_prompt(system: str, user: str) -> str:
     return f"{(system or '').strip()}\nUser: {user.strip()}\nAssistant:"
 
+
+# ---------------------- Önceden tokenize edilmiş şablon önbelleği ----------------------
+
+# Kullanıcı metninin şablondaki yerini işaretlemek için (Unicode private-use alanı)
+_USER_SLOT = "\ue000GREENMCP_USER\ue000"
+
+
+# Önbellekli parçaların tam render ile aynı tokenları verdiği bir kez bu metinlerle doğrulanır
+# (BPE/SentencePiece yuva sınırında birleşme yapıyorsa parçalı kodlama farklı ID'ler üretir)
+_PROBES = ("Merhaba, karbon ayak izimi nasıl azaltırım?", "2 kWh elektrik, 10 km araba.")
+
+
+def _full_prompt_ids(tok, system: str, user: str) -> list[int]:
+    """Şablonu her çağrıda baştan render edip tokenize eden (önbelleksiz) yol."""
+    system = (system or "").strip()
+    if hasattr(tok, "apply_chat_template") and getattr(tok, "chat_template", None):
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": user})
+        return list(tok.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")[0].tolist())
+    return list(tok(_fallback_prompt(system, user))["input_ids"])
+
+
+@lru_cache(maxsize=64)
+def _template_parts(model_id: str, system: str) -> tuple[tuple[int, ...], tuple[int, ...]] | None:
+    """
+    (model, system) başına sohbet şablonunu bir kez render edip kullanıcı yuvasının
+    öncesini/sonrasını token-ID olarak önbelleğe alır.
+    Dönen: (prefix_ids, suffix_ids) — yuva bulunamazsa veya parçalı kodlama tam kodlamayla
+    eşleşmezse None (her çağrıda tam yol kullanılır).
+    """
+    tok, _ = _load(model_id)
+    system = (system or "").strip()
+
+    if hasattr(tok, "apply_chat_template") and getattr(tok, "chat_template", None):
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": _USER_SLOT})
+        rendered = tok.apply_chat_template(messages, add_generation_prompt=True, tokenize=False)
+    else:
+        rendered = _fallback_prompt(system, _USER_SLOT)
+
+    if rendered.count(_USER_SLOT) != 1:
+        return None
+    head, tail = rendered.split(_USER_SLOT)
+
+    # Şablon render çıktısı özel tokenları (BOS vb.) zaten metin olarak içerir.
+    # Fallback prompt'ta ise BOS'u tokenizer eklemeli → yalnızca prefix'te.
+    templated = bool(getattr(tok, "chat_template", None))
+    prefix = tok(head, add_special_tokens=not templated)["input_ids"]
+    suffix = tok(tail, add_special_tokens=False)["input_ids"]
+
+    for probe in _PROBES:
+        body = tok(probe, add_special_tokens=False)["input_ids"]
+        if list(prefix) + list(body) + list(suffix) != _full_prompt_ids(tok, system, probe):
+            event(_log, WARNING, "template_split_mismatch", model=model_id)
+            return None
+    return tuple(prefix), tuple(suffix)
+
+
+def _encode_prompt(model_id: str, tok, system: str, user: str):
+    """
+    system + şablon iskeleti önbellekten gelir; her çağrıda yalnızca kullanıcı
+    segmenti tokenize edilir ve parçalar token-ID seviyesinde birleştirilir.
+    """
+    user = (user or "").strip()
+    parts = _template_parts(model_id, system or "")
+    if parts is None:
+        # Şablon yuvayı tek parça tutmuyorsa (ör. içerik dönüştürülüyorsa) veya parçalı
+        # kodlama tam kodlamadan farklıysa tam yol
+        return torch.tensor([_full_prompt_ids(tok, system, user)], dtype=torch.long)
+
+    prefix, suffix = parts
+    body = tok(user, add_special_tokens=False)["input_ids"] if user else []
+    ids = list(prefix) + list(body) + list(suffix)
+    return torch.tensor([ids], dtype=torch.long)
+
+
+class _FirstTokenTimer(BaseStreamer):
+    """
+    generate() streamer'ı: ilk put() prompt'u, ikincisi ilk üretilen tokenı taşır.
+    İkinci put() anı time-to-first-token (prefill + ilk decode adımı) olarak alınır.
+    """
+    def __init__(self):
+        self._puts = 0
+        self.first_token_at: float | None = None
+
+    def put(self, value):
+        self._puts += 1
+        if self._puts == 2 and self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def end(self):
+        pass
+
+
+# ---------------------- Spekülatif (assisted) üretim ----------------------
+
+class _ForwardCounter:
+    """Bir modelin generate() sırasında kaç kez forward çağrıldığını sayar."""
+    def __init__(self, model):
+        self.calls = 0
+        self._handle = model.register_forward_hook(self._hook)
+
+    def _hook(self, *_):
+        self.calls += 1
+
+    def close(self):
+        self._handle.remove()
+
+
+@lru_cache(maxsize=16)
+def _same_tokenizer(model_id: str, draft_model_id: str) -> bool:
+    """Aynı kelime dağarcığı (token → ID) mı? Uzunluk eşitliği yetmez: farklı aileler aynı boyutta olabilir."""
+    tok, _ = _load(model_id)
+    d_tok, _ = _load(draft_model_id)
+    return type(tok) is type(d_tok) and tok.get_vocab() == d_tok.get_vocab()
+
+
+def _assisted_kwargs(model_id: str, tok, draft_model_id: str, draft_tokens: int | None) -> dict:
+    """
+    generate() için assistant_model argümanlarını hazırlar.
+    Tokenizer'lar farklıysa (farklı aile) evrensel assisted decoding için
+    tokenizer/assistant_tokenizer da geçilir.
+    draft_tokens çağrı başına generate argümanıdır; taslak modelin paylaşılan generation_config'i
+    değiştirilmez (aynı taslağı farklı draft_tokens ile kullanan ajanlar birbirini etkilemesin).
+    """
+    d_tok, d_mdl = _load(draft_model_id)
+    d_mdl.eval()
+    kwargs = {"assistant_model": d_mdl}
+    if draft_tokens:
+        kwargs["num_assistant_tokens"] = int(draft_tokens)
+    if not _same_tokenizer(model_id, draft_model_id):
+        kwargs["tokenizer"] = tok
+        kwargs["assistant_tokenizer"] = d_tok
+    return kwargs
+
+
+def _log_spec_stats(model_id: str, draft_model_id: str, n_new: int,
+                    target_steps: int, draft_steps: int, elapsed: float) -> None:
+    """Kabul oranı / adım başına token (model, taslak) başına toplanır (/telemetry/generation, /metrics)."""
+    rates = SPEC_AGGREGATE.add(model_id, draft_model_id, n_new, target_steps, draft_steps, elapsed)
+    event(_log, DEBUG, "spec_decode", model=model_id, draft=draft_model_id, new_tokens=n_new,
+          target_steps=target_steps, draft_steps=draft_steps, **rates)
+
+
 def chat(model_id: str, system: str, user: str,
-         temperature: float = 0.2, max_new_tokens: int = 128) -> str:
-    
-    print(f"[DEBUG] transformers_backend.chat() called")
-    print(f"[DEBUG] system: {system}")
-    print(f"[DEBUG] user: {user}")
+         temperature: float = 0.2, max_new_tokens: int = 128,
+         draft_model_id: str | None = None, draft_tokens: int | None = None) -> str:
+    event(_log, DEBUG, "chat_call", model=model_id, system=system, user=user)
 
     tok, mdl = _load(model_id)
     mdl.eval()  
 
     
-    messages = []
-    if (system or "").strip():
-        messages.append({"role": "system", "content": system.strip()})
-    messages.append({"role": "user", "content": user.strip()})
+    input_ids = _encode_prompt(model_id, tok, system, user)
+    attention_mask = torch.ones_like(input_ids)
 
-    if hasattr(tok, "apply_chat_template") and getattr(tok, "chat_template", None):
-        input_ids = tok.apply_chat_template(
-            messages,
-            add_generation_prompt=True,
-            return_tensors="pt"         
-        )
-        attention_mask = torch.ones_like(input_ids)
-    else:
-        prompt = _fallback_prompt(system, user)
-        enc = tok(prompt, return_tensors="pt")
-        input_ids = enc["input_ids"]
-        attention_mask = enc.get("attention_mask", torch.ones_like(input_ids))
 
-    print(f"[DEBUG] input_ids.shape: {input_ids.shape}")
-    print(f"[DEBUG] attention_mask.shape: {attention_mask.shape}")
-
-   
     eos_id = getattr(mdl.config, "eos_token_id", None)
     if isinstance(eos_id, list):
         eos_id = eos_id[0] if eos_id else None
     pad_id = tok.pad_token_id if tok.pad_token_id is not None else tok.eos_token_id
 
-    print(f"[DEBUG] eos_token_id: {eos_id}")
-    print(f"[DEBUG] pad_token_id: {pad_id}")
+    event(_log, DEBUG, "chat_inputs", prompt_tokens=int(input_ids.shape[1]), eos_id=eos_id, pad_id=pad_id)
 
-    with torch.inference_mode():
-        out = mdl.generate(
-            input_ids=input_ids,
-            attention_mask=attention_mask,
-            max_new_tokens=max_new_tokens,
-            temperature=temperature,
-            do_sample=(temperature > 0),
-            pad_token_id=pad_id,
-            eos_token_id=eos_id,
-            use_cache=True,        
-        )
+    # Taslak model tanımlıysa assisted generation; yüklenemezse klasik decode'a düş
+    gen_extra: dict = {}
+    if draft_model_id and draft_model_id != model_id:
+        try:
+            gen_extra = _assisted_kwargs(model_id, tok, draft_model_id, draft_tokens)
+        except Exception as e:
+            event(_log, WARNING, "draft_load_failed", draft=draft_model_id, error=repr(e))
+            gen_extra = {}
 
-    print(f"[DEBUG] output shape: {out.shape}")
+    # Kilit beklemesi süre ölçümüne dahil edilmez (kuyruk ≠ prefill); taslağın forward sayacı
+    # yalnızca bu çağrının adımlarını görsün diye taslak da kilitlenir
+    with _gen_locks(model_id, draft_model_id if gen_extra else None):
+        counters: tuple[_ForwardCounter, _ForwardCounter] | None = None
+        if gen_extra:
+            counters = (_ForwardCounter(mdl), _ForwardCounter(gen_extra["assistant_model"]))
+        timer = _FirstTokenTimer()
+        t0 = time.perf_counter()
+        try:
+            with torch.inference_mode():
+                out = mdl.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    max_new_tokens=max_new_tokens,
+                    temperature=temperature,
+                    do_sample=(temperature > 0),
+                    pad_token_id=pad_id,
+                    eos_token_id=eos_id,
+                    use_cache=True,        
+                    streamer=timer,
+                    **gen_extra,
+                )
+        finally:
+            if counters:
+                for c in counters:
+                    c.close()
+        elapsed = time.perf_counter() - t0
 
- 
     gen_ids = out[0, input_ids.shape[1]:]
 
-    print(f"[DEBUG] generated token IDs: {gen_ids}")
+    ttft = (timer.first_token_at - t0) if timer.first_token_at else None
+    record(make_stats(model_id, "transformers",
+                      prompt_tokens=int(input_ids.shape[1]), gen_tokens=int(gen_ids.shape[0]),
+                      total_s=elapsed, ttft_s=ttft, prefill_s=ttft))
+
+    if counters:
+        _log_spec_stats(model_id, draft_model_id, int(gen_ids.shape[0]),
+                        counters[0].calls, counters[1].calls, elapsed)
 
     text = tok.decode(gen_ids, skip_special_tokens=True)
 
-    print(f"[DEBUG] decoded text: '{text}'")
+    event(_log, DEBUG, "chat_output", new_tokens=int(gen_ids.shape[0]), text=text)
 
     return text.strip()
@@ -0,0 +1,217 @@
+import math
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .llm_runner import ensure_turkish, looks_english
+from ..utils.log import get_logger, event, DEBUG
+from ..utils.metrics import counter, histogram
+from ..utils.overload import degraded, scale_max_tokens
+from ..utils.telemetry import current_calls
+
+_log = get_logger("cascade")
+
+# Kademeli model seçimi: önce küçük/hızlı model, yanıt güveni düşükse ajanın asıl (büyük) modeli.
+# Ajan başına açılır (agent_configs.yaml):
+#   qa_agent:
+#     model: qwen3:8b                 # büyük model (yükseltme hedefi)
+#     cascade:
+#       model: qwen3:1.7b             # küçük model (zorunlu)
+#       backend: ollama               # opsiyonel; varsayılan ajanın backend'i
+#       min_confidence: 0.6           # bu güvenin altındaki yanıtlar büyük modele gider
+#       max_complexity: 0.6           # bu karmaşıklığın üstündeki sorular doğrudan büyük modele
+#       logprobs: true                # Ollama token log-olasılıklarını güvene kat
+# Ortam değişkenleri:
+#   CASCADE_ENABLED        → "0" ise tüm ajanlar doğrudan büyük modeli kullanır (varsayılan: 1)
+#   CASCADE_MIN_CONFIDENCE → varsayılan güven eşiği (varsayılan: 0.6)
+#   CASCADE_MAX_COMPLEXITY → varsayılan karmaşıklık eşiği (varsayılan: 0.6)
+#
+# Güven sezgiseldir (kaçamak ifade, İngilizceye kayma, çok kısa / kesilmiş / tekrarlı yanıt);
+# log-olasılık varsa ortalama token olasılığıyla yarı yarıya birleşir (yalnızca düşürür). Yük seviyesi 2'de
+# (utils/overload.py) yükseltme yapılmaz, küçük modelin yanıtı döner.
+# Küçük modelin çıktısı Türkçeye yeniden yazılmadan (rewrite=False) puanlanır: İngilizceye kayma
+# tek başına varsayılan eşiğin altına düşürür ve yanıt büyük modele gider. Küçük modelin yanıtı yine de
+# döndürülürse (düşük eşik veya yük altında kept_small) kullanıcıya gitmeden önce Türkçeye yeniden yazılır.
+#
+# Kademe varsayılan olarak kapalıdır (agent_configs.yaml'da yorum satırı). Açıldığında Ollama iki modeli
+# aynı anda bellekte tutmalıdır; aksi halde her yükseltme model değiştirme (boşaltma + yükleme) maliyeti
+# öder. Ollama sunucusunda OLLAMA_MAX_LOADED_MODELS, ajanların büyük modelleri + açılan küçük modeller
+# kadar olmalı ve RAM/VRAM buna yetmelidir.
+
+CASCADE_RESULTS = counter(
+    "greenmcp_cascade_total", "Kademeli model sonuçları (small/escalated/direct/kept_small)", ("agent", "result"),
+)
+CASCADE_CONFIDENCE = histogram(
+    "greenmcp_cascade_confidence", "Küçük model yanıt güveni", ("agent",),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+# Akıl yürütme / çok adımlı yanıt isteyen ifadeler
+_COMPLEX_HINTS = re.compile(
+    r"(karşılaştır|analiz|neden|niçin|açıkla|detaylı|ayrıntılı|adım adım|strateji|plan(la)?|"
+    r"avantaj|dezavantaj|fark(ı|lar)|hesapla|değerlendir|öner(i|ir)|senaryo|etkisi)",
+    re.IGNORECASE,
+)
+# Modelin bilmediğini / emin olmadığını belirten ifadeler
+_HEDGES = re.compile(
+    r"(emin değilim|bilmiyorum|bilemiyorum|bilgim yok|bilgiye sahip değilim|kesin bir bilgi|"
+    r"yardımcı olamam|cevap veremem|yanıt veremem|tahmin ediyorum|sanırım|yanılıyor olabilirim|"
+    r"i'?m not sure|i don'?t know|i cannot)",
+    re.IGNORECASE,
+)
+
+
+def query_complexity(text: str) -> float:
+    """0..1; uzunluk, soru sayısı, akıl yürütme ifadeleri ve sayılardan kaba bir karmaşıklık skoru."""
+    text = text or ""
+    words = len(_WORD.findall(text))
+    score = 0.4 * min(words / 80.0, 1.0)
+    if text.count("?") > 1:
+        score += 0.2
+    score += min(0.45, 0.15 * len(_COMPLEX_HINTS.findall(text)))
+    if len(_NUMBER.findall(text)) >= 2:
+        score += 0.15
+    return round(min(score, 1.0), 4)
+
+
+def answer_confidence(answer: str, stats: Optional[dict] = None,
+                      max_tokens: Optional[int] = None) -> Tuple[float, List[str]]:
+    """
+    0..1 güven ve düşüş nedenleri. stats: küçük model çağrısının telemetri kaydı
+    (gen_tokens → kesilme, mean_logprob → token olasılığı).
+    """
+    text = (answer or "").strip()
+    if not text or text.startswith("[HATA]"):
+        return 0.0, ["empty_or_error"]
+
+    score, reasons = 1.0, []
+    hedges = len(_HEDGES.findall(text))
+    if hedges:
+        score -= 0.5 + 0.2 * (hedges - 1)
+        reasons.append("hedge")
+    if looks_english(text):
+        score -= 0.45
+        reasons.append("english")
+    if len(_WORD.findall(text)) < 3:
+        score -= 0.4
+        reasons.append("too_short")
+    gen_tokens = (stats or {}).get("gen_tokens") or 0
+    if max_tokens and gen_tokens >= max_tokens:
+        score -= 0.3
+        reasons.append("truncated")
+    sentences = [s.strip().lower() for s in _SENTENCE.split(text) if s.strip()]
+    if len(sentences) >= 4 and len(set(sentences)) / len(sentences) < 0.5:
+        score -= 0.3
+        reasons.append("repetitive")
+    score = max(0.0, score)
+
+    mean_logprob = (stats or {}).get("mean_logprob")
+    if mean_logprob is not None:
+        # log-olasılık güveni yalnızca düşürebilir (kendinden emin kaçamak yanıt yine yükseltilir)
+        score = min(score, 0.5 * score + 0.5 * math.exp(mean_logprob))
+        reasons.append("logprobs")
+    return round(score, 4), reasons
+
+
+class _Stats:
+    """Ajan başına sonuç sayıları; ajan nesneleri yeniden yüklense de süreç boyunca korunur."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[str, int]] = {}
+
+    def add(self, agent: str, result: str) -> None:
+        with self._lock:
+            row = self._rows.setdefault(agent, {"small": 0, "escalated": 0, "direct": 0, "kept_small": 0})
+            row[result] += 1
+        CASCADE_RESULTS.inc(agent=agent, result=result)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            rows = {a: dict(r) for a, r in self._rows.items()}
+        for r in rows.values():
+            tried = r["small"] + r["escalated"] + r["kept_small"]
+            r["escalation_rate"] = round(r["escalated"] / tried, 4) if tried else 0.0
+        return rows
+
+
+STATS = _Stats()
+
+
+def cascade_stats() -> dict:
+    return STATS.snapshot()
+
+
+class Cascade:
+    """Tek ajanın küçük → büyük model kademesi."""
+
+    def __init__(self, agent: str, model: str, backend: str, large_model: str, large_backend: str,
+                 max_tokens: int, min_confidence: float | None = None, max_complexity: float | None = None,
+                 logprobs: bool = False):
+        self.agent = agent
+        self.model = model
+        self.backend = backend
+        self.large_model = large_model
+        self.large_backend = large_backend
+        self.max_tokens = max_tokens
+        self.min_confidence = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.6")) \
+            if min_confidence is None else float(min_confidence)
+        self.max_complexity = float(os.getenv("CASCADE_MAX_COMPLEXITY", "0.6")) \
+            if max_complexity is None else float(max_complexity)
+        self.logprobs = bool(logprobs)
+
+    def run(self, question: str, generate: Callable[..., str]) -> Tuple[str, dict]:
+        """
+        generate(model, backend, small, logprobs) → yanıt metni. (metin, meta) döner;
+        meta['cascade'] hangi modelin neden seçildiğini içerir.
+        """
+        complexity = query_complexity(question)
+        info = {"complexity": complexity, "small_model": self.model}
+        if complexity > self.max_complexity:
+            STATS.add(self.agent, "direct")
+            info["result"] = "direct"
+            text = generate(self.large_model, self.large_backend, False, False)
+            return text, {"model": self.large_model, "backend": self.large_backend, "cascade": info}
+
+        calls = current_calls()
+        n0 = len(calls) if calls is not None else 0
+        text = generate(self.model, self.backend, True, self.logprobs)
+        stats = calls[n0] if calls is not None and len(calls) > n0 else None
+        confidence, reasons = answer_confidence(text, stats, scale_max_tokens(self.max_tokens))
+        CASCADE_CONFIDENCE.observe(confidence, agent=self.agent)
+        info.update(confidence=confidence, reasons=reasons)
+
+        if confidence >= self.min_confidence:
+            result, model, backend = "small", self.model, self.backend
+        elif degraded("cascade_escalate"):
+            result, model, backend = "kept_small", self.model, self.backend
+        else:
+            result, model, backend = "escalated", self.large_model, self.large_backend
+            text = generate(self.large_model, self.large_backend, False, False)
+        if result != "escalated":
+            text = ensure_turkish(self.model, text, self.backend)
+        STATS.add(self.agent, result)
+        info["result"] = result
+        event(_log, DEBUG, "cascade", agent=self.agent, result=result, confidence=confidence,
+              complexity=complexity, reasons=reasons)
+        return text, {"model": model, "backend": backend, "cascade": info}
+
+
+def build_cascade(agent: str, opt, model: str, backend: str, max_tokens: int) -> Optional[Cascade]:
+    """agent_configs.yaml 'cascade' alanından Cascade; kapalıysa veya küçük model yoksa None."""
+    if not opt or not isinstance(opt, dict) or not opt.get("model"):
+        return None
+    if os.getenv("CASCADE_ENABLED", "1") == "0":
+        return None
+    return Cascade(
+        agent, opt["model"], opt.get("backend") or backend, model, backend,
+        max_tokens=max_tokens,
+        min_confidence=opt.get("min_confidence"),
+        max_complexity=opt.get("max_complexity"),
+        logprobs=opt.get("logprobs", False),
+    )
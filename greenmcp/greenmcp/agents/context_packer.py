@@ -0,0 +1,135 @@
+import os
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Türkçe metinde BPE tokenizer'lar ortalama ~3 karakter/token üretir (eklemeli yapı).
+CHARS_PER_TOKEN = float(os.getenv("CONTEXT_CHARS_PER_TOKEN", "3.0"))
+DEFAULT_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKENS", "1536"))
+
+# Bütçe paylaşımı (yalnızca üst sınırlar; artan pay sonraki kalemlere devreder)
+SYSTEM_SHARE = 0.5    # system prompt en fazla bütçenin yarısı
+MEMORY_SHARE = 0.25   # hafıza parçacıkları en fazla dörtte bir
+
+ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer'sız hızlı tahmin: karakter sayısı / CHARS_PER_TOKEN (+ mesaj başına sabit)."""
+    if not text:
+        return 0
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+@lru_cache(maxsize=8)
+def _hf_tokenizer(model_id: str):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_id, trust_remote_code=False)
+
+
+def get_token_counter(model: str, backend: str, mode: str = "estimate") -> Callable[[str], int]:
+    """
+    mode="tokenizer" ve backend transformers ise modelin gerçek tokenizer'ı kullanılır.
+    Ollama modelleri için tokenizer erişimi yok → her zaman tahminci.
+    """
+    if mode == "tokenizer" and backend in ("transformers", "hf", "huggingface"):
+        try:
+            tok = _hf_tokenizer(model)
+            return lambda text: len(tok(text or "", add_special_tokens=False)["input_ids"]) if text else 0
+        except Exception:
+            pass
+    return estimate_tokens
+
+
+def _truncate(text: str, max_tokens: int, count: Callable[[str], int], keep: str = "head") -> str:
+    """Metni max_tokens'a sığacak şekilde kırpar. keep='tail' ise sonunu korur (yakın geçmiş)."""
+    if max_tokens <= 0 or not text:
+        return ""
+    n = count(text)
+    if n <= max_tokens:
+        return text
+    # Oransal ilk tahmin, ardından sığana kadar %10'luk küçültme
+    ratio = max_tokens / max(1, n)
+    size = max(1, int(len(text) * ratio))
+    while size > 0:
+        piece = text[:size] if keep == "head" else text[-size:]
+        piece = (piece + ELLIPSIS) if keep == "head" else (ELLIPSIS + piece)
+        if count(piece) <= max_tokens:
+            return piece
+        size = int(size * 0.9)
+    return ""
+
+
+def split_history(history: List[Dict[str, str]]) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Enjekte edilmiş system mesajlarını (hafıza) sohbet turlarından ayırır."""
+    memory, turns = [], []
+    for msg in history or []:
+        role = msg.get("role", "user")
+        content = (msg.get("content") or "").strip()
+        if not content:
+            continue
+        if role == "system":
+            memory.append(content)
+        else:
+            if role not in ("user", "assistant"):
+                role = "user"
+            turns.append({"role": role, "content": content})
+    return memory, turns
+
+
+def pack_context(system: str,
+                 history: List[Dict[str, str]],
+                 user_input: str,
+                 budget: int,
+                 count: Callable[[str], int] = estimate_tokens,
+                 max_turns: Optional[int] = None) -> Tuple[str, List[str], List[Dict[str, str]], str]:
+    """
+    system prompt, hafıza parçacıkları ve sohbet geçmişini token bütçesine sığdırır.
+
+    Öncelik sırası:
+      1) Kullanıcı girdisi (her zaman; gerekirse başı korunarak kırpılır)
+      2) System prompt (en fazla SYSTEM_SHARE)
+      3) Hafıza parçacıkları (sırayla, en fazla MEMORY_SHARE; sığmayan son parça kırpılır)
+      4) Geçmiş turlar (en yeniden eskiye; sığmayan ilk tur sonu korunarak kırpılır, öncesi atılır)
+
+    Dönen: (system, memory_snippets, turns, user_input)
+    """
+    budget = max(64, int(budget))
+    memory, turns = split_history(history)
+    if max_turns is not None:
+        turns = turns[-max_turns:]
+
+    user_input = _truncate(user_input or "", int(budget * 0.5), count, keep="head")
+    remaining = budget - count(user_input)
+
+    system = _truncate(system or "", min(remaining, int(budget * SYSTEM_SHARE)), count, keep="head")
+    remaining -= count(system)
+
+    mem_left = min(remaining, int(budget * MEMORY_SHARE))
+    packed_memory: List[str] = []
+    for snip in memory:
+        if mem_left <= 0:
+            break
+        n = count(snip)
+        if n > mem_left:
+            snip = _truncate(snip, mem_left, count, keep="head")
+            n = count(snip)
+        if snip:
+            packed_memory.append(snip)
+            mem_left -= n
+            remaining -= n
+
+    packed_turns: List[Dict[str, str]] = []
+    for msg in reversed(turns):
+        if remaining <= 0:
+            break
+        n = count(msg["content"])
+        if n > remaining:
+            content = _truncate(msg["content"], remaining, count, keep="tail")
+            if content:
+                packed_turns.append({"role": msg["role"], "content": content})
+            break
+        packed_turns.append(msg)
+        remaining -= n
+    packed_turns.reverse()
+
+    return system, packed_memory, packed_turns, user_input
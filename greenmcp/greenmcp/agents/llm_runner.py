@@ -1,8 +1,14 @@
 
+import os
 import requests
 import re
+import time
 from typing import List, Dict, Any, Union, Optional
 
+from ..utils.telemetry import record, ollama_stats
+from ..utils.overload import degraded, scale_max_tokens
+from ..utils.recorder import upstream, ReplayMiss
+
 # ---------------------- Ortak Yardımcılar ----------------------
 
 def remove_think_blocks(text: str) -> str:
@@ -17,16 +23,26 @@ _EN_TRIGGERS = re.compile(
     re.IGNORECASE
 )
 
-def _looks_english(text: str) -> bool:
+def looks_english(text: str) -> bool:
     if not text:
         return False
     return bool(_EN_TRIGGERS.search(text))
 
 REQ_TIMEOUT = 240  # saniye
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
 
 
 # ---------------------- Ollama yardımcıları (mevcut davranış) ----------------------
 
+def _ollama_post(path: str, payload: dict) -> dict:
+    """Ollama'ya tek POST; trafik kaydı/replay (utils/recorder.py) bu noktadan geçer."""
+    def _call() -> dict:
+        r = requests.post(f"{OLLAMA_URL}{path}", json=payload, timeout=REQ_TIMEOUT)
+        r.raise_for_status()
+        return r.json()
+    return upstream("llm", f"{path}:{payload.get('model')}", payload, _call)
+
+
 def _rewrite_turkish_ollama(model_name: str, text: str) -> str:
     """Gerekirse İngilizceye kayan çıktıyı tekrar Türkçeye çevirir (yalnızca Ollama yolunda)."""
     payload = {
@@ -40,45 +56,74 @@ def _rewrite_turkish_ollama(model_name: str, text: str) -> str:
         "options": {"temperature": 0.2, "num_predict": 384}
     }
     try:
-        r = requests.post("http://localhost:11434/api/generate", json=payload, timeout=REQ_TIMEOUT)
-        r.raise_for_status()
-        return remove_think_blocks(r.json().get("response", "").strip())
-    except requests.exceptions.RequestException:
+        t0 = time.perf_counter()
+        data = _ollama_post("/api/generate", payload)
+        record(ollama_stats(model_name, data, time.perf_counter() - t0))
+        return remove_think_blocks(data.get("response", "").strip())
+    except (requests.exceptions.RequestException, ReplayMiss):
         return text or ""
 
 
-def _ollama_generate(model_name: str, prompt: str, temperature: float, num_predict: int) -> str:
+def _ollama_generate(model_name: str, prompt: str, temperature: float, num_predict: int,
+                     logprobs: bool = False) -> str:
     payload = {
         "model": model_name,
         "prompt": prompt,
         "stream": False,
         "options": {"temperature": temperature, "num_predict": num_predict}
     }
-    r = requests.post("http://localhost:11434/api/generate", json=payload, timeout=REQ_TIMEOUT)
-    r.raise_for_status()
-    return remove_think_blocks(r.json().get("response", "").strip())
+    if logprobs:
+        payload["logprobs"] = True
+    t0 = time.perf_counter()
+    data = _ollama_post("/api/generate", payload)
+    record(ollama_stats(model_name, data, time.perf_counter() - t0))
+    return remove_think_blocks(data.get("response", "").strip())
 
 
-def _ollama_chat(model_name: str, messages: List[Dict[str, str]], temperature: float, num_predict: int) -> str:
+def _ollama_chat(model_name: str, messages: List[Dict[str, str]], temperature: float, num_predict: int,
+                 logprobs: bool = False) -> str:
     payload = {
         "model": model_name,
         "messages": messages,
         "stream": False,
         "options": {"temperature": temperature, "num_predict": num_predict}
     }
-    r = requests.post("http://localhost:11434/api/chat", json=payload, timeout=REQ_TIMEOUT)
-    r.raise_for_status()
-    return remove_think_blocks(r.json().get("message", {}).get("content", "").strip())
+    if logprobs:
+        payload["logprobs"] = True
+    t0 = time.perf_counter()
+    data = _ollama_post("/api/chat", payload)
+    record(ollama_stats(model_name, data, time.perf_counter() - t0))
+    return remove_think_blocks(data.get("message", {}).get("content", "").strip())
 
 
 # ---------------------- Transformers (HF) yolu — YENİ ----------------------
 
-def _hf_chat(model_id: str, system: str, user: str, temperature: float, max_new_tokens: int) -> str:
-    """Transformers backend: tek çağrıda (system + user) sohbet."""
-    from .backends.transformers_backend import chat as hf_chat
-    text = hf_chat(model_id, system or "", user or "",
-                   temperature=temperature, max_new_tokens=max_new_tokens)
-    return remove_think_blocks(text)
+def _hf_chat(model_id: str, system: str, user: str, temperature: float, max_new_tokens: int,
+             draft_model: Optional[str] = None, draft_tokens: Optional[int] = None) -> str:
+    """
+    Transformers backend: tek çağrıda (system + user) sohbet. draft_model verilirse spekülatif üretim.
+    Trafik kaydı/replay (utils/recorder.py) bu noktadan geçer; replay'de model yüklenmez.
+    """
+    request = {"system": system or "", "user": user or "", "temperature": temperature,
+               "max_new_tokens": max_new_tokens, "draft_model": draft_model, "draft_tokens": draft_tokens}
+
+    def _call() -> str:
+        from .backends.transformers_backend import chat as hf_chat
+        return hf_chat(model_id, system or "", user or "",
+                       temperature=temperature, max_new_tokens=max_new_tokens,
+                       draft_model_id=draft_model, draft_tokens=draft_tokens)
+
+    return remove_think_blocks(upstream("llm", f"hf:{model_id}", request, _call))
+
+
+def ensure_turkish(model_name: str, text: str, backend: str = "ollama") -> str:
+    """
+    İngilizceye kaymış Ollama çıktısını Türkçeye yeniden yazar; yük altında (degraded "rewrite"),
+    çıktı Türkçe görünüyorsa veya backend Ollama değilse metni aynen döndürür.
+    """
+    if backend in ("transformers", "hf", "huggingface") or degraded("rewrite") or not looks_english(text):
+        return text
+    return _rewrite_turkish_ollama(model_name, text)
 
 
 # ====================== GENEL KAMU API’SI ======================
@@ -89,15 +134,22 @@ def query_model(model_name: str,
                 options: Optional[Dict[str, Any]] = None,
                 backend: str = "ollama",
                 temperature: Optional[float] = None,
-                max_tokens: Optional[int] = None) -> str:
+                max_tokens: Optional[int] = None,
+                draft_model: Optional[str] = None,
+                draft_tokens: Optional[int] = None,
+                logprobs: bool = False,
+                rewrite: bool = True) -> str:
     """
     Tek seferlik 'prompt' çağrısı.
       - backend="ollama" → localhost:11434 /api/generate (mevcut davranış)
       - backend="transformers" → HF/Transformers ile yerel inference (system boş)
+      - draft_model/draft_tokens yalnızca transformers yolunda kullanılır (assisted generation).
+      - logprobs: yalnızca Ollama; token log-olasılıkları telemetri kaydına (mean_logprob) işlenir.
+      - rewrite=False: İngilizceye kayan Ollama çıktısı Türkçeye yeniden yazılmaz (ham çıktı döner).
     """
     # Varsayılanlar
     temperature = 0.2 if temperature is None else float(temperature)
-    num_predict = int(options.get("num_predict", 128) if options else (max_tokens or 128))
+    num_predict = scale_max_tokens(int(options.get("num_predict", 128) if options else (max_tokens or 128)))
 
     if backend in ("transformers", "hf", "huggingface"):
       
@@ -105,7 +157,8 @@ def query_model(model_name: str,
             "Cevabını yalnızca Türkçe ver. İngilizce hiçbir kelime KULLANMA.\n"
             "Yanıtların açık, anlaşılır ve motive edici olsun."
         )
-        out = _hf_chat(model_name, system, prompt, temperature, max_new_tokens=num_predict)
+        out = _hf_chat(model_name, system, prompt, temperature, max_new_tokens=num_predict,
+                       draft_model=draft_model, draft_tokens=draft_tokens)
         
         return out
 
@@ -119,11 +172,12 @@ def query_model(model_name: str,
         )
 
     try:
-        out = _ollama_generate(model_name, full_prompt, temperature, num_predict)
-        if purpose != "dispatcher" and _looks_english(out):
-            out = _rewrite_turkish_ollama(model_name, out)
+        out = _ollama_generate(model_name, full_prompt, temperature, num_predict, logprobs=logprobs)
+        # yük altında ikinci (yeniden yazım) model çağrısı atlanır
+        if rewrite and purpose != "dispatcher":
+            out = ensure_turkish(model_name, out)
         return out
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ReplayMiss) as e:
         return f"[HATA] Model isteği başarısız oldu: {e}"
 
 
@@ -132,33 +186,44 @@ def query_chat_model(model_name: str,
                      system_prompt: str = "",
                      backend: str = "ollama",
                      temperature: Optional[float] = None,
-                     max_tokens: Optional[int] = None) -> str:
+                     max_tokens: Optional[int] = None,
+                     draft_model: Optional[str] = None,
+                     draft_tokens: Optional[int] = None,
+                     logprobs: bool = False,
+                     rewrite: bool = True) -> str:
     """
     Chat tarzı çağrı.
       - history ya tam 'messages' listesi (role/content) ya da düz kullanıcı metni olabilir.
       - backend:
           * "ollama"       → /api/chat (mevcut davranış korunur)
           * "transformers" → messages → (system,user) birleştirilip HF/Transformers ile çalışır
+      - draft_model: (yalnızca transformers) spekülatif üretim için küçük taslak model
+      - logprobs: (yalnızca ollama) token log-olasılıkları telemetri kaydına işlenir
+      - rewrite=False: (yalnızca ollama) İngilizceye kayan çıktı yeniden yazılmaz
     """
     temperature = 0.2 if temperature is None else float(temperature)
-    num_predict = 256 if max_tokens is None else int(max_tokens)
+    num_predict = scale_max_tokens(256 if max_tokens is None else int(max_tokens))
 
     if backend in ("transformers", "hf", "huggingface"):
         # messages -> (system, user) dönüştür
+        # system metni sabit kalırsa backend'de önbellekteki token'lar kullanılır;
+        # kullanıcı parçaları tek geçişte birleştirilir
         sys = system_prompt or ""
-        user = ""
         if isinstance(history, list):
+            user_parts = []
             for m in history:
                 role = (m.get("role") or "").lower()
                 content = m.get("content", "")
                 if role == "system" and not sys and content:
                     sys = content
                 elif role == "user" and content:
-                    user += content + "\n"
+                    user_parts.append(content)
+            user = "\n".join(user_parts)
         else:
             user = str(history or "")
         user = user.strip()
-        return _hf_chat(model_name, sys, user, temperature, max_new_tokens=num_predict)
+        return _hf_chat(model_name, sys, user, temperature, max_new_tokens=num_predict,
+                        draft_model=draft_model, draft_tokens=draft_tokens)
 
     # ---- OLLAMA (varsayılan) ----
     try:
@@ -171,9 +236,9 @@ def query_chat_model(model_name: str,
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": str(history or "")})
 
-        out = _ollama_chat(model_name, messages, temperature, num_predict)
-        if _looks_english(out):
-            out = _rewrite_turkish_ollama(model_name, out)
+        out = _ollama_chat(model_name, messages, temperature, num_predict, logprobs=logprobs)
+        if rewrite:
+            out = ensure_turkish(model_name, out)
         return out
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ReplayMiss) as e:
         return f"[HATA] Chat modeli isteği başarısız oldu: {e}"
@@ -1,18 +1,46 @@
 
 import os
+import threading
+
 import yaml
 
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 YAML_PATH = os.path.join(ROOT_DIR, "agent_configs.yaml")
 
-if not os.path.isfile(YAML_PATH):
-    raise FileNotFoundError(
-        f"agent_configs.yaml bulunamadı. Beklenen konum: {YAML_PATH}"
-    )
 
-with open(YAML_PATH, "r", encoding="utf-8") as f:
-    data = yaml.safe_load(f) or {}
+def load_agent_configs(path: str = YAML_PATH) -> tuple[dict, dict]:
+    """agent_configs.yaml → (ajan config'leri, dispatcher config'i). Sıcak yeniden yüklemede de kullanılır."""
+    if not os.path.isfile(path):
+        raise FileNotFoundError(
+            f"agent_configs.yaml bulunamadı. Beklenen konum: {path}"
+        )
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+
+    return data.get("agents", {}) or {}, data.get("dispatcher", {}) or {}
+
+
+# Açılış config'i ilk erişimde okunur (import sırasında dosya okunmaz; bench/importtime.py bütçesi)
+_STARTUP: tuple[dict, dict] | None = None
+_STARTUP_LOCK = threading.Lock()
+
+
+def _startup_configs() -> tuple[dict, dict]:
+    global _STARTUP
+    if _STARTUP is None:
+        with _STARTUP_LOCK:
+            if _STARTUP is None:
+                _STARTUP = load_agent_configs()
+    return _STARTUP
+
+
+def agent_configs() -> dict:
+    """Süreç açılışındaki ajan config'leri (sıcak yeniden yüklemede etkin olan: ConfigSnapshot)."""
+    return _startup_configs()[0]
+
 
-AGENT_CONFIGS = data.get("agents", {})
-DISPATCHER_CONFIG = data.get("dispatcher", {})
+def dispatcher_config() -> dict:
+    """Süreç açılışındaki dispatcher config'i."""
+    return _startup_configs()[1]
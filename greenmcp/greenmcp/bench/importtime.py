@@ -0,0 +1,69 @@
+"""
+Import süresi bütçesi kontrolü.
+
+    python -m greenmcp.bench.importtime                      # greenmcp.main, bütçe 1.0 sn
+    python -m greenmcp.bench.importtime --module greenmcp.chat_cli --budget 0.3
+    python -m greenmcp.bench.importtime --top 20
+
+Modül ayrı bir yorumlayıcıda `python -X importtime` ile import edilir; kümülatif süre
+bütçeyi aşarsa çıkış kodu 1 olur (CI'da regresyon kapısı olarak kullanılabilir).
+Soğuk başlangıç ölçülebilsin diye DISABLE_WARMUP=1 ayarlanır.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure(module: str, runs: int = 3) -> tuple[float, list[tuple[int, int, str]]]:
+    """En iyi (en düşük) kümülatif süreyi ve o koşunun (self_us, cum_us, modül) satırlarını döndürür."""
+    env = dict(os.environ, DISABLE_WARMUP="1")
+    best_total, best_rows = None, []
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"'{module}' import edilemedi:\n{proc.stderr[-2000:]}")
+        rows, total = [], None
+        for line in proc.stderr.splitlines():
+            m = _LINE_RE.match(line)
+            if not m:
+                continue
+            self_us, cum_us, name = int(m.group(1)), int(m.group(2)), m.group(4)
+            rows.append((self_us, cum_us, name))
+            if name == module:
+                total = cum_us
+        if total is None:
+            total = sum(r[0] for r in rows)
+        if best_total is None or total < best_total:
+            best_total, best_rows = total, rows
+    return best_total / 1e6, best_rows
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Import süresi bütçe kontrolü")
+    ap.add_argument("--module", default="greenmcp.main")
+    ap.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_S", "1.0")),
+                    help="saniye cinsinden azami kümülatif import süresi")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=10, help="en pahalı N modülü listele (self süresine göre)")
+    args = ap.parse_args(argv)
+
+    total_s, rows = measure(args.module, args.runs)
+    print(f"{args.module}: {total_s:.3f} sn (bütçe {args.budget:.3f} sn)")
+    for self_us, cum_us, name in sorted(rows, reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self  {cum_us / 1000:8.1f} ms cum  {name}")
+
+    if total_s > args.budget:
+        print(f"[HATA] import süresi bütçeyi aştı: {total_s:.3f} > {args.budget:.3f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
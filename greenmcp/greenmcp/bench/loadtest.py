@@ -0,0 +1,277 @@
+"""
+Uçtan uca yük testi: /chat ve /ask'i niyet karışımıyla sürer; ağ gerektirmez.
+
+    python -m greenmcp.bench.loadtest                                  # sunucu + sahte servisler süreç içinde
+    python -m greenmcp.bench.loadtest --concurrency 32 --duration 60 --mix calc=2,weather=1,qa=3,multi=1
+    python -m greenmcp.bench.loadtest --target http://localhost:8000   # çalışan bir sunucuya karşı
+    python -m greenmcp.bench.loadtest --json before.json               # orkestrasyon değişikliği öncesi/sonrası
+
+Süreç içi modda bench/stubs.py (sahte Ollama + mikroservisler) ve GreenMCP sunucusu yerel portlarda
+başlatılır; OLLAMA_URL ve *_BASE_URL değişkenleri sahte servise yönlendirilir, model ısıtma kapatılır ve
+hafıza bellek içinde (veya --memory local ile geçici bir klasörde) tutulur.
+Rapor: toplam/niyet bazında verim, gecikme yüzdelikleri, hata oranı, zaman pencereleri ve
+/metrics farkından aşama (stage) kırılımı. Aynı --seed aynı istek dizisini üretir.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+
+INTENTS = {
+    "calc": ("/ask", [
+        "Bugün 12 km araba kullandım ve 3 kWh elektrik harcadım.",
+        "2 pet şişe ve 1 porsiyon tavuk tükettim, karbon ayak izim ne kadar?",
+        "Haftada 40 km otobüs ile gidiyorum, emisyonu hesapla.",
+    ]),
+    "weather": ("/ask", [
+        "İstanbul hava durumu nasıl?",
+        "Muğla'da bugün yağış olasılığı var mı?",
+        "Ankara için hava durumu nedir?",
+    ]),
+    "qa": ("/chat", [
+        "Geri dönüşüm neden önemlidir?",
+        "Evde enerji tasarrufu için ne yapabilirim?",
+        "Kompost nasıl yapılır?",
+    ]),
+    "multi": ("/chat", [
+        "10 km araba kullandım. Bunu azaltmak için ne önerirsin? Yarın İzmir'de hava nasıl olacak?",
+        "3 kWh elektrik harcadım. Tasarruf için ipuçları verir misin?",
+    ]),
+}
+
+_STAGE_RE = re.compile(r'^greenmcp_stage_seconds_(sum|count)\{stage="([^"]*)",target="([^"]*)",model="([^"]*)"\}\s+(\S+)$')
+
+
+# ---------------------- Süreç içi sunucular ----------------------
+
+def _serve(app, port: int) -> None:
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name=f"bench-{port}", daemon=True).start()
+
+
+def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"[HATA] {url} {timeout:.0f} sn içinde hazır olmadı.")
+
+
+def start_inprocess(stub_port: int, server_port: int, memory: str = "memory") -> str:
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    # sunucu modülü import edilmeden önce: kayıt ve ısıtma kapalı (transformers modeli yüklenmez),
+    # hafıza bellek içi; "local" seçilirse Chroma gerçek memory_store yerine geçici klasöre yazar
+    os.environ.pop("RECORD_PATH", None)
+    os.environ["DISABLE_WARMUP"] = "1"
+    os.environ["MEMORY_BACKEND"] = memory
+    os.environ["MEMORY_STORE_DIR"] = tempfile.mkdtemp(prefix="greenmcp-bench-")
+    for key in ("CALC_BASE_URL", "WEATHER_BASE_URL", "ECO_FACTS_BASE_URL", "ECO_ANIMALS_BASE_URL"):
+        os.environ[key] = stub_url
+    os.environ["OLLAMA_URL"] = stub_url
+
+    from .stubs import app as stub_app
+    _serve(stub_app, stub_port)
+    _wait_ready(f"{stub_url}/docs")
+
+    # sunucu modülü ortam değişkenleri ayarlandıktan sonra import edilir (OLLAMA_URL import'ta okunur)
+    from ..mcp_server.server import app as mcp_app
+    _serve(mcp_app, server_port)
+    target = f"http://127.0.0.1:{server_port}"
+    _wait_ready(f"{target}/health")
+    return target
+
+
+# ---------------------- Yük üretici ----------------------
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in INTENTS:
+            raise ValueError(f"[HATA] Bilinmeyen niyet: {name} (geçerli: {', '.join(INTENTS)})")
+        mix[name] = float(w or 1)
+    return mix or {k: 1.0 for k in INTENTS}
+
+
+def _payload(endpoint: str, text: str, worker: int) -> dict:
+    if endpoint == "/chat":
+        return {"message": text, "user_id": f"bench-{worker}", "session_id": f"bench-{worker}"}
+    return {"input": text, "user_id": f"bench-{worker}", "session_id": f"bench-{worker}"}
+
+
+def _has_error(body: dict) -> bool:
+    resp = (body or {}).get("response") or {}
+    items = resp.get("responses") or []
+    return not items or any("error" in it or str(it.get("output", "")).startswith("[HATA]") for it in items)
+
+
+async def _worker(i: int, client: httpx.AsyncClient, target: str, mix: dict, seed: int,
+                  stop_at: float, budget: list, t0: float, results: list) -> None:
+    rng = random.Random(seed * 1000 + i)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < stop_at:
+        if budget[0] <= 0:
+            return
+        budget[0] -= 1
+        intent = rng.choices(names, weights)[0]
+        endpoint, texts = INTENTS[intent]
+        text = rng.choice(texts)
+        start = time.monotonic()
+        status, ok = 0, False
+        try:
+            r = await client.post(target + endpoint, json=_payload(endpoint, text, i))
+            status = r.status_code
+            ok = status == 200 and not _has_error(r.json())
+        except (httpx.HTTPError, ValueError):
+            ok = False
+        results.append((start - t0, intent, time.monotonic() - start, ok, status))
+
+
+async def _scrape_stages(client: httpx.AsyncClient, target: str) -> dict:
+    try:
+        r = await client.get(target + "/metrics")
+        r.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    out = defaultdict(lambda: [0.0, 0.0])
+    for line in r.text.splitlines():
+        m = _STAGE_RE.match(line)
+        if m:
+            kind, stage, tgt, _model, val = m.groups()
+            key = f"{stage}:{tgt}" if tgt else stage
+            out[key][0 if kind == "sum" else 1] += float(val)
+    return dict(out)
+
+
+async def run_load(target: str, concurrency: int, duration: float, requests: int, mix: dict,
+                   seed: int) -> tuple[list, dict, float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=300.0, limits=limits) as client:
+        before = await _scrape_stages(client, target)
+        t0 = time.monotonic()
+        stop_at = t0 + duration if duration else float("inf")
+        budget = [requests if requests else float("inf")]
+        results: list = []
+        await asyncio.gather(*[
+            _worker(i, client, target, mix, seed, stop_at, budget, t0, results) for i in range(concurrency)
+        ])
+        elapsed = time.monotonic() - t0
+        after = await _scrape_stages(client, target)
+    stages = {}
+    for key, (s, c) in after.items():
+        s0, c0 = before.get(key, (0.0, 0.0))
+        if c - c0 > 0:
+            stages[key] = {"count": int(c - c0), "mean_ms": round((s - s0) / (c - c0) * 1000, 2),
+                           "total_s": round(s - s0, 3)}
+    return results, stages, elapsed
+
+
+# ---------------------- Rapor ----------------------
+
+def _pct(sorted_vals: list, p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(p / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[idx]
+
+
+def _summary(rows: list, elapsed: float) -> dict:
+    lat = sorted(r[2] for r in rows)
+    errors = sum(1 for r in rows if not r[3])
+    return {
+        "requests": len(rows),
+        "rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+        "p50_ms": round(_pct(lat, 50) * 1000, 1),
+        "p90_ms": round(_pct(lat, 90) * 1000, 1),
+        "p99_ms": round(_pct(lat, 99) * 1000, 1),
+        "max_ms": round((lat[-1] if lat else 0.0) * 1000, 1),
+    }
+
+
+def build_report(results: list, stages: dict, elapsed: float, window: float) -> dict:
+    by_intent = defaultdict(list)
+    by_window = defaultdict(list)
+    for r in results:
+        by_intent[r[1]].append(r)
+        by_window[int(r[0] // window)].append(r)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "overall": _summary(results, elapsed),
+        "intents": {k: _summary(v, elapsed) for k, v in sorted(by_intent.items())},
+        "windows": [
+            {"t_s": w * window, **_summary(rows, window)} for w, rows in sorted(by_window.items())
+        ],
+        "stages": dict(sorted(stages.items(), key=lambda kv: -kv[1]["total_s"])),
+    }
+
+
+def print_report(rep: dict) -> None:
+    o = rep["overall"]
+    print(f"süre {rep['elapsed_s']} sn | {o['requests']} istek | {o['rps']} rps | hata %{o['error_rate'] * 100:.2f}")
+    print(f"{'':10} {'n':>6} {'rps':>8} {'hata%':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for name, s in [("toplam", o)] + list(rep["intents"].items()):
+        print(f"{name:10} {s['requests']:>6} {s['rps']:>8} {s['error_rate'] * 100:>7.2f} "
+              f"{s['p50_ms']:>7.1f}ms {s['p90_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms {s['max_ms']:>7.1f}ms")
+    print("\nzaman pencereleri:")
+    for w in rep["windows"]:
+        print(f"  t={w['t_s']:>6.1f}s  rps={w['rps']:>7}  p50={w['p50_ms']:>7.1f}ms  p99={w['p99_ms']:>7.1f}ms  "
+              f"hata%={w['error_rate'] * 100:.2f}")
+    if rep["stages"]:
+        print("\naşamalar (/metrics farkı):")
+        for key, s in rep["stages"].items():
+            print(f"  {key:32} n={s['count']:>6}  ort={s['mean_ms']:>9.2f}ms  toplam={s['total_s']:>8.3f}s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="GreenMCP uçtan uca yük testi")
+    ap.add_argument("--target", help="çalışan sunucu adresi; verilmezse sunucu + sahte servisler süreç içinde başlar")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=30.0, help="saniye (0: yalnızca --requests sınırı)")
+    ap.add_argument("--requests", type=int, default=0, help="toplam istek sınırı (0: sınırsız)")
+    ap.add_argument("--mix", default="calc=1,weather=1,qa=1,multi=1")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--window", type=float, default=5.0, help="zaman penceresi (sn)")
+    ap.add_argument("--stub-port", type=int, default=18080)
+    ap.add_argument("--server-port", type=int, default=18000)
+    ap.add_argument("--memory", choices=("memory", "local"), default="memory",
+                    help="süreç içi modda hafıza arka ucu; 'memory' Chroma/MiniLM yüklemez")
+    ap.add_argument("--json", help="raporu bu dosyaya JSON olarak yaz")
+    args = ap.parse_args(argv)
+
+    if not args.duration and not args.requests:
+        ap.error("--duration veya --requests verilmeli")
+    mix = parse_mix(args.mix)
+    target = args.target.rstrip("/") if args.target else start_inprocess(args.stub_port, args.server_port, args.memory)
+
+    results, stages, elapsed = asyncio.run(
+        run_load(target, args.concurrency, args.duration, args.requests, mix, args.seed)
+    )
+    rep = build_report(results, stages, elapsed, args.window)
+    rep["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    print_report(rep)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Kaydedilmiş trafiği (RECORD_PATH, utils/recorder.py) mevcut derlemeye karşı yeniden oynatır.
+Model ve ağ gerekmez: LLM ve tool HTTP çağrıları kayıttan yanıtlanır; hafıza bellek içi çalışır.
+
+    RECORD_PATH=traffic.jsonl.zst uvicorn greenmcp.mcp_server.server:app   # üretimde kayıt
+    python -m greenmcp.bench.replay traffic.jsonl.zst                      # yeni derlemede oynatma
+    python -m greenmcp.bench.replay traffic.jsonl --upstream-latency recorded --concurrency 8
+    python -m greenmcp.bench.replay traffic.jsonl --json diff.json --show 20
+
+Rapor: kayıt ve replay gecikme yüzdelikleri, istek başına gecikme farkı, yönlendirme ve çıktı
+farkları, dış çağrı eşleşmeleri (tam / sıradaki-aynı-hedef / yok).
+--upstream-latency recorded: kayıttaki dış çağrı sürelerini uygular (üretim trafik biçimi);
+zero (varsayılan): yalnızca orkestrasyon maliyeti ölçülür.
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import os
+import sys
+import time
+
+
+def _outputs(result: dict) -> list:
+    out = []
+    for r in (result or {}).get("responses", []):
+        out.append((r.get("agent"), r.get("output") if "output" in r else "[error] " + str(r.get("error"))))
+    return out
+
+
+def _pct(vals: list, p: float) -> float:
+    if not vals:
+        return 0.0
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, max(0, int(round(p / 100 * len(vals) + 0.5)) - 1))]
+
+
+def compare(entry: dict, trace, result: dict | None, error: str | None) -> dict:
+    """Tek isteğin kayıt ↔ replay karşılaştırması."""
+    rec_out = _outputs(entry.get("result"))
+    new_out = _outputs(result) if result is not None else []
+    ratio = difflib.SequenceMatcher(None, json.dumps(rec_out, ensure_ascii=False),
+                                    json.dumps(new_out, ensure_ascii=False)).ratio()
+    upstream_s = sum(ev.get("elapsed_s") or 0.0 for ev in entry.get("events") or [])
+    return {
+        "id": entry.get("id"),
+        "input": (entry.get("request") or {}).get("input"),
+        "recorded_s": entry.get("latency_s") or 0.0,
+        "recorded_upstream_s": round(upstream_s, 4),
+        "replay_s": round(trace.latency_s or 0.0, 4),
+        "route_changed": (entry.get("route") or []) != (trace.route or []),
+        "route": {"recorded": entry.get("route"), "replay": trace.route},
+        "output_changed": rec_out != new_out,
+        "similarity": round(ratio, 4),
+        "outputs": {"recorded": rec_out, "replay": new_out},
+        "upstream": dict(trace.hits),
+        "error": error,
+    }
+
+
+async def replay_all(entries: list, concurrency: int, simulate_latency: bool) -> list:
+    from ..utils.recorder import replaying
+    from ..mcp_server.server import server
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(entry: dict) -> dict:
+        async with sem:
+            result, error = None, None
+            with replaying(entry, simulate_latency=simulate_latency) as trace:
+                try:
+                    result = await server.run(dict(entry.get("request") or {}))
+                except Exception as e:
+                    error = repr(e)
+            return compare(entry, trace, result, error)
+
+    try:
+        # sıra korunur; concurrency=1 tamamen deterministiktir
+        return list(await asyncio.gather(*[_one(e) for e in entries]))
+    finally:
+        await server.summaries.stop(drain=False)
+
+
+def build_report(rows: list) -> dict:
+    rec = [r["recorded_s"] for r in rows]
+    new = [r["replay_s"] for r in rows]
+    overhead = [r["recorded_s"] - r["recorded_upstream_s"] for r in rows]
+    hits = {"exact": 0, "fuzzy": 0, "miss": 0}
+    for r in rows:
+        for k, v in r["upstream"].items():
+            hits[k] += v
+
+    def lat(vals: list) -> dict:
+        return {f"p{p}_ms": round(_pct(vals, p) * 1000, 1) for p in (50, 90, 99)}
+
+    return {
+        "requests": len(rows),
+        "errors": sum(1 for r in rows if r["error"]),
+        "route_changed": sum(1 for r in rows if r["route_changed"]),
+        "output_changed": sum(1 for r in rows if r["output_changed"]),
+        "mean_similarity": round(sum(r["similarity"] for r in rows) / len(rows), 4) if rows else 1.0,
+        "latency": {
+            "recorded": lat(rec),
+            "recorded_minus_upstream": lat(overhead),
+            "replay": lat(new),
+            "delta_ms": lat([n - o for n, o in zip(new, rec)]),
+        },
+        "upstream_matches": hits,
+    }
+
+
+def print_report(rep: dict, rows: list, show: int) -> None:
+    print(f"{rep['requests']} istek | hata {rep['errors']} | yönlendirme farkı {rep['route_changed']} | "
+          f"çıktı farkı {rep['output_changed']} | ort. benzerlik {rep['mean_similarity']}")
+    print(f"{'gecikme':28} {'p50':>10} {'p90':>10} {'p99':>10}")
+    for name, s in rep["latency"].items():
+        print(f"{name:28} {s['p50_ms']:>8.1f}ms {s['p90_ms']:>8.1f}ms {s['p99_ms']:>8.1f}ms")
+    m = rep["upstream_matches"]
+    print(f"dış çağrı eşleşmesi: tam={m['exact']} sıradaki={m['fuzzy']} yok={m['miss']}")
+    changed = [r for r in rows if r["route_changed"] or r["output_changed"] or r["error"]]
+    for r in changed[:show]:
+        print(f"\n--- {r['id']}  {str(r['input'])[:80]!r}  benzerlik={r['similarity']}")
+        if r["error"]:
+            print(f"  hata: {r['error']}")
+        if r["route_changed"]:
+            print(f"  yönlendirme: {r['route']['recorded']} → {r['route']['replay']}")
+        for (a0, o0), (a1, o1) in zip(r["outputs"]["recorded"], r["outputs"]["replay"]):
+            if (a0, o0) != (a1, o1):
+                print(f"  [{a0}] {str(o0)[:160]!r}\n  [{a1}] {str(o1)[:160]!r}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="GreenMCP trafik replay ve fark raporu")
+    ap.add_argument("log", help="kayıt dosyası (.jsonl veya .jsonl.zst)")
+    ap.add_argument("--limit", type=int, default=0, help="yalnızca ilk N istek (0: tümü)")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--upstream-latency", choices=("zero", "recorded"), default="zero")
+    ap.add_argument("--memory", choices=("memory", "local"), default="memory",
+                    help="hafıza arka ucu; 'memory' Chroma/MiniLM yüklemez")
+    ap.add_argument("--show", type=int, default=10, help="ayrıntısı yazdırılacak farklı istek sayısı")
+    ap.add_argument("--json", help="rapor + istek başına farkları bu dosyaya yaz")
+    args = ap.parse_args(argv)
+
+    # sunucu modülü import edilmeden önce: kayıt kapalı, ısıtma ve özetler yok, hafıza bellek içi
+    os.environ.pop("RECORD_PATH", None)
+    os.environ["MEMORY_BACKEND"] = args.memory
+    os.environ["DISABLE_WARMUP"] = "1"
+    os.environ.setdefault("SUMMARY_EVERY_TURNS", str(10**9))
+
+    from ..utils.recorder import read_log, set_offline
+    set_offline(True)
+
+    entries = []
+    for entry in read_log(args.log):
+        entries.append(entry)
+        if args.limit and len(entries) >= args.limit:
+            break
+    if not entries:
+        print(f"[HATA] Kayıt boş: {args.log}", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    rows = asyncio.run(replay_all(entries, max(1, args.concurrency), args.upstream_latency == "recorded"))
+    rep = build_report(rows)
+    rep["elapsed_s"] = round(time.perf_counter() - t0, 2)
+    print_report(rep, rows, args.show)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"report": rep, "requests": rows}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Yük testi için sahte üst servisler: Ollama (/api/generate, /api/chat) ve mikroservisler
+(/calc, /geocode, /weather, /query). Ağ gerektirmez; tek portta çalışır.
+
+    uvicorn greenmcp.bench.stubs:app --port 18080
+
+Ortam değişkenleri (gecikmeler milisaniye):
+  STUB_LLM_TTFT_MS   → ilk token gecikmesi (varsayılan: 40)
+  STUB_LLM_TOK_MS    → token başına üretim süresi (varsayılan: 4)
+  STUB_LLM_TOKENS    → yanıt başına üretilen token (varsayılan: 48; num_predict ile sınırlanır)
+  STUB_TOOL_MS       → mikroservis yanıt gecikmesi (varsayılan: 15)
+  STUB_ERROR_RATE    → 0..1, bu oranda isteğe 503 döner (varsayılan: 0)
+
+Gecikme ve hatalar istek içeriğinin özetinden türetilir; aynı yük aynı sonuçları üretir.
+"""
+import asyncio
+import hashlib
+import os
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="GreenMCP bench stubs")
+
+_WORDS = ("geri dönüşüm enerji tasarrufu toplu taşıma bisiklet yerel ürün su tüketimi "
+          "karbon ayak izi yenilenebilir kompost verimlilik").split()
+
+
+def _ms(name: str, default: str) -> float:
+    return float(os.getenv(name, default)) / 1000.0
+
+
+def _unit(key: str) -> float:
+    """İçerikten türetilen 0..1 arası deterministik sayı."""
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def _fail(key: str) -> bool:
+    return _unit("err:" + key) < float(os.getenv("STUB_ERROR_RATE", "0"))
+
+
+def _reply(key: str, n_tokens: int) -> str:
+    start = int(_unit(key) * len(_WORDS))
+    words = [_WORDS[(start + i) % len(_WORDS)] for i in range(max(1, n_tokens))]
+    return "Öneri: " + " ".join(words) + "."
+
+
+async def _generate(key: str, prompt_text: str, options: dict) -> tuple[str, dict]:
+    n = min(int(os.getenv("STUB_LLM_TOKENS", "48")), int((options or {}).get("num_predict") or 10**6))
+    ttft = _ms("STUB_LLM_TTFT_MS", "40")
+    decode = n * _ms("STUB_LLM_TOK_MS", "4")
+    await asyncio.sleep(ttft + decode)
+    prompt_tokens = max(1, len(prompt_text) // 4)
+    stats = {
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": n,
+        "prompt_eval_duration": int(ttft * 1e9),
+        "eval_duration": int(decode * 1e9),
+        "load_duration": 0,
+        "total_duration": int((ttft + decode) * 1e9),
+    }
+    return _reply(key, n), stats
+
+
+def _split_reply(text: str) -> str:
+    # dispatcher cümle bölme istemi: metni cümlelere ayırıp satır satır döndür
+    m = re.search(r"Metin:\n(.*?)\n\nCümleler:", text, re.DOTALL)
+    body = m.group(1) if m else text
+    return "\n".join(s.strip() for s in re.split(r"(?<=[.!?])\s+", body) if s.strip())
+
+
+@app.post("/api/generate")
+async def ollama_generate(req: Request):
+    data = await req.json()
+    prompt = data.get("prompt") or ""
+    if _fail(prompt):
+        return JSONResponse({"error": "stub overloaded"}, status_code=503)
+    text, stats = await _generate(prompt, prompt, data.get("options") or {})
+    return {"model": data.get("model"), "response": text, "done": True, **stats}
+
+
+@app.post("/api/chat")
+async def ollama_chat(req: Request):
+    data = await req.json()
+    messages = data.get("messages") or []
+    joined = "\n".join(str(m.get("content", "")) for m in messages)
+    if _fail(joined):
+        return JSONResponse({"error": "stub overloaded"}, status_code=503)
+    text, stats = await _generate(joined, joined, data.get("options") or {})
+    if "Cümleler:" in joined:
+        text = _split_reply(joined)
+    return {"model": data.get("model"), "message": {"role": "assistant", "content": text}, "done": True, **stats}
+
+
+@app.post("/calc")
+async def calc(req: Request):
+    data = await req.json()
+    await asyncio.sleep(_ms("STUB_TOOL_MS", "15"))
+    items = [{**it, "co2e_kg": round(float(it.get("amount") or 0) * 0.2, 3)} for it in data.get("items", [])]
+    return {"co2e_kg": round(sum(it["co2e_kg"] for it in items), 3), "items": items, "unknown": []}
+
+
+@app.get("/geocode")
+async def geocode(q: str = "", count: int = 1):
+    await asyncio.sleep(_ms("STUB_TOOL_MS", "15"))
+    u = _unit(q)
+    return {"name": q.title() or "İstanbul", "country": "TR", "lat": round(36 + 6 * u, 3), "lon": round(26 + 18 * u, 3)}
+
+
+@app.get("/weather")
+async def weather(lat: float = 41.0, lon: float = 29.0):
+    await asyncio.sleep(_ms("STUB_TOOL_MS", "15"))
+    t = "2025-01-01T12:00"
+    return {
+        "current_weather": {"temperature": round(10 + 15 * _unit(f"{lat},{lon}"), 1), "windspeed": 12.0, "time": t},
+        "hourly": {"time": [t], "temperature_2m": [14.0], "precipitation_probability": [20], "relative_humidity_2m": [60]},
+    }
+
+
+@app.post("/query")
+async def query(req: Request):
+    data = await req.json()
+    await asyncio.sleep(_ms("STUB_TOOL_MS", "15"))
+    text = str(data.get("text") or "")
+    return {"text": _reply(text, 12)}
@@ -7,14 +7,14 @@ import re
 CHAT_URL = "http://localhost:8000/chat"
 ASK_URL = "http://localhost:8000/ask"  
 
-history = []
+# Geçmiş sunucuda (oturum deposu) tutulur; her istekte yalnızca yeni mesaj gönderilir.
+SESSION_ID = "demo"
 
-def build_chat_payload(history, message):
+def build_chat_payload(message):
     return {
-        "history": history,
         "message": message,
         "user_id": "demo",
-        "session_id": "demo"
+        "session_id": SESSION_ID
     }
 
 def build_ask_payload(input_text, tool):
@@ -116,8 +116,7 @@ async def chat_loop():
                 print()
                 continue
 
-            history.append({"role": "user", "content": user_input})
-            payload = build_chat_payload(history, message=user_input)
+            payload = build_chat_payload(user_input)
             r = requests.post(CHAT_URL, json=payload, timeout=6000)
             r.raise_for_status()
 
@@ -131,7 +130,6 @@ async def chat_loop():
                     agent = item.get("agent", "bilinmeyen")
                     output = item.get("output", item.get("error", "Yanıt alınamadı."))
                     print(f"\n{agent}:\n{output}")
-                    history.append({"role": "assistant", "content": output})
                 print()
             else:
                 print("❌ Hiçbir yanıt alınamadı.\n")
@@ -6,11 +6,15 @@ import difflib
 import unicodedata
 from typing import List, Tuple
 
-from .agents.all_agents import AGENTS
-from .agents.load_configs import DISPATCHER_CONFIG
+from .agents.all_agents import default_agents
+from .agents.load_configs import dispatcher_config
 from .agents.llm_runner import query_chat_model  
+from .utils.log import get_logger, event, DEBUG, WARNING, ERROR
+from .utils.metrics import stage
+from .utils.profiling import profiled
+from .utils.overload import degraded
 
-print(" [DEBUG] dispatcher_agent.py YÜKLENDİ")
+_log = get_logger("dispatcher")
 
 # ----------------------------- Yardımcılar -----------------------------
 
@@ -71,7 +75,7 @@ def _regex_fallback_split(text: str) -> List[str]:
                 refined.append(s)
     return refined if refined else [t]
 
-def split_into_sentences(text: str) -> List[str]:
+def split_into_sentences(text: str, model: str | None = None) -> List[str]:
     """
     1) LLM ile böl.
     2) Güvenlik filtresi:
@@ -79,11 +83,11 @@ def split_into_sentences(text: str) -> List[str]:
        - Aksi halde token örtüşmesi ≥ %70 ise (küçük düzeltmeleri tolere eder) KABUL.
     3) Hiç güvenli satır kalmazsa regex fallback.
     """
-    print(f" [DEBUG] split_into_sentences() çağrıldı → input: {text}")
+    event(_log, DEBUG, "split_start", input=text)
     if not text or not isinstance(text, str):
         return []
 
-    model = DISPATCHER_CONFIG.get("model", "gemma3n:e4b")
+    model = model or dispatcher_config().get("model", "gemma3n:e4b")
 
     sys_msg = (
         "Aşağıdaki metni SADECE cümle sınırlarına göre böl. "
@@ -146,14 +150,14 @@ def split_into_sentences(text: str) -> List[str]:
                     safe.append(s)
 
         if safe:
-            print(f" [DEBUG] split_into_sentences() (LLM→SAFE) sonuçları: {safe}")
+            event(_log, DEBUG, "split_llm_safe", sentences=safe)
             return safe
 
-        print(" [WARN] LLM cümle genişletti/uydurdu; regex fallback kullanılacak.")
+        event(_log, WARNING, "split_llm_unsafe", fallback="regex")
         return _regex_fallback_split(text)
 
     except Exception as e:
-        print(f" [WARN] LLM bölme hatası: {e}; regex fallback kullanılacak.")
+        event(_log, WARNING, "split_llm_error", error=repr(e), fallback="regex")
         return _regex_fallback_split(text)
 
 
@@ -184,6 +188,24 @@ def _load_examples_from_prompt(prompt_text: str) -> List[Tuple[str, str]]:
             cur_msg = None
     return pairs
 
+_EXAMPLES_CACHE: dict[str, tuple[float, List[Tuple[str, str]]]] = {}
+
+def _examples_for(prompt_path: str) -> List[Tuple[str, str]]:
+    """Ayrıştırılmış örnekleri dosyanın mtime'ına göre önbellekler (toplu isteklerde her cümle için yeniden okunmaz)."""
+    try:
+        mtime = os.path.getmtime(prompt_path)
+    except OSError:
+        event(_log, ERROR, "prompt_missing", path=prompt_path)
+        return []
+    cached = _EXAMPLES_CACHE.get(prompt_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        examples = _load_examples_from_prompt(f.read())
+    _EXAMPLES_CACHE[prompt_path] = (mtime, examples)
+    event(_log, DEBUG, "examples_loaded", count=len(examples))
+    return examples
+
 # ---------------------- Benzerlik ve normalize ----------------------
 
 _TR_MAP = str.maketrans({
@@ -209,44 +231,54 @@ def _best_example_target(sent: str, examples: List[Tuple[str, str]]) -> Tuple[st
         sc = _similarity(sent, ex_msg)
         if sc > best_score:
             best_score, best_target = sc, ex_target
-    print(f" [DEBUG] example-match '{sent}' → {best_target} (score={best_score:.3f})")
+    event(_log, DEBUG, "example_match", sentence=sent, target=best_target, score=round(best_score, 3))
     return best_target, best_score
 
 # --------------------------- Ana karar verici ---------------------------
 
-def multi_decide_agents(prompt: str, history: list | None = None, valid_names: set[str] | None = None) -> list:
-    
+@profiled("multi_decide_agents")
+def multi_decide_agents(prompt: str, history: list | None = None, valid_names: set[str] | None = None,
+                        agent_names: set[str] | None = None, config: dict | None = None) -> list:
+    """
+    agent_names / config: sıcak yeniden yüklemede isteğin başladığı config anlık görüntüsü;
+    verilmezse açılış config'i (default_agents / dispatcher_config) kullanılır.
+    """
+    config = dispatcher_config() if config is None else config
     base_dir = os.path.abspath(os.path.dirname(__file__))
-    prompt_path = os.path.join(base_dir, DISPATCHER_CONFIG.get("prompt_path", "prompts/dispatcher.txt"))
-
-    # dispatcher.txt oku
-    try:
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            example_prompt = f.read()
-    except FileNotFoundError:
-        print(f"[HATA] Dispatcher prompt dosyası bulunamadı: {prompt_path}")
-        example_prompt = ""
+    prompt_path = os.path.join(base_dir, config.get("prompt_path", "prompts/dispatcher.txt"))
 
-    # Örnekleri yükle
-    examples = _load_examples_from_prompt(example_prompt)
-    print(f"[DISPATCHER] {len(examples)} örnek yüklendi.")
+    # dispatcher.txt örnekleri (dosya değişmedikçe tekrar okunmaz/ayrıştırılmaz)
+    examples = _examples_for(prompt_path)
 
     # Cümlelere ayır
-    sentences = split_into_sentences(prompt)
+    # yük altında LLM ile bölme yerine regex
+    if degraded("llm_split"):
+        with stage("split", model="regex"):
+            sentences = _regex_fallback_split(prompt)
+    else:
+        with stage("split", model=config.get("model", "")):
+            sentences = split_into_sentences(prompt, model=config.get("model"))
     if not sentences:
         sentences = [prompt]
 
     # agents ∪ dispatcher.txt’teki tüm hedefler (tool’lar dahil)
-    agent_names = set(AGENTS.keys())
+    agent_names = set(default_agents()) if agent_names is None else set(agent_names)
     tool_names  = {ex_target for _, ex_target in examples}
     valid_targets = valid_names if valid_names is not None else (agent_names | tool_names)
 
 
-    # (Sadece log amaçlı) kısa bağlam yaz
-    history_str = _format_history_for_dispatcher(history or [], limit=6)
-    if history_str:
-        print(" [DEBUG] history context enjekte edildi")
+    # (Sadece log amaçlı) kısa bağlam yaz — debug kapalıyken hiç hesaplanmaz
+    if _log.isEnabledFor(DEBUG):
+        history_str = _format_history_for_dispatcher(history or [], limit=6)
+        if history_str:
+            event(_log, DEBUG, "history_context", history=history_str)
+
+    with stage("route"):
+        return _route_sentences(sentences, examples, valid_targets, agent_names)
+
 
+def _route_sentences(sentences: List[str], examples: List[Tuple[str, str]], valid_targets: set[str],
+                     agent_names: set[str]) -> list:
     results = []
 
     for sentence in sentences:
@@ -255,15 +287,15 @@ def multi_decide_agents(prompt: str, history: list | None = None, valid_names: s
 
         # dispatcher.txt'den çıkan hedef valid_targets içinde değilse güvenli varsayılan qa_agent
         if not picked or (valid_targets and picked not in valid_targets):
-            print(f" Hedef geçersiz veya bulunamadı. Varsayılan: qa_agent (score={score:.3f})")
+            event(_log, DEBUG, "route_default", sentence=sent, picked=picked, target="qa_agent", score=round(score, 3))
             results.append({"agent": "qa_agent", "input": sent})
             continue
 
         task = {"agent": picked, "input": sent}
         # Hedef AGENTS’te değilse bunu “tool” kabul ediyoruz ve source_agent veriyoruz
-        if picked not in AGENTS:
+        if picked not in agent_names:
             task["source_agent"] = "qa_agent"
-        print(f"Dispatcher (örnek): '{sent}' → {picked} (score={score:.3f})")
+        event(_log, DEBUG, "route", sentence=sent, target=picked, score=round(score, 3))
         results.append(task)
 
     return results
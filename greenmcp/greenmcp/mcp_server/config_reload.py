@@ -0,0 +1,205 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from ..agents.load_configs import YAML_PATH, agent_configs, dispatcher_config, load_agent_configs
+from ..agents.all_agents import build_agents, default_agents
+from .load_tools import TOOLS_YAML
+from .tool_registry import load_tools_full
+from .target_pools import build_pools
+from ..tools.answer_cache import build_answer_caches
+from ..utils.log import get_logger, event, WARNING
+from ..utils.metrics import counter, gauge
+
+_log = get_logger("config")
+
+# agent_configs.yaml ve tools.yaml yeniden başlatmadan yüklenir.
+# Ortam değişkenleri:
+#   CONFIG_WATCH_INTERVAL_S       → dosya mtime kontrol aralığı (varsayılan: 2; 0: izleme kapalı, yalnızca /admin/reload)
+#   CONFIG_RELOAD_WARM_TIMEOUT_S  → takastan önce yeni modellerin ısınması için azami bekleme (varsayılan: 120)
+#   CONFIG_DRAIN_TIMEOUT_S        → eski config'le başlamış istekler için azami bekleme (varsayılan: 300)
+#
+# Her istek başladığı andaki ConfigSnapshot'ı sonuna kadar kullanır; takas tek atamadır. Böylece
+# uçuştaki istekler eski Agent/tool nesneleriyle biter, yeni istekler yenileri görür.
+
+CONFIG_VERSION = gauge("greenmcp_config_version", "Etkin config anlık görüntüsünün sürümü")
+CONFIG_RELOADS = counter("greenmcp_config_reloads_total", "Config yeniden yükleme denemeleri", ("result",))
+
+
+class ConfigSnapshot:
+    """Bir config sürümünden türetilen tüm nesneler; oluşturulduktan sonra değişmez."""
+
+    def __init__(self, version: int, agent_configs: dict, dispatcher_config: dict, agents: dict,
+                 tools: dict, allow_map: dict, answer_caches: dict, pools: dict):
+        self.version = version
+        self.loaded_at = time.time()
+        self.agent_configs = agent_configs
+        self.dispatcher_config = dispatcher_config
+        self.agents = agents
+        self.allow_map = allow_map
+        self.answer_caches = answer_caches
+        # hedef → TargetPool (mcp_server/target_pools.py); olmayan hedefler ortak "llm" havuzunda
+        self.pools = pools
+        # sunucunun hedef kayıt defteri: ajanlar + tool'lar (aynı adda tool ajanı ezer; eski davranış)
+        self.registry = {**agents, **tools}
+        self.tool_names = set(tools) - set(agents)
+        # ajan → sonucunu beklediği hedefler (agent_configs.yaml: consumes)
+        self.consumes = {name: list((cfg or {}).get("consumes") or []) for name, cfg in agent_configs.items()}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def use(self):
+        """İsteğin bu sürümü kullandığını işaretler (drain için sayaç)."""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    async def drain(self, timeout: float) -> bool:
+        """Bu sürümle başlamış istekler bitene kadar bekler; süre dolarsa False."""
+        deadline = time.monotonic() + timeout
+        while self.in_flight > 0:
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def summary(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": round(self.loaded_at, 3),
+            "agents": sorted(self.agents),
+            "tools": sorted(self.tool_names),
+            "in_flight": self.in_flight,
+            "pools": sorted(self.pools),
+        }
+
+
+def _pool_specs(agent_cfgs: dict, tool_pools: dict) -> dict:
+    specs = {name: (cfg or {}).get("pool") for name, cfg in (agent_cfgs or {}).items()}
+    specs.update(tool_pools or {})
+    return specs
+
+
+def initial_snapshot() -> ConfigSnapshot:
+    """Süreç açılışı: açılış config'leri ve default_agents() kullanılır (ilk erişimde okunur)."""
+    agent_cfgs = agent_configs()
+    tools, allow, tool_pools = load_tools_full()
+    return ConfigSnapshot(1, agent_cfgs, dispatcher_config(), default_agents(), tools, allow,
+                          build_answer_caches(agent_cfgs), build_pools(_pool_specs(agent_cfgs, tool_pools)))
+
+
+def load_snapshot(version: int, previous: Optional[ConfigSnapshot] = None) -> ConfigSnapshot:
+    """
+    Dosyalardan yeni anlık görüntü kurar (bloklayan; havuzda çalıştırılır). Hata fırlatırsa
+    etkin config değişmez. Config'i değişmeyen Agent ve yanıt önbelleği nesneleri yeniden kullanılır.
+    """
+    agent_cfgs, dispatcher_cfg = load_agent_configs(YAML_PATH)
+    prev_agents = None
+    if previous is not None:
+        prev_agents = {n: (previous.agent_configs.get(n), a) for n, a in previous.agents.items()}
+    agents = build_agents(agent_cfgs, prev_agents)
+    tools, allow, tool_pools = load_tools_full()
+    pools = build_pools(_pool_specs(agent_cfgs, tool_pools), previous.pools if previous is not None else None)
+
+    caches = build_answer_caches(agent_cfgs)
+    if previous is not None:
+        for name, cache in list(caches.items()):
+            old = previous.answer_caches.get(name)
+            if old is not None and (old.threshold, old.ttl_s) == (cache.threshold, cache.ttl_s):
+                caches[name] = old   # isabet istatistikleri korunur
+
+    targets = set(agents) | set(tools)
+    for src, allowed in (allow or {}).items():
+        unknown = [t for t in (allowed or []) if t not in targets]
+        if unknown:
+            event(_log, WARNING, "config_allow_unknown", agent=src, targets=unknown)
+    for name, cfg in agent_cfgs.items():
+        unknown = [t for t in ((cfg or {}).get("consumes") or []) if t not in targets]
+        if unknown:
+            event(_log, WARNING, "config_consumes_unknown", agent=name, targets=unknown)
+
+    return ConfigSnapshot(version, agent_cfgs, dispatcher_cfg, agents, tools, allow, caches, pools)
+
+
+def diff_snapshots(old: ConfigSnapshot, new: ConfigSnapshot) -> dict:
+    changed = sorted(n for n in set(old.agents) & set(new.agents) if old.agents[n] is not new.agents[n])
+    return {
+        "agents_added": sorted(set(new.agents) - set(old.agents)),
+        "agents_removed": sorted(set(old.agents) - set(new.agents)),
+        "agents_changed": changed,
+        "tools_added": sorted(new.tool_names - old.tool_names),
+        "tools_removed": sorted(old.tool_names - new.tool_names),
+        "allow_changed": old.allow_map != new.allow_map,
+        "dispatcher_changed": old.dispatcher_config != new.dispatcher_config,
+        "pools_changed": sorted(n for n in set(old.pools) | set(new.pools) if old.pools.get(n) is not new.pools.get(n)),
+    }
+
+
+def close_retired(old: ConfigSnapshot, new: ConfigSnapshot) -> int:
+    """Yeni sürümde kullanılmayan nesnelerden (ajan, tool, havuz) close() sunanları kapatır."""
+    live = {id(o) for o in new.registry.values()} | {id(p) for p in new.pools.values()}
+    closed = 0
+    for obj in list(old.registry.values()) + list(old.pools.values()):
+        fn = getattr(obj, "close", None)
+        if id(obj) not in live and callable(fn):
+            try:
+                fn()
+                closed += 1
+            except Exception as e:
+                event(_log, WARNING, "config_close_failed", obj=type(obj).__name__, error=repr(e))
+    return closed
+
+
+class ConfigWatcher:
+    """Config dosyalarının mtime'ını yoklar; değişince on_change() çağrılır (event loop içinde)."""
+
+    def __init__(self, on_change: Callable[[str], Awaitable], paths=(YAML_PATH, TOOLS_YAML),
+                 interval: float | None = None):
+        self.on_change = on_change
+        self.paths = tuple(paths)
+        self.interval = float(os.getenv("CONFIG_WATCH_INTERVAL_S", "2")) if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _mtimes(self) -> Dict[str, float]:
+        out = {}
+        for p in self.paths:
+            try:
+                out[p] = os.path.getmtime(p)
+            except OSError:
+                out[p] = -1.0
+        return out
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self) -> None:
+        seen = self._mtimes()
+        while True:
+            await asyncio.sleep(self.interval)
+            cur = self._mtimes()
+            if cur == seen:
+                continue
+            # editörler dosyayı birkaç adımda yazabilir; kısa bir süre oturmasını bekle
+            await asyncio.sleep(min(0.5, self.interval))
+            cur = self._mtimes()
+            changed = [os.path.basename(p) for p in self.paths if cur[p] != seen[p]]
+            seen = cur
+            try:
+                await self.on_change("watch:" + ",".join(changed))
+            except Exception as e:
+                event(_log, WARNING, "config_watch_failed", error=repr(e))
+
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from ..tools.memory_manager import (
+    search_memory, get_full_memory, get_recent_pairs, get_recent_summary,
+    embed_query, add_write_listener, is_remote, write_is_deferred,
+)
+from ..utils.async_exec import offload
+from ..utils.log import get_logger, event, DEBUG
+
+_log = get_logger("enrichment")
+
+# Ortam değişkenleri:
+#   ENRICH_CACHE_TTL_S   → kullanıcı başına önbellek ömrü (varsayılan: 300; MEMORY_BACKEND=http ise 5)
+#   ENRICH_CACHE_USERS   → önbellekte tutulan azami kullanıcı (varsayılan: 1024)
+#   ENRICH_CACHE_QUERIES → kullanıcı başına saklanan arama sonucu (varsayılan: 16)
+
+PAIRS_K = 2
+FULL_MEMORY_CHARS = 1500
+
+PAIR_RE = re.compile(r"\[Soru\]\s*(.*?)\s*\[Yanıt\]\s*(.*)", re.DOTALL)
+
+_MISSING = object()
+
+
+def _extract_pair(text: str) -> str | None:
+    m = PAIR_RE.search(text or "")
+    if not m:
+        return None
+    q = (m.group(1) or "").strip()
+    a = (m.group(2) or "").strip()
+    if len(q) > 300:
+        q = q[:300] + "…"
+    if len(a) > 300:
+        a = a[:300] + "…"
+    return f"SON KONU — Kullanıcı: {q}\nAsistan: {a}"
+
+
+class _UserEntry:
+    def __init__(self):
+        self.created = time.monotonic()
+        self.summary = _MISSING
+        self.pairs = _MISSING
+        self.full = _MISSING
+        self.searches: "OrderedDict[tuple, list]" = OrderedDict()
+        # yazımdan önce başlamış okumanın sonucu saklanmaz: version her yazımda (özet/çift/tam hafıza),
+        # search_version arama sonuçları düştüğünde artar
+        self.version = 0
+        self.search_version = 0
+
+
+class EnrichmentCache:
+    """
+    Kullanıcı başına özet / son çiftler / tam hafıza / arama sonuçları önbelleği.
+    memory_manager yazım dinleyicisi ile artımlı güncellenir:
+      - pair      → son çiftler listesine eklenir
+      - summary   → son özet değişir
+      - diğer     → tam hafızaya eklenir
+      - arama sonuçları yalnızca yeni kayıt aramada görünür olduğunda ve yalnızca etkilenebilecek
+        anahtarlar için düşer: yazımın oturumu ve oturumdan bağımsız (session_id=None) aramalar.
+        Write-behind tamponu açıkken kayıt flush'tan önce aramada görünmez → düşürme "flushed" ile
+        yapılır; böylece aynı turun ajanları ve tamponlanmış turlar arası tekrar eden sorgular isabet eder
+      - flushed   → o oturumun (ve oturumsuz) arama sonuçları düşer
+      - clear     → kullanıcı girdisi tamamen silinir
+    """
+
+    def __init__(self, ttl_s: float | None = None, max_users: int | None = None, max_queries: int | None = None):
+        # paylaşılan hafızada diğer işçilerin yazımları yazım dinleyicisine ulaşmaz → kısa ömür
+        default_ttl = "5" if is_remote() else "300"
+        self.ttl_s = float(os.getenv("ENRICH_CACHE_TTL_S", default_ttl)) if ttl_s is None else ttl_s
+        self.max_users = max_users or int(os.getenv("ENRICH_CACHE_USERS", "1024"))
+        self.max_queries = max_queries or int(os.getenv("ENRICH_CACHE_QUERIES", "16"))
+        self._users: "OrderedDict[str, _UserEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        add_write_listener(self.on_write)
+
+    def entry(self, user_id: str) -> _UserEntry:
+        with self._lock:
+            e = self._users.get(user_id)
+            if e is None or (time.monotonic() - e.created) > self.ttl_s:
+                e = _UserEntry()
+                self._users[user_id] = e
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return e
+
+    def peek_search(self, e: _UserEntry, key: tuple):
+        with self._lock:
+            return e.searches.get(key, _MISSING)
+
+    def get_search(self, e: _UserEntry, key: tuple):
+        with self._lock:
+            hit = e.searches.get(key, _MISSING)
+            if hit is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return hit
+
+    def put_search(self, e: _UserEntry, key: tuple, value: list, version: int | None = None) -> None:
+        with self._lock:
+            if version is not None and version != e.search_version:
+                return
+            e.searches[key] = value
+            while len(e.searches) > self.max_queries:
+                e.searches.popitem(last=False)
+
+    def on_write(self, user_id: str, role: str, content: str | None, session_id: str | None) -> None:
+        with self._lock:
+            e = self._users.get(user_id)
+            if e is None:
+                return
+            if role == "clear":
+                del self._users[user_id]
+                return
+            if role == "flushed" or not write_is_deferred():
+                self._drop_searches(e, session_id)
+            if role == "flushed":
+                return
+            e.version += 1
+            if role == "pair":
+                if e.pairs is not _MISSING:
+                    e.pairs = (e.pairs + [content])[-PAIRS_K:]
+            elif role == "summary":
+                e.summary = content
+            if e.full is not _MISSING and content:
+                e.full = e.full + [content]
+
+    def put_value(self, e: _UserEntry, attr: str, value, version: int) -> None:
+        """Özet / son çiftler / tam hafıza okumasını, okuma sürerken yazım olmadıysa saklar."""
+        with self._lock:
+            if version == e.version:
+                setattr(e, attr, value)
+
+    @staticmethod
+    def _drop_searches(e: _UserEntry, session_id: str | None) -> None:
+        # self._lock tutulurken çağrılır; başka oturumlara sınırlı aramalar yeni kaydı göremez
+        stale = [k for k in e.searches if k[0] is None or session_id is None or k[0] == session_id]
+        for k in stale:
+            del e.searches[k]
+        e.search_version += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"users": len(self._users), "search_hits": self.hits, "search_misses": self.misses}
+
+
+class ContextEnricher:
+    """LLM ajanları için geçmiş/özet/ilgili bağlamı toplar; aramalar eşzamanlı, sorgu tek kez embed edilir."""
+
+    def __init__(self, cache: EnrichmentCache | None = None):
+        self.cache = cache or EnrichmentCache()
+
+    async def _cached(self, e: _UserEntry, attr: str, fn, *args, **kwargs):
+        val = getattr(e, attr)
+        if val is _MISSING:
+            version = e.version
+            val = await offload("memory", fn, *args, **kwargs)
+            self.cache.put_value(e, attr, val, version)
+        return val
+
+    async def _search(self, e: _UserEntry, user_id: str, query: str, top_k: int,
+                      session_id: str | None, embedding_task) -> list:
+        key = (session_id, query, top_k)
+        hit = self.cache.get_search(e, key)
+        if hit is not _MISSING:
+            return hit
+        version = e.search_version
+        emb = await embedding_task if embedding_task is not None else None
+        res = await offload("memory", search_memory, user_id, query, top_k=top_k,
+                            session_id=session_id, query_embedding=emb)
+        self.cache.put_search(e, key, res, version)
+        return res
+
+    async def enrich(self, user_id: str, session_id: str | None, input_data: str, history: list,
+                     minimal: bool = False) -> list:
+        """minimal=True (yük altında): yalnızca tek bir genel benzerlik araması yapılır."""
+        new_hist = history[:] if history else []
+        e = self.cache.entry(user_id)
+
+        if minimal:
+            hits = await self._search(e, user_id, input_data or "önceki konular", 2, None, None)
+            lines = ["İlgili geçmiş: " + str(h).strip() for h in hits or [] if h and not str(h).startswith("[Soru]")]
+            if lines:
+                new_hist.insert(0, {"role": "system", "content": "\n".join(lines)})
+            return new_hist
+
+        general_q = input_data or "önceki konular"
+        need_embed = self.cache.peek_search(e, (None, general_q, 2)) is _MISSING or (
+            bool(input_data) and self.cache.peek_search(e, (session_id, input_data, 3)) is _MISSING
+        )
+        # Sorgu tek kez embed edilir; iki arama da aynı vektörü kullanır
+        emb_task = asyncio.ensure_future(offload("memory", embed_query, general_q)) if need_embed else None
+
+        last_sum, recent_pairs, hits, memory_hits = await asyncio.gather(
+            self._cached(e, "summary", get_recent_summary, user_id),
+            self._cached(e, "pairs", get_recent_pairs, user_id, k=PAIRS_K),
+            self._search(e, user_id, general_q, 2, None, emb_task),
+            self._search(e, user_id, input_data, 3, session_id, emb_task) if input_data else _empty(),
+        )
+        sys_lines = []
+        if last_sum:
+            sys_lines.append("Önceki sohbet özeti: " + last_sum.strip())
+        for p in recent_pairs or []:
+            pair_line = _extract_pair(p)
+            if pair_line:
+                sys_lines.append(pair_line)
+
+        # — Genel (oturumdan bağımsız) benzerlik —
+        for h in hits or []:
+            if h and not str(h).startswith("[Soru]"):
+                sys_lines.append("İlgili geçmiş: " + str(h).strip())
+
+        if not sys_lines:
+            full_mem = await self._cached(e, "full", get_full_memory, user_id)
+            if full_mem:
+                joined = " • ".join(x.strip() for x in full_mem if x and x.strip())
+                if len(joined) > FULL_MEMORY_CHARS:
+                    joined = joined[:FULL_MEMORY_CHARS] + "…"
+                sys_lines.append("Önceki sohbetlerden öne çıkan içerikler: " + joined)
+
+        if emb_task is not None and not emb_task.done():
+            emb_task.cancel()
+
+        if sys_lines:
+            new_hist.insert(0, {"role": "system", "content": "\n".join(sys_lines)})
+
+        # — Oturum içi benzerlik —
+        event(_log, DEBUG, "memory_hits", user_id=user_id, session_id=session_id,
+              input=input_data, count=len(memory_hits), hits=memory_hits)
+        if memory_hits:
+            ctx = " • ".join(str(hit).strip() for hit in memory_hits if hit and str(hit).strip())
+            if ctx:
+                new_hist.insert(0, {"role": "system", "content": f"Önceki sohbetlerden ilgili bağlam: {ctx}"})
+
+        return new_hist
+
+
+async def _empty() -> list:
+    return []
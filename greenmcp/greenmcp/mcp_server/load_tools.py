@@ -17,6 +17,7 @@ def load_tools_from_config() -> tuple[Dict[str, object], dict]:
     allow_cfg = (cfg.get("allow") or {})
 
     registry: Dict[str, object] = {}
+    pools: dict[str, dict] = {}
     for name, spec in tools_cfg.items():
         if not spec or not bool(spec.get("enabled", True)):
             continue
@@ -31,5 +32,7 @@ def load_tools_from_config() -> tuple[Dict[str, object], dict]:
             base_url = params.get("base_url")
             obj = cls(base_url=base_url) if base_url else cls()
         registry[name] = obj
+        if spec.get("pool"):
+            pools[name] = spec["pool"]
 
-    return registry, {"allow": allow_cfg}
+    return registry, {"allow": allow_cfg, "pools": pools}
@@ -0,0 +1,90 @@
+"""
+Paylaşılan hafıza servisi: Chroma + MiniLM tek bir süreçte tutulur, MCP işçileri HTTP ile erişir.
+
+    uvicorn greenmcp.mcp_server.memory_service:app --port 8010 --workers 1
+
+MCP sunucuları MEMORY_BACKEND=http ve MEMORY_SERVICE_URL=http://<host>:8010 ile çalıştırılır.
+Bu süreç MEMORY_BACKEND=local (varsayılan) ile çalışmalıdır; Chroma'nın SQLite dosyasına
+yalnızca tek bir yazıcı erişmelidir, bu yüzden --workers 1 kullanılır.
+"""
+import os
+
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any
+
+from ..tools.memory_manager import (
+    store_documents, search_memory, get_full_memory, get_recent_pairs, get_recent_summary,
+    clear_session_memory, clear_user_memory, init_memory, shutdown_memory,
+)
+from ..utils.async_exec import offload, shutdown_pools
+
+if os.getenv("MEMORY_BACKEND", "local") == "http":
+    raise RuntimeError("[HATA] memory_service MEMORY_BACKEND=local ile çalıştırılmalı (kendi kendine yönlenir).")
+
+app = FastAPI(title="GreenMCP Memory Service")
+
+
+class AddBatchRequest(BaseModel):
+    documents: List[str] = Field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = Field(default_factory=list)
+    ids: List[str] | None = None
+
+
+class SearchRequest(BaseModel):
+    user_id: str
+    query: str
+    top_k: int = 3
+    session_id: str | None = None
+
+
+class ClearRequest(BaseModel):
+    user_id: str
+    session_id: str | None = None
+
+
+@app.on_event("startup")
+async def _load():
+    await offload("warmup", init_memory)
+
+
+@app.on_event("shutdown")
+async def _close():
+    shutdown_memory()
+    shutdown_pools(wait=True)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "service": "greenmcp-memory"}
+
+@app.post("/memory/add_batch")
+async def add_batch(req: AddBatchRequest):
+    n = await offload("memory", store_documents, req.documents, req.metadatas, req.ids)
+    return {"stored": n}
+
+@app.post("/memory/search")
+async def search(req: SearchRequest):
+    docs = await offload("memory", search_memory, req.user_id, req.query,
+                         top_k=req.top_k, session_id=req.session_id)
+    return {"documents": docs}
+
+@app.get("/memory/full")
+async def full(user_id: str):
+    return {"documents": await offload("memory", get_full_memory, user_id)}
+
+@app.get("/memory/pairs")
+async def pairs(user_id: str, k: int = 3):
+    return {"documents": await offload("memory", get_recent_pairs, user_id, k=k)}
+
+@app.get("/memory/summary")
+async def summary(user_id: str, session_id: str | None = None):
+    return {"summary": await offload("memory", get_recent_summary, user_id, session_id=session_id)}
+
+@app.post("/memory/clear")
+async def clear(req: ClearRequest):
+    if req.session_id:
+        await offload("memory", clear_session_memory, req.user_id, req.session_id)
+    else:
+        await offload("memory", clear_user_memory, req.user_id)
+    return {"cleared": True}
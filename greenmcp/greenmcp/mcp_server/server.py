@@ -1,43 +1,135 @@
 
-from fastapi import FastAPI
+import asyncio
+import json
+import os
+import threading
+import time
+
+from fastapi import FastAPI, Request, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
-import re
-import os
 
 from ..dispatcher_agent import multi_decide_agents
-from .tool_registry import build_tool_registry, get_allow_map
+from .tool_registry import set_allow_map
 from ..tools.memory_manager import (
-    add_message_to_memory, search_memory, add_pair_to_memory, get_full_memory,
-    add_summary, get_recent_pairs, get_recent_summary
+    add_message_to_memory, add_pair_to_memory, add_summary, init_memory, shutdown_memory, embed_queries,
+    writes_are_cheap, add_write_listener,
 )
 from ..agents.llm_runner import query_model
-from ..agents.load_configs import AGENT_CONFIGS, DISPATCHER_CONFIG 
-from ..agents.all_agents import AGENTS  
+from ..agents.cascade import cascade_stats
 from ..utils.agent_exec import run_agent_safe
+from ..utils.telemetry import collect, AGGREGATE as GEN_STATS, SPEC_AGGREGATE as SPEC_STATS
+from ..utils.async_exec import offload, shutdown_pools
+from .task_graph import build_nodes, execute, critical_path
+from .summary_worker import SummaryWorker
+from .enrichment import ContextEnricher
+from .warmup import WarmupTracker
+from .session_store import SessionStore
+from .target_pools import PoolUnavailable
+from .config_reload import (
+    ConfigSnapshot, ConfigWatcher, initial_snapshot, load_snapshot, diff_snapshots, close_retired,
+    CONFIG_VERSION, CONFIG_RELOADS,
+)
+from .tools.http_pool import close_clients
+from ..utils.log import get_logger, event, DEBUG, INFO, WARNING
+from ..utils.profiling import admin_token_ok, profile_request, profiling_allowed
+from ..utils.overload import OverloadController, degraded, current_level, skipped_features
+from ..utils.recorder import Recorder, note_route
+from ..utils.metrics import (
+    REGISTRY, CONTENT_TYPE, stage, TASK_ERRORS, HTTP_REQUESTS, HTTP_SECONDS, HTTP_IN_FLIGHT,
+)
+
+_log = get_logger("server")
+
+# /ask/batch sınırları
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# config sıcak yeniden yükleme (mcp_server/config_reload.py)
+RELOAD_WARM_TIMEOUT_S = float(os.getenv("CONFIG_RELOAD_WARM_TIMEOUT_S", "120"))
+DRAIN_TIMEOUT_S = float(os.getenv("CONFIG_DRAIN_TIMEOUT_S", "300"))
+
+# /chat ve /ws/chat session_id verilmezse: kullanıcı başına sabit oturum (hafızadaki "global" ile aynı)
+DEFAULT_SESSION_ID = "global"
+
 
+def _dependency_turns(dep_results: list) -> list:
+    """Bağımlılık yanıtlarını ajan geçmişine eklenecek (user, assistant) turlarına çevirir."""
+    turns = []
+    for r in dep_results:
+        out = r.get("output")
+        if not out:
+            continue
+        turns.append({"role": "user", "content": r.get("input", "")})
+        turns.append({"role": "assistant", "content": f"[{r.get('agent')}] {out}"})
+    return turns
 
-PAIR_RE = re.compile(r"\[Soru\]\s*(.*?)\s*\[Yanıt\]\s*(.*)", re.DOTALL)
 
-def _extract_pair(text: str) -> str | None:
-    m = PAIR_RE.search(text or "")
-    if not m:
-        return None
-    q = (m.group(1) or "").strip()
-    a = (m.group(2) or "").strip()
-    if len(q) > 300:
-        q = q[:300] + "…"
-    if len(a) > 300:
-        a = a[:300] + "…"
-    return f"SON KONU — Kullanıcı: {q}\nAsistan: {a}"
+def _session_turns(message: str, response: dict) -> list:
+    turns = [{"role": "user", "content": message}]
+    for r in response.get("responses", []):
+        if r.get("output"):
+            turns.append({"role": "assistant", "content": r["output"]})
+    return turns
 
 
 class MCPServer:
-    def __init__(self, name, tools):
+    def __init__(self, name, config: ConfigSnapshot | None = None):
         self.name = name
-        self.tools = tools  
-        self.allow_map = get_allow_map()  
+        # ajanlar, tool'lar, allow-list, consumes: tek nesnede; yeniden yüklemede tek atamayla değişir.
+        # config verilmezse açılış config'i ilk erişimde (startup) kurulur, import sırasında değil.
+        self._config: ConfigSnapshot | None = None
+        self._config_lock = threading.Lock()
+        self._reload_lock = asyncio.Lock()
+        # özetler yanıt yolunun dışında, oturum başına debounce edilerek üretilir
+        self.summaries = SummaryWorker(self._maybe_store_summary)
+        add_write_listener(self.summaries.on_write)   # hafıza silinince bekleyen özet iptal
+        self.enricher = ContextEnricher()
+        self.warmup = WarmupTracker({}, {})
+        # delta protokolü: kayan geçmiş sunucuda, istemci yalnızca yeni mesajı gönderir
+        self.sessions = SessionStore()
+        # kuyruk/gecikme eşikleri aşılınca isteğe bağlı işler bırakılır (utils/overload.py)
+        self.overload = OverloadController()
+        # RECORD_PATH ayarlıysa istekler replay için kaydedilir (utils/recorder.py, bench/replay.py)
+        self.recorder = Recorder()
+        self._background: set = set()
+        if config is not None:
+            self._install(config)
+
+    @property
+    def config(self) -> ConfigSnapshot:
+        if self._config is None:
+            with self._config_lock:
+                if self._config is None:
+                    self._install(initial_snapshot())
+        return self._config
+
+    def load_config(self) -> ConfigSnapshot:
+        """Açılış config'ini kurar (bloklayan; startup'ta havuzda çağrılır)."""
+        return self.config
+
+    def _install(self, cfg: ConfigSnapshot) -> None:
+        if self._config is None:
+            self.warmup.configure(cfg.dispatcher_config, cfg.agent_configs)
+        self._config = cfg
+        set_allow_map(cfg.allow_map)
+        CONFIG_VERSION.set(cfg.version)
+
+    # eski erişim yolları: etkin config'in alanları
+    @property
+    def tools(self) -> dict:
+        return self.config.registry
+
+    @property
+    def allow_map(self) -> dict:
+        return self.config.allow_map
+
+    @property
+    def answer_caches(self) -> dict:
+        # answer_cache açık ajanlar: yeniden ifade edilmiş sorulara kayıtlı yanıt (tools/answer_cache.py)
+        return self.config.answer_caches
     
     def _coalesce_tasks(self, tasks: list) -> list:
         merged = []
@@ -57,77 +149,179 @@ class MCPServer:
     def _maybe_store_summary(self, user_id: str, rolling_history: list, session_id: str | None = None):
 
         try:
-            if len(rolling_history) < 8:
+            # kuyrukta beklerken yük arttıysa özet yine bırakılır
+            if len(rolling_history) < 8 or self.overload.level:
                 return
 
             last_chunk = rolling_history[-8:]
             text = "\n".join(f"{m['role']}: {m['content']}" for m in last_chunk if m.get("content"))
 
          
-            model_for_summary = (DISPATCHER_CONFIG or {}).get("model") \
-                or next((cfg.get("model") for cfg in (AGENT_CONFIGS or {}).values() if cfg.get("model")), None)
-            backend_for_summary = (DISPATCHER_CONFIG or {}).get("backend")
+            cfg_now = self.config
+            model_for_summary = (cfg_now.dispatcher_config or {}).get("model") \
+                or next((cfg.get("model") for cfg in (cfg_now.agent_configs or {}).values() if cfg.get("model")), None)
+            backend_for_summary = (cfg_now.dispatcher_config or {}).get("backend")
 
             if not model_for_summary:
                 return  
 
-            summary = query_model(
-                model_for_summary,
-                "Aşağıdaki sohbeti 2 cümlede, konu ve alınan karar/öneri odaklı özetle:\n\n" + text,
-                options={"temperature": 0.2, "num_predict": 200},
-                backend=backend_for_summary or "ollama",
-            )
+            with stage("summary", model=model_for_summary), collect("summary"):
+                summary = query_model(
+                    model_for_summary,
+                    "Aşağıdaki sohbeti 2 cümlede, konu ve alınan karar/öneri odaklı özetle:\n\n" + text,
+                    options={"temperature": 0.2, "num_predict": 200},
+                    backend=backend_for_summary or "ollama",
+                )
             add_summary(user_id, summary.strip(), session_id=session_id or "global")
 
-        except Exception:
-            pass
+        except Exception as e:
+            TASK_ERRORS.inc(target="summary", kind="exception")
+            event(_log, WARNING, "summary_failed", user_id=user_id, error=repr(e))
 
 
-    def _enrich_history_for_agents(self, user_id: str, session_id: str | None, input_data: str, history: list) -> list:
+    async def _enrich_history_for_agents(self, user_id: str, session_id: str | None, input_data: str, history: list) -> list:
         """Yalnızca LLM ajanları için geçmiş/özet/ilgili bağlamı system mesajı olarak enjekte eder."""
-        new_hist = history[:] if history else []
-
-       
-        sys_lines = []
-        last_sum = get_recent_summary(user_id)
-        if last_sum:
-            sys_lines.append("Önceki sohbet özeti: " + last_sum.strip())
-
-        recent_pairs = get_recent_pairs(user_id, k=2)
-        for p in recent_pairs:
-            pair_line = _extract_pair(p)
-            if pair_line:
-                sys_lines.append(pair_line)
-
-        # — Genel (oturumdan bağımsız) benzerlik —
-        hits = search_memory(user_id, input_data or "önceki konular", top_k=2, session_id=None)
-        for h in hits:
-            if h and not str(h).startswith("[Soru]"):
-                sys_lines.append("İlgili geçmiş: " + str(h).strip())
-
-        if not sys_lines:
-           
-            full_mem = get_full_memory(user_id)
-            if full_mem:
-                joined = " • ".join(x.strip() for x in full_mem if x and x.strip())
-                if len(joined) > 1500:
-                    joined = joined[:1500] + "…"
-                sys_lines.append("Önceki sohbetlerden öne çıkan içerikler: " + joined)
-
-        if sys_lines:
-            new_hist.insert(0, {"role": "system", "content": "\n".join(sys_lines)})
-
-        # — Oturum içi benzerlik —
-        memory_hits = search_memory(user_id, input_data, top_k=3, session_id=session_id)
-        print(f"[MEM] user_id={user_id} | session_id={session_id} | input='{input_data}' | hit_sayısı={len(memory_hits)} | hits={memory_hits}")
-        if memory_hits:
-            ctx = " • ".join(str(hit).strip() for hit in memory_hits if hit and str(hit).strip())
-            if ctx:
-                new_hist.insert(0, {"role": "system", "content": f"Önceki sohbetlerden ilgili bağlam: {ctx}"})
-
-        return new_hist
+        return await self.enricher.enrich(user_id, session_id, input_data, history, minimal=degraded("enrich"))
+
+    @staticmethod
+    def _write_turn(user_id: str, session_id: str, input_text: str, text: str | None) -> None:
+        with stage("memory_write"):
+            add_message_to_memory(user_id, "user", input_text, session_id=session_id)
+            if text is None:
+                return
+            add_message_to_memory(user_id, "assistant", text, session_id=session_id)
+            add_pair_to_memory(user_id, input_text, text, session_id=session_id)
+
+    async def _store_turn(self, user_id: str, session_id: str, input_text: str, text: str | None) -> None:
+        """Tampona ekleme ucuzdur, loop'ta yapılır; tampon yoksa (eşzamanlı Chroma yazımı) "memory" havuzunda."""
+        if writes_are_cheap():
+            self._write_turn(user_id, session_id, input_text, text)
+        else:
+            await offload("memory", self._write_turn, user_id, session_id, input_text, text)
+
+    async def _run_task(self, task: dict, cfg: ConfigSnapshot, user_id: str, session_id: str,
+                        agent_history: list, raw_history: list, dep_results: list | None = None) -> dict:
+        """
+        Tek alt görevi çalıştırır; bloklayan iş havuzlara devredilir. Hata yanıt öğesine yazılır.
+        dep_results: bu görevin beklediği (ör. calc_tool) görevlerin yanıtları → ajan geçmişine eklenir.
+        cfg: isteğin başladığı config anlık görüntüsü (yeniden yüklemede istek eski nesnelerle biter).
+        """
+        agent_name = task["agent"]
+        input_text = task["input"]
+
+        # --- LLM mi, tool mu? ---
+        agents = cfg.agents
+        is_llm_agent = agent_name in agents
+        rerouted_from = None
+        if is_llm_agent:
+            routed = self.warmup.pick_warm(agent_name, list(agents))
+            if routed != agent_name:
+                rerouted_from, agent_name = agent_name, routed
+
+        obj = (agents.get(agent_name) if is_llm_agent else cfg.registry.get(agent_name))
+        if not obj:
+            TASK_ERRORS.inc(target=agent_name, kind="not_registered")
+            return {
+                "agent": agent_name,
+                "input": input_text,
+                "error": f"'{agent_name}' kayıtlı değil."
+            }
+
+        if not is_llm_agent:
+            source_agent = task.get("source_agent") or "qa_agent"
+            allowed = cfg.allow_map.get(source_agent)
+            if isinstance(allowed, list) and allowed and agent_name not in allowed:
+                await self._store_turn(user_id, session_id, input_text, None)
+                TASK_ERRORS.inc(target=agent_name, kind="allow_list")
+                return {
+                    "agent": agent_name,
+                    "input": input_text,
+                    "error": f"'{source_agent}' bu aracı kullanamaz (allow-list)."
+                }
+
+        # LLM ajanları bağlamı kendi token bütçelerine göre paketler (agents/context_packer.py)
+        minimal_history = agent_history if is_llm_agent else raw_history[-12:]
+        if is_llm_agent and dep_results:
+            minimal_history = minimal_history + _dependency_turns(dep_results)
+
+        model = (cfg.agent_configs.get(agent_name) or {}).get("model", "") if is_llm_agent else ""
+
+        # tool sonucuna bağlı görevler (dep_results) bağlama özeldir; önbelleğe bakılmaz
+        cache = cfg.answer_caches.get(agent_name) if is_llm_agent and not dep_results else None
+        if cache is not None:
+            with stage("answer_cache", target=agent_name):
+                hit = await offload("memory", cache.lookup, input_text, user_id)
+            if hit is not None:
+                await self._store_turn(user_id, session_id, input_text, hit["answer"])
+                meta = {"agent": agent_name, "model": model, "answer_cache": {k: v for k, v in hit.items() if k != "answer"}}
+                if rerouted_from:
+                    meta["rerouted_from"] = rerouted_from
+                return {"agent": agent_name, "input": input_text, "output": hit["answer"], "meta": meta}
+
+        try:
+            # pool ayarı olan hedef kendi havuzunda (kuyruk/süre sınırlı); diğerleri ortak "llm" havuzunda
+            pool = cfg.pools.get(agent_name)
+            with stage("agent" if is_llm_agent else "tool", target=agent_name, model=model):
+                if pool is not None:
+                    text, meta = await pool.run(run_agent_safe, obj, input_text,
+                                                history=minimal_history, agent_name=agent_name)
+                else:
+                    text, meta = await offload("llm", run_agent_safe, obj, input_text,
+                                               history=minimal_history, agent_name=agent_name)
+            if meta.get("error"):
+                TASK_ERRORS.inc(target=agent_name, kind="exception")
+            elif str(text).startswith("[HATA]"):
+                TASK_ERRORS.inc(target=agent_name, kind="error_text")
+
+            # hafıza (write-behind tampona eklenir; yazım istek yolunun dışında)
+            await self._store_turn(user_id, session_id, input_text, text)
+            if cache is not None and not meta.get("error"):
+                self._spawn(offload("memory", cache.store, input_text, text, user_id, meta.get("model") or model))
+
+            if rerouted_from:
+                meta["rerouted_from"] = rerouted_from
+            if current_level():
+                meta["degraded"] = current_level()
+            return {"agent": agent_name, "input": input_text, "output": text, "meta": meta}
+
+        except PoolUnavailable as e:
+            TASK_ERRORS.inc(target=agent_name, kind=e.kind)
+            return {"agent": agent_name, "input": input_text, "error": str(e)}
+        except Exception as e:
+            TASK_ERRORS.inc(target=agent_name, kind="exception")
+            return {
+                "agent": agent_name,
+                "input": input_text,
+                "error": f"[HATA] Çalıştırma hatası: {e}"
+            }
+
+    def _spawn(self, coro) -> None:
+        """Yanıtı bekletmeyen arka plan işi; referans tutulur ki görev erken toplanmasın."""
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
 
     async def run(self, query: dict):
+        cfg = self.config
+        with self.overload.admit() as level, self.recorder.request(query) as trace, cfg.use():
+            if not query.get("profile"):
+                result = await self._run(query, cfg)
+            else:
+                # profil modu: aşama waterfall'ı yanıt meta'sına, tam cProfile çıktısı diske
+                with profile_request() as prof:
+                    result = await self._run(query, cfg)
+                report = prof.report()
+                report["file"] = await offload("memory", prof.dump)
+                result["meta"] = {"profile": report}
+                event(_log, INFO, "request_profiled", profile_id=prof.id, file=result["meta"]["profile"]["file"],
+                      total_ms=result["meta"]["profile"]["total_ms"])
+            if trace is not None:
+                trace.result = result
+        if level:
+            result.setdefault("meta", {})["degraded"] = {"level": level, "skipped": skipped_features(level)}
+        return result
+
+    async def _run(self, query: dict, cfg: ConfigSnapshot):
         input_data = query.get("input") or ""
         tool_name = query.get("tool")
         history = query.get("history", []) or []
@@ -138,77 +332,42 @@ class MCPServer:
         raw_history = history or []
 
         # ——— Dispatcher: hedef seçimi (ajan veya tool) ———
-        valid_targets = set(self.tools.keys())
+        valid_targets = set(cfg.registry.keys())
         if not tool_name:
-       
-            sub_tasks = multi_decide_agents(input_data, history=raw_history, valid_names=valid_targets)
+            def _decide():
+                with collect("dispatcher"):
+                    return multi_decide_agents(input_data, history=raw_history, valid_names=valid_targets,
+                                               agent_names=set(cfg.agents), config=cfg.dispatcher_config)
+            sub_tasks = await offload("dispatch", _decide)
         else:
             sub_tasks = [{"agent": tool_name, "input": input_data}]
 
         
         sub_tasks = self._coalesce_tasks(sub_tasks)
+        note_route(sub_tasks)
 
       
-        has_agent = any(t.get("agent") in AGENTS for t in sub_tasks)
-        agent_history = self._enrich_history_for_agents(user_id, session_id, input_data, raw_history) if has_agent else raw_history
-
-        response_list = []
-        
-        rolling_history = (agent_history if has_agent else raw_history)[:]
-
-        for task in sub_tasks:
-            agent_name = task["agent"]
-            input_text = task["input"]
-
-            # --- LLM mi, tool mu? ---
-            is_llm_agent = agent_name in AGENTS
-
-            
-            obj = (AGENTS.get(agent_name) if is_llm_agent else self.tools.get(agent_name))
-            if not obj:
-                response_list.append({
-                    "agent": agent_name,
-                    "input": input_text,
-                    "error": f"'{agent_name}' kayıtlı değil."
-                })
-                continue
-
-            if not is_llm_agent:
-                source_agent = task.get("source_agent") or "qa_agent"
-                allowed = self.allow_map.get(source_agent)
-                if isinstance(allowed, list) and allowed and agent_name not in allowed:
-                    response_list.append({
-                        "agent": agent_name,
-                        "input": input_text,
-                        "error": f"'{source_agent}' bu aracı kullanamaz (allow-list)."
-                    })
-                    add_message_to_memory(user_id, "user", input_text, session_id=session_id)
-                    continue
-
-           
-            minimal_history = (agent_history if is_llm_agent else raw_history)[-12:]
-
-            try:
-              
-                text, meta = run_agent_safe(obj, input_text, history=minimal_history)
-
-                # hafıza
-                add_message_to_memory(user_id, "user", input_text, session_id=session_id)
-                add_message_to_memory(user_id, "assistant", text, session_id=session_id)
-                add_pair_to_memory(user_id, input_text, text, session_id=session_id)
-
-                # yanıt
-                response_list.append({"agent": agent_name, "input": input_text, "output": text, "meta": meta})
-                rolling_history.append({"role": "user", "content": input_text})
-                rolling_history.append({"role": "assistant", "content": text})
-
-            except Exception as e:
-              response_list.append({
-                "agent": agent_name,
-                "input": input_text,
-                "error": f"[HATA] Çalıştırma hatası: {e}"
-        })
-
+        has_agent = any(t.get("agent") in cfg.agents for t in sub_tasks)
+        if has_agent:
+            with stage("enrich"):
+                agent_history = await self._enrich_history_for_agents(user_id, session_id, input_data, raw_history)
+        else:
+            agent_history = raw_history
+
+        # ——— Görev grafiği: bağımlı ajanlar tool sonuçlarını bekler, diğerleri paralel; sıra korunur ———
+        nodes = build_nodes(sub_tasks, cfg.consumes, tool_names=cfg.tool_names)
+        response_list = await execute(
+            nodes,
+            lambda task, deps: self._run_task(task, cfg, user_id, session_id, agent_history, raw_history, deps),
+        )
+        graph = critical_path(nodes)
+        event(_log, DEBUG, "task_graph", path=graph["path"], critical_path_s=graph["critical_path_s"])
+
+        rolling_history = agent_history[:]
+        for r in response_list:
+            if "output" in r:
+                rolling_history.append({"role": "user", "content": r["input"]})
+                rolling_history.append({"role": "assistant", "content": r["output"]})
 
         # ——— Tekrarlı çıktıları tekilleştirip özetle ———
         seen, uniq = set(), []
@@ -218,8 +377,122 @@ class MCPServer:
                 seen.add(out)
                 uniq.append(out)
 
-        self._maybe_store_summary(user_id, rolling_history, session_id=session_id)
-        return {"responses": response_list, "summary": "\n\n---\n\n".join(uniq)}
+        new_turns = sum(1 for r in response_list if "output" in r)
+        if not degraded("summary"):
+            self.summaries.submit(user_id, session_id, rolling_history, new_turns=new_turns)
+        return {"responses": response_list, "summary": "\n\n---\n\n".join(uniq), "graph": graph}
+
+
+    async def reload_config(self, reason: str = "manual") -> dict:
+        """
+        Config dosyalarını yeniden yükler: yeni anlık görüntü kurulur, yeni modeller ısıtılır,
+        ardından tek atamayla takas edilir. Eski sürümle başlamış istekler arka planda beklenir
+        (drain) ve yalnızca yeni sürümde kullanılmayan nesneler kapatılır. Hata olursa etkin config değişmez.
+        """
+        async with self._reload_lock:
+            old = self.config
+            try:
+                new = await offload("warmup", load_snapshot, old.version + 1, old)
+            except Exception as e:
+                CONFIG_RELOADS.inc(result="failed")
+                event(_log, WARNING, "config_reload_failed", reason=reason, error=repr(e))
+                return {"reloaded": False, "version": old.version, "error": f"[HATA] Config yüklenemedi: {e}"}
+
+            new_models = await self.warmup.update(new.dispatcher_config, new.agent_configs,
+                                                  timeout=RELOAD_WARM_TIMEOUT_S)
+            self._install(new)
+            CONFIG_RELOADS.inc(result="ok")
+            changes = diff_snapshots(old, new)
+            event(_log, INFO, "config_reloaded", reason=reason, version=new.version, new_models=new_models,
+                  old_in_flight=old.in_flight, **changes)
+            self._spawn(self._retire(old, new))
+            return {"reloaded": True, "version": new.version, "new_models": new_models,
+                    "old_in_flight": old.in_flight, "changes": changes}
+
+    async def _retire(self, old: ConfigSnapshot, new: ConfigSnapshot) -> None:
+        drained = await old.drain(DRAIN_TIMEOUT_S)
+        closed = close_retired(old, new) if drained else 0
+        event(_log, INFO if drained else WARNING, "config_drained", version=old.version, drained=drained,
+              in_flight=old.in_flight, closed=closed)
+
+    async def chat_turn(self, message: str, user_id: str, session_id: str,
+                        tool: str | None = None, profile: bool = False) -> dict:
+        """Oturum geçmişini depodan alır, turu çalıştırır ve yeni turları kırpılmış geçmişe ekler."""
+        if self.sessions.shared:
+            # paylaşılan önbellek (Redis) ağ çağrısıdır; event loop bloklanmaz
+            history = await offload("memory", self.sessions.history, user_id, session_id)
+        else:
+            history = self.sessions.history(user_id, session_id)
+        response = await self.run({
+            "input": message,
+            "tool": tool,
+            "history": history,
+            "user_id": user_id,
+            "session_id": session_id,
+            "profile": profile,
+        })
+        turns = _session_turns(message, response)
+        if self.sessions.shared:
+            await offload("memory", self.sessions.append, user_id, session_id, turns)
+        else:
+            self.sessions.append(user_id, session_id, turns)
+        return response
+
+    async def run_batch(self, items: list, concurrency: int):
+        """
+        Toplu sorgular: en fazla `concurrency` öğe aynı anda çalışır, her sonuç tamamlandığı anda
+        NDJSON satırı olarak üretilir. Bir öğenin hatası diğerlerini etkilemez.
+        Paylaşılan iş: girdilerin embedding'leri arka planda 2*concurrency'lik pencerelerle, işlenen
+        öğelerin bir pencere önünden hesaplanır (büyük batch'ler embedding LRU'sunu taşırmaz);
+        dispatcher örnekleri ve tool HTTP bağlantıları zaten süreç genelinde önbellekli.
+        """
+        texts = [str(it.get("input") or "") if isinstance(it, dict) else "" for it in items]
+        window = max(1, 2 * concurrency)
+        started = 0
+        progress = asyncio.Event()
+
+        async def _prewarm():
+            extra = ["önceki konular"]
+            for start in range(0, len(texts), window):
+                while started + concurrency < start:
+                    progress.clear()
+                    await progress.wait()
+                await offload("memory", embed_queries, texts[start:start + window] + extra)
+                extra = []
+
+        prewarm = asyncio.ensure_future(_prewarm())
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(i: int, item) -> dict:
+            nonlocal started
+            async with sem:
+                started += 1
+                progress.set()
+                if not isinstance(item, dict):
+                    return {"index": i, "error": "[HATA] Öğe bir nesne olmalı."}
+                try:
+                    response = await self.run({
+                        "input": item.get("input"),
+                        "tool": item.get("tool"),
+                        "history": item.get("history", []),
+                        "user_id": item.get("user_id", "default"),
+                        "session_id": item.get("session_id"),
+                    })
+                    return {"index": i, "response": response}
+                except Exception as e:
+                    TASK_ERRORS.inc(target="batch", kind="exception")
+                    event(_log, WARNING, "batch_item_failed", index=i, error=repr(e))
+                    return {"index": i, "error": f"[HATA] Çalıştırma hatası: {e}"}
+
+        tasks = [asyncio.ensure_future(_one(i, it)) for i, it in enumerate(items)]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield json.dumps(await fut, ensure_ascii=False, default=str) + "\n"
+        finally:
+            # istemci bağlantıyı koparırsa kalan öğeler iptal edilir
+            for t in tasks:
+                t.cancel()
+            prewarm.cancel()
 
 
 # ——— FastAPI uygulaması ———
@@ -232,28 +505,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-server = MCPServer(name="GreenMCP", tools=build_tool_registry())
+server = MCPServer(name="GreenMCP")
+config_watcher = ConfigWatcher(server.reload_config)
 
-@app.on_event("startup")
-def warm_up_models():
-    if os.getenv("DISABLE_WARMUP","0") == "1":
-        return
-    # Dispatcher modelini ısıt
+
+@app.middleware("http")
+async def _http_metrics(request: Request, call_next):
+    # yol etiketi olarak route şablonu kullanılır (ör. /ask); bilinmeyen yollar tek etikette toplanır
+    HTTP_IN_FLIGHT.inc()
+    t0 = time.perf_counter()
+    status = 500
     try:
-        d_model = (DISPATCHER_CONFIG or {}).get("model")
-        if d_model:
-            query_model(d_model, "ping", options={"num_predict": 1})
-    except Exception:
-        pass
-
-    # Tüm agent modellerini sırayla ısıt
-    for agent_name, cfg in (AGENT_CONFIGS or {}).items():
-        try:
-            model = cfg.get("model")
-            if model:
-                query_model(model, "ping", options={"num_predict": 1})
-        except Exception:
-            pass
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "other"
+        HTTP_IN_FLIGHT.dec()
+        HTTP_REQUESTS.inc(path=path, method=request.method, status=str(status))
+        HTTP_SECONDS.observe(time.perf_counter() - t0, path=path, method=request.method)
+
+@app.on_event("startup")
+async def warm_up_models():
+    # Modeller arka planda eşzamanlı ısıtılır; durum /ready üzerinden izlenir.
+    # Hafıza arka ucu (chromadb + MiniLM) da ilk isteği beklemeden yüklenir.
+    # Açılış config'i (ajanlar, tool'lar, havuzlar) import'ta değil burada kurulur.
+    await offload("warmup", server.load_config)
+    server.warmup.start(components={"memory": init_memory})
+    config_watcher.start()
+
+
+@app.on_event("shutdown")
+async def _shutdown_workers():
+    # bekleyen özetler havuzlar kapanmadan önce tamamlanır
+    await config_watcher.stop()
+    await server.warmup.stop()
+    await server.summaries.stop(drain=True)
+    shutdown_pools(wait=True)
+    for pool in server.config.pools.values():
+        pool.close()
+    shutdown_memory()
+    close_clients()
+    server.recorder.close()
 
 
 class ChatRequest(BaseModel):
@@ -262,44 +556,146 @@ class ChatRequest(BaseModel):
     tool: str | None = None
     user_id: str | None = "default"
     session_id: str | None = None
+    profile: bool = False
+
+
+class BatchRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(default_factory=list)
+    concurrency: int | None = None
+
+
+_PROFILE_FORBIDDEN = {"response": {"summary": "[HATA] Profil modu bu istek için yetkili değil."}}
 
 
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "greenmcp"}
 
+@app.get("/ready")
+def ready():
+    """Model ısıtma durumu; politika (WARMUP_READY_POLICY) sağlanana kadar 503."""
+    status = server.warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metin formatında aşama süreleri, HTTP sayaçları ve hata sayaçları."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/telemetry/generation")
+def generation_telemetry():
+    """Model × ajan bazında üretim ölçümleri (token, TTFT, tok/s); model × taslak bazında kabul oranı."""
+    return {"generation": GEN_STATS.snapshot(), "speculative": SPEC_STATS.snapshot()}
+
+@app.get("/telemetry/summary")
+def summary_telemetry():
+    """Arka plan özet kuyruğunun metrikleri."""
+    return {
+        "summary_queue": server.summaries.stats(),
+        "enrichment_cache": server.enricher.cache.stats(),
+        "sessions": server.sessions.stats(),
+        "overload": server.overload.status(),
+        "recorder": server.recorder.status(),
+        "answer_cache": {name: c.stats() for name, c in server.answer_caches.items()},
+        "config": server.config.summary(),
+        "cascade": cascade_stats(),
+        "pools": {name: p.status() for name, p in server.config.pools.items()},
+    }
+
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: str | None = Header(default=None)):
+    """agent_configs.yaml ve tools.yaml'ı yeniden yükler (ADMIN_TOKEN gerekir)."""
+    if not admin_token_ok(x_admin_token):
+        return JSONResponse({"error": "[HATA] Yetkisiz."}, status_code=403)
+    result = await server.reload_config("admin")
+    return JSONResponse(result, status_code=200 if result["reloaded"] else 422)
+
 @app.post("/ask")
-async def ask_mcp(query: dict):
+async def ask_mcp(query: dict, x_admin_token: str | None = Header(default=None)):
+    profile = bool(query.get("profile"))
+    if profile and not profiling_allowed(x_admin_token):
+        return JSONResponse(_PROFILE_FORBIDDEN, status_code=403)
     response = await server.run({
         "input": query.get("input"),
         "tool": query.get("tool"),
         "history": query.get("history", []),
         "user_id": query.get("user_id", "default"),
-        "session_id": query.get("session_id")
+        "session_id": query.get("session_id"),
+        "profile": profile,
     })
     return {"response": response}
 
+@app.post("/ask/batch")
+async def ask_batch(batch: BatchRequest):
+    """Her satır bir öğe: {"index", "response"} veya {"index", "error"}; tamamlanma sırasıyla akar."""
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        return JSONResponse({"error": f"[HATA] En fazla {BATCH_MAX_ITEMS} öğe gönderilebilir."}, status_code=413)
+    concurrency = max(1, min(batch.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    return StreamingResponse(server.run_batch(batch.items, concurrency), media_type="application/x-ndjson")
+
 @app.post("/chat")
-async def chat_endpoint(chat_req: ChatRequest):
+async def chat_endpoint(chat_req: ChatRequest, x_admin_token: str | None = Header(default=None)):
+    if chat_req.profile and not profiling_allowed(x_admin_token):
+        return JSONResponse(_PROFILE_FORBIDDEN, status_code=403)
+    user_id = chat_req.user_id or "default"
     if not chat_req.history and chat_req.message:
-        response = await server.run({
-            "input": chat_req.message,
-            "tool": chat_req.tool,
-            "history": [],
-            "user_id": chat_req.user_id or "default",
-            "session_id": chat_req.session_id
-        })
-        return {"response": response}
+        # delta protokolü: yalnızca yeni mesaj; session_id verilmezse kullanıcının varsayılan oturumu
+        # (her istekte yeni kimlik üretilirse session_id saklamayan istemcinin geçmişi kaybolur)
+        session_id = chat_req.session_id or DEFAULT_SESSION_ID
+        response = await server.chat_turn(chat_req.message, user_id, session_id,
+                                          tool=chat_req.tool, profile=chat_req.profile)
+        return {"response": response, "session_id": session_id}
 
     if not chat_req.history:
         return {"response": {"summary": "⚠️ Geçmiş veri boş. Lütfen bir mesaj girin."}}
 
+    # eski istemciler: tam geçmiş gönderilir; oturum deposu da bu geçmişle eşitlenir
     latest_message = chat_req.history[-1]["content"]
     response = await server.run({
         "input": latest_message,
         "tool": chat_req.tool,
         "history": chat_req.history,
-        "user_id": chat_req.user_id or "default",
-        "session_id": chat_req.session_id
+        "user_id": user_id,
+        "session_id": chat_req.session_id,
+        "profile": chat_req.profile,
     })
+    if chat_req.session_id:
+        history = chat_req.history + _session_turns(latest_message, response)[1:]
+        if server.sessions.shared:
+            # paylaşılan önbellek (Redis) ağ çağrısıdır; event loop bloklanmaz
+            await offload("memory", server.sessions.replace, user_id, chat_req.session_id, history)
+        else:
+            server.sessions.replace(user_id, chat_req.session_id, history)
     return {"response": response}
+
+@app.websocket("/ws/chat")
+async def ws_chat(ws: WebSocket):
+    """
+    Kalıcı sohbet bağlantısı. Her mesaj: {"message", "tool"?}; yanıt: {"response", "session_id"}.
+    user_id / session_id sorgu parametresiyle verilebilir (?user_id=...&session_id=...).
+    Profil modu bu uçta desteklenmez.
+    """
+    await ws.accept()
+    user_id = ws.query_params.get("user_id") or "default"
+    session_id = ws.query_params.get("session_id") or DEFAULT_SESSION_ID
+    try:
+        while True:
+            raw = await ws.receive_text()
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                await ws.send_json({"error": "[HATA] Mesaj geçerli bir JSON değil.", "session_id": session_id})
+                continue
+            text = (msg.get("message") or "").strip() if isinstance(msg, dict) else ""
+            if not text:
+                await ws.send_json({"error": "[HATA] 'message' alanı boş.", "session_id": session_id})
+                continue
+            try:
+                response = await server.chat_turn(text, user_id, session_id, tool=msg.get("tool"))
+            except Exception as e:
+                TASK_ERRORS.inc(target="ws_chat", kind="exception")
+                await ws.send_json({"error": f"[HATA] Çalıştırma hatası: {e}", "session_id": session_id})
+                continue
+            await ws.send_json({"response": response, "session_id": session_id})
+    except WebSocketDisconnect:
+        event(_log, DEBUG, "ws_disconnect", user_id=user_id, session_id=session_id)
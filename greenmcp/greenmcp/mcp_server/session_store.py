@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from ..utils.shared_cache import get_shared_cache
+
+# Ortam değişkenleri:
+#   SESSION_MAX          → bellekte tutulan azami oturum (LRU; varsayılan: 10000)
+#   SESSION_TTL_S        → son kullanımdan sonra oturum ömrü (varsayılan: 3600)
+#   SESSION_MAX_MESSAGES → oturum başına saklanan son mesaj sayısı (varsayılan: 24)
+#
+# CACHE_URL (utils/shared_cache.py) ayarlıysa geçmiş paylaşılan önbellekte tutulur; böylece aynı
+# oturumun istekleri farklı işçilere/düğümlere düşebilir. LRU sınırını orada önbelleğin kendi
+# tahliye politikası (ör. Redis maxmemory-policy allkeys-lru) sağlar; TTL her yazımda yenilenir.
+# Paylaşılan geçmiş mesaj başına bir liste öğesidir; eklemeler atomik olduğundan aynı oturuma
+# farklı işçilerden gelen eşzamanlı turlar birbirini ezmez.
+
+
+class _Session:
+    __slots__ = ("history", "touched")
+
+    def __init__(self):
+        self.history: list = []
+        self.touched = time.monotonic()
+
+
+class SessionStore:
+    """
+    (user_id, session_id) → kırpılmış kayan geçmiş.
+    İstemciler yalnızca yeni mesajı gönderir; geçmiş sunucuda tutulur, böylece istek boyutu
+    ve ayrıştırma işi sohbet uzunluğuyla büyümez.
+    """
+
+    def __init__(self, max_sessions: int | None = None, ttl_s: float | None = None, max_messages: int | None = None,
+                 cache=None):
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX", "10000"))
+        self.ttl_s = float(os.getenv("SESSION_TTL_S", "3600")) if ttl_s is None else ttl_s
+        self.max_messages = max_messages or int(os.getenv("SESSION_MAX_MESSAGES", "24"))
+        self._sessions: "OrderedDict[tuple, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        if cache is None:
+            cache = get_shared_cache()
+            cache = cache if cache.shared else None
+        self._shared = cache
+        self.shared = cache is not None
+
+    @staticmethod
+    def _key(user_id: str, session_id: str) -> str:
+        return f"greenmcp:session:{user_id}:{session_id}:turns"
+
+    @staticmethod
+    def _encode(turns: list) -> list[str]:
+        return [json.dumps(t, ensure_ascii=False) for t in turns]
+
+    def _load_shared(self, user_id: str, session_id: str) -> list:
+        return [json.loads(raw) for raw in self._shared.list_get(self._key(user_id, session_id))]
+
+    def _entry(self, key: tuple) -> _Session:
+        now = time.monotonic()
+        s = self._sessions.get(key)
+        if s is None or (now - s.touched) > self.ttl_s:
+            s = _Session()
+            self._sessions[key] = s
+        s.touched = now
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return s
+
+    def history(self, user_id: str, session_id: str) -> list:
+        if self._shared is not None:
+            return self._load_shared(user_id, session_id)
+        with self._lock:
+            return list(self._entry((user_id, session_id)).history)
+
+    def replace(self, user_id: str, session_id: str, history: list) -> None:
+        """Eski (tam geçmiş gönderen) istemciler için: gelen geçmiş oturumun yerine geçer."""
+        if self._shared is not None:
+            self._shared.list_replace(self._key(user_id, session_id), self._encode(history),
+                                      self.max_messages, ttl_s=self.ttl_s)
+            return
+        with self._lock:
+            self._entry((user_id, session_id)).history = list(history[-self.max_messages:])
+
+    def append(self, user_id: str, session_id: str, turns: list) -> None:
+        if not turns:
+            return
+        if self._shared is not None:
+            self._shared.list_append(self._key(user_id, session_id), self._encode(turns),
+                                     self.max_messages, ttl_s=self.ttl_s)
+            return
+        with self._lock:
+            s = self._entry((user_id, session_id))
+            s.history.extend(turns)
+            if len(s.history) > self.max_messages:
+                del s.history[: len(s.history) - self.max_messages]
+
+    def drop(self, user_id: str, session_id: str) -> None:
+        if self._shared is not None:
+            self._shared.delete(self._key(user_id, session_id))
+            return
+        with self._lock:
+            self._sessions.pop((user_id, session_id), None)
+
+    def stats(self) -> dict:
+        if self._shared is not None:
+            return {"backend": type(self._shared).__name__, "keys": self._shared.size()}
+        with self._lock:
+            return {"sessions": len(self._sessions), "evicted": self.evicted}
@@ -0,0 +1,161 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from ..utils.async_exec import offload
+from ..utils.log import get_logger, event, DEBUG, WARNING
+
+_log = get_logger("summary")
+
+# Ortam değişkenleri:
+#   SUMMARY_EVERY_TURNS  → oturum başına kaç yeni turda bir özet (varsayılan: 4)
+#   SUMMARY_DEBOUNCE_S   → son turdan sonra beklenecek sessiz süre (varsayılan: 3)
+#   SUMMARY_MAX_WAIT_S   → planlanan özetin en fazla ertelenebileceği süre; sürekli konuşan
+#                          oturumun özeti de sonunda üretilir (varsayılan: 30)
+#   SUMMARY_MAX_PENDING  → aynı anda bekleyebilecek oturum sayısı (varsayılan: 256)
+#   SUMMARY_CONCURRENCY  → eşzamanlı özet üretimi (varsayılan: 1)
+
+Key = Tuple[str, str]
+
+
+class _Job:
+    __slots__ = ("task", "history", "first", "deadline")
+
+    def __init__(self, history: list, now: float, debounce_s: float):
+        self.task: asyncio.Task | None = None
+        self.history = history
+        self.first = now
+        self.deadline = now + debounce_s
+
+
+class SummaryWorker:
+    """
+    Sohbet özetlerini istek yolunun dışında, oturum başına debounce ederek üretir.
+      - submit(): her istek sonunda çağrılır; N yeni turda bir iş planlar
+      - aynı oturum için bekleyen iş varsa en yeni geçmişi alır ve süresi son turdan itibaren
+        yeniden başlar (gerçek debounce); ilk planlamadan en fazla max_wait_s sonra çalışır
+      - cancel(): oturumun (session_id yoksa kullanıcının tüm oturumlarının) bekleyen işini iptal eder;
+        on_write() ile hafıza silindiğinde çağrılır, silinen geçmişin özeti sonradan yazılmasın
+      - stats(): kuyruk metrikleri
+    fn(user_id, rolling_history, session_id=...) bloklayan özet fonksiyonudur.
+    """
+
+    def __init__(self, fn: Callable, every_turns: int | None = None, debounce_s: float | None = None,
+                 max_pending: int | None = None, concurrency: int | None = None,
+                 max_wait_s: float | None = None):
+        self.fn = fn
+        self.every_turns = every_turns or int(os.getenv("SUMMARY_EVERY_TURNS", "4"))
+        self.debounce_s = float(os.getenv("SUMMARY_DEBOUNCE_S", "3")) if debounce_s is None else debounce_s
+        self.max_wait_s = max(self.debounce_s, float(os.getenv("SUMMARY_MAX_WAIT_S", "30"))
+                              if max_wait_s is None else max_wait_s)
+        self.max_pending = max_pending or int(os.getenv("SUMMARY_MAX_PENDING", "256"))
+        self._sem: asyncio.Semaphore | None = None
+        self._concurrency = concurrency or int(os.getenv("SUMMARY_CONCURRENCY", "1"))
+
+        self._turns: "OrderedDict[Key, int]" = OrderedDict()
+        self._pending: Dict[Key, _Job] = {}
+        self._running = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stats = {"submitted": 0, "scheduled": 0, "deduped": 0, "dropped": 0,
+                       "cancelled": 0, "completed": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+
+    def submit(self, user_id: str, session_id: str, rolling_history: list, new_turns: int = 1) -> None:
+        """Event loop içinden çağrılır; asla beklemez."""
+        if new_turns <= 0:
+            return
+        key = (user_id, session_id or "global")
+        self._stats["submitted"] += 1
+        self._loop = asyncio.get_running_loop()
+        now = self._loop.time()
+
+        job = self._pending.get(key)
+        if job is not None:
+            # bekleyen özet yeni turları da kapsasın; sessizlik süresi baştan başlar (üst sınır: max_wait_s)
+            job.history = list(rolling_history)
+            job.deadline = min(now + self.debounce_s, job.first + self.max_wait_s)
+            self._stats["deduped"] += 1
+            return
+
+        count = self._turns.pop(key, 0) + new_turns
+        self._turns[key] = count
+        while len(self._turns) > 10 * self.max_pending:
+            self._turns.popitem(last=False)
+
+        if count < self.every_turns or len(rolling_history) < 8:
+            return
+
+        if len(self._pending) >= self.max_pending:
+            self._stats["dropped"] += 1
+            return
+
+        self._turns[key] = 0
+        job = _Job(list(rolling_history), now, self.debounce_s)
+        job.task = asyncio.ensure_future(self._delayed(key, job))
+        self._pending[key] = job
+        self._stats["scheduled"] += 1
+
+    def cancel(self, user_id: str, session_id: str | None = None) -> bool:
+        """Event loop içinden çağrılır. session_id None ise kullanıcının tüm oturumları."""
+        keys = [k for k in self._pending if k[0] == user_id and (session_id is None or k[1] == session_id)]
+        for key in keys:
+            self._pending.pop(key).task.cancel()
+            self._turns.pop(key, None)
+            self._stats["cancelled"] += 1
+        return bool(keys)
+
+    def on_write(self, user_id: str, role: str, content: str | None, session_id: str | None) -> None:
+        """memory_manager yazım dinleyicisi; silme herhangi bir thread'den gelebilir → loop'a aktarılır."""
+        if role != "clear" or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self.cancel, user_id, session_id)
+
+    async def stop(self, drain: bool = True, timeout: float = 30.0) -> None:
+        """Kapanışta: drain=True ise bekleyen işler debounce beklemeden çalıştırılır."""
+        pending = list(self._pending.items())
+        self._pending.clear()
+        for _, job in pending:
+            job.task.cancel()
+        if not drain or not pending:
+            return
+        jobs = [self._run(key, job.history) for key, job in pending]
+        try:
+            await asyncio.wait_for(asyncio.gather(*jobs, return_exceptions=True), timeout)
+        except asyncio.TimeoutError:
+            event(_log, WARNING, "summary_drain_timeout", pending=len(jobs))
+
+    def stats(self) -> dict:
+        return {**self._stats, "pending": len(self._pending), "running": self._running,
+                "every_turns": self.every_turns, "debounce_s": self.debounce_s, "max_wait_s": self.max_wait_s}
+
+    # ------------------------------------------------------------------
+
+    async def _delayed(self, key: Key, job: _Job) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            # submit() deadline'ı ileri alabilir; uyanınca kalan süre yeniden hesaplanır
+            while job.deadline > loop.time():
+                await asyncio.sleep(job.deadline - loop.time())
+        except asyncio.CancelledError:
+            return
+        if self._pending.get(key) is job:
+            del self._pending[key]
+        await self._run(key, job.history)
+
+    async def _run(self, key: Key, history: list) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._concurrency)
+        user_id, session_id = key
+        async with self._sem:
+            self._running += 1
+            try:
+                await offload("llm", self.fn, user_id, history, session_id=session_id)
+                self._stats["completed"] += 1
+                event(_log, DEBUG, "summary_done", user_id=user_id, session_id=session_id)
+            except Exception as e:
+                self._stats["failed"] += 1
+                event(_log, WARNING, "summary_failed", user_id=user_id, session_id=session_id, error=repr(e))
+            finally:
+                self._running -= 1
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from ..utils.async_exec import submit
+from ..utils.log import get_logger, event, WARNING
+from ..utils.metrics import counter, gauge, histogram
+
+_log = get_logger("pools")
+
+# Ajan / tool başına yalıtılmış çalıştırma havuzu: yavaş bir ajanın (ör. report_agent) yığılması
+# ortak "llm" havuzunu doldurup hızlı tool çağrılarını bekletmesin.
+# agent_configs.yaml (agents.<ad>.pool) veya tools.yaml (tools.<ad>.pool):
+#   pool:
+#     concurrency: 2      # aynı anda çalışan çağrı (havuzun thread sayısı)
+#     queue_limit: 8      # slot bekleyen azami çağrı; doluysa hemen reddedilir
+#     timeout_s: 120      # bekleme + çalışma için azami süre (yoksa sınırsız)
+# Ortam değişkenleri:
+#   POOL_DEFAULT_QUEUE_LIMIT → queue_limit verilmemişse (varsayılan: 32)
+#   POOL_DEFAULT_TIMEOUT_S   → timeout_s verilmemişse; 0: sınırsız (varsayılan: 0)
+#
+# pool ayarı olmayan hedefler eskisi gibi ortak "llm" havuzunda çalışır (utils/async_exec.py).
+# Süresi dolan çağrının thread'i iptal edilemez; slot, thread gerçekten bitince bırakılır
+# (böylece eşzamanlılık sınırı zaman aşımlarında da aşılmaz).
+
+POOL_ACTIVE = gauge("greenmcp_pool_active", "Havuzda çalışan çağrılar", ("target",))
+POOL_QUEUED = gauge("greenmcp_pool_queued", "Havuz slotu bekleyen çağrılar", ("target",))
+POOL_UTILIZATION = gauge("greenmcp_pool_utilization", "Çalışan çağrı / eşzamanlılık sınırı", ("target",))
+POOL_LIMIT = gauge("greenmcp_pool_concurrency", "Havuzun eşzamanlılık sınırı", ("target",))
+POOL_RESULTS = counter("greenmcp_pool_total", "Havuz çağrı sonuçları (ok/rejected/timeout)", ("target", "result"))
+POOL_WAIT = histogram("greenmcp_pool_wait_seconds", "Havuz slotu için bekleme süresi", ("target",))
+
+# hedef başına gauge serilerini yazan havuz: yeniden yüklemede eski havuz drain edilirken yenisinin
+# değerlerini ezmesin, kapanınca da yalnızca hâlâ sahibiyse seriler silinsin
+_GAUGE_OWNER: Dict[str, "TargetPool"] = {}
+
+
+class PoolUnavailable(Exception):
+    """Hedefin havuzu çağrıyı kabul etmedi (kuyruk dolu) veya süre doldu."""
+
+    def __init__(self, target: str, kind: str, message: str):
+        super().__init__(message)
+        self.target = target
+        self.kind = kind
+
+
+class TargetPool:
+    """Tek hedefin havuzu; slot sayımı event loop üzerinde yapılır."""
+
+    def __init__(self, target: str, concurrency: int, queue_limit: int | None = None,
+                 timeout_s: float | None = None):
+        self.target = target
+        self.spec = _spec({"concurrency": concurrency, "queue_limit": queue_limit, "timeout_s": timeout_s})
+        self.concurrency, self.queue_limit, self.timeout_s = self.spec
+        self.active = 0
+        self.closed = False
+        self._waiters: deque = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"ok": 0, "rejected": 0, "timeout": 0}
+        _GAUGE_OWNER[target] = self
+        POOL_LIMIT.set(self.concurrency, target=target)
+        self._publish()
+
+    def _publish(self) -> None:
+        if self.closed or _GAUGE_OWNER.get(self.target) is not self:
+            return
+        POOL_ACTIVE.set(self.active, target=self.target)
+        POOL_QUEUED.set(len(self._waiters), target=self.target)
+        POOL_UTILIZATION.set(self.active / self.concurrency, target=self.target)
+
+    def _count(self, result: str) -> None:
+        self._stats[result] += 1
+        POOL_RESULTS.inc(target=self.target, result=result)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                thread_name_prefix=f"mcp-pool-{self.target}")
+        return self._executor
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._publish()
+            return
+        if len(self._waiters) >= self.queue_limit:
+            self._count("rejected")
+            raise PoolUnavailable(self.target, "pool_rejected",
+                                  f"[HATA] '{self.target}' şu an meşgul (kuyruk dolu), lütfen tekrar deneyin.")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._publish()
+        try:
+            # slot, _release() tarafından future'a devredilir (active sayısı değişmeden)
+            await asyncio.wait_for(fut, self._remaining(deadline))
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                self._release()   # slot tam zaman aşımında verildi; kullanılmayacak
+            else:
+                fut.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self._count("timeout")
+                raise PoolUnavailable(self.target, "pool_timeout",
+                                      f"[HATA] '{self.target}' için bekleme süresi doldu ({self.timeout_s:g} sn).")
+            raise
+        finally:
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+            self._publish()
+
+    def _release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                self._publish()
+                return
+        self.active -= 1
+        self._publish()
+
+    def _on_done(self, fut: asyncio.Future) -> None:
+        # süresi dolmuş çağrının sonucu kimse beklemediği için burada tüketilir
+        if not fut.cancelled():
+            fut.exception()
+        self._release()
+
+    async def run(self, fn, *args, **kwargs):
+        """fn'i bu hedefin havuzunda çalıştırır; kabul edilmezse PoolUnavailable."""
+        t0 = time.monotonic()
+        deadline = None if self.timeout_s is None else t0 + self.timeout_s
+        await self._acquire(deadline)
+        POOL_WAIT.observe(time.monotonic() - t0, target=self.target)
+        try:
+            fut = submit(self._get_executor(), fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(self._on_done)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(fut), self._remaining(deadline))
+        except asyncio.TimeoutError:
+            self._count("timeout")
+            event(_log, WARNING, "pool_timeout", target=self.target, timeout_s=self.timeout_s)
+            raise PoolUnavailable(self.target, "pool_timeout",
+                                  f"[HATA] '{self.target}' zaman aşımına uğradı ({self.timeout_s:g} sn).")
+        self._count("ok")
+        return result
+
+    def status(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue_limit,
+            "timeout_s": self.timeout_s,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "utilization": round(self.active / self.concurrency, 4),
+            **self._stats,
+        }
+
+    def close(self) -> None:
+        """Kullanımdan kalkan havuz: yeni iş almaz, çalışan thread'ler kendi bitişinde kapanır."""
+        self.closed = True
+        if _GAUGE_OWNER.get(self.target) is self:
+            # hedef kaldırıldı: son değerler /metrics'te donup kalmasın
+            del _GAUGE_OWNER[self.target]
+            for g in (POOL_ACTIVE, POOL_QUEUED, POOL_UTILIZATION, POOL_LIMIT):
+                g.remove(target=self.target)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def _spec(opt: dict) -> tuple:
+    """pool ayarının TargetPool.spec karşılığı (havuz kurmadan karşılaştırma için)."""
+    queue_limit = opt.get("queue_limit")
+    timeout_s = float(os.getenv("POOL_DEFAULT_TIMEOUT_S", "0")) if opt.get("timeout_s") is None else float(opt["timeout_s"])
+    return (
+        max(1, int(opt["concurrency"])),
+        int(os.getenv("POOL_DEFAULT_QUEUE_LIMIT", "32")) if queue_limit is None else max(0, int(queue_limit)),
+        timeout_s if timeout_s > 0 else None,
+    )
+
+
+def build_pools(specs: Dict[str, dict], previous: Optional[Dict[str, TargetPool]] = None) -> Dict[str, TargetPool]:
+    """{hedef: pool ayarı} → {hedef: TargetPool}; ayarı değişmeyen havuz (ve sayaçları) korunur."""
+    pools: Dict[str, TargetPool] = {}
+    for target, opt in (specs or {}).items():
+        if not isinstance(opt, dict) or not opt.get("concurrency"):
+            continue
+        old = (previous or {}).get(target)
+        if old is not None and old.spec == _spec(opt):
+            pools[target] = old
+        else:
+            pools[target] = TargetPool(target, opt["concurrency"], opt.get("queue_limit"), opt.get("timeout_s"))
+    return pools
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class TaskNode:
+    def __init__(self, idx: int, task: dict):
+        self.idx = idx
+        self.task = task
+        self.deps: List[int] = []
+        self.start = 0.0
+        self.end = 0.0
+        self.result: Optional[dict] = None
+
+
+def build_nodes(tasks: List[dict], consumes: Dict[str, List[str]], tool_names: set) -> List[TaskNode]:
+    """
+    Alt görevlerden DAG düğümleri üretir.
+      - task["depends_on"]: [index, ...] → açık bağımlılık (yalnızca önceki görevler)
+      - consumes[agent]: [hedef, ...]    → ajan, aynı mesajdaki bu hedeflerin sonucunu bekler
+        (tool hedefleri sıradan bağımsız; ajan hedefleri yalnızca öncekilerse — döngü olmaz)
+    """
+    nodes = [TaskNode(i, t) for i, t in enumerate(tasks)]
+    for node in nodes:
+        deps = set()
+        for d in node.task.get("depends_on") or []:
+            if isinstance(d, int) and 0 <= d < node.idx:
+                deps.add(d)
+        wanted = set(consumes.get(node.task.get("agent"), []) or [])
+        if wanted:
+            for other in nodes:
+                if other.idx == node.idx or other.task.get("agent") not in wanted:
+                    continue
+                if other.task.get("agent") in tool_names or other.idx < node.idx:
+                    deps.add(other.idx)
+        node.deps = sorted(deps)
+    return nodes
+
+
+Runner = Callable[[dict, List[dict]], Awaitable[dict]]
+
+
+async def execute(nodes: List[TaskNode], runner: Runner) -> List[dict]:
+    """
+    Her düğüm yalnızca kendi bağımlılıklarını bekler; geri kalanlar paralel çalışır.
+    runner(task, dep_results) → yanıt öğesi. Dönüş sırası görev sırasıdır.
+    """
+    t0 = time.perf_counter()
+    futures: Dict[int, asyncio.Future] = {}
+
+    async def _run(node: TaskNode) -> dict:
+        dep_results = [await futures[d] for d in node.deps]
+        node.start = time.perf_counter() - t0
+        node.result = await runner(node.task, dep_results)
+        node.end = time.perf_counter() - t0
+        return node.result
+
+    for node in nodes:
+        futures[node.idx] = asyncio.ensure_future(_run(node))
+    return list(await asyncio.gather(*(futures[n.idx] for n in nodes)))
+
+
+def critical_path(nodes: List[TaskNode]) -> dict:
+    """En geç biten düğümden geriye, en geç biten bağımlılığı izleyerek kritik yolu çıkarır."""
+    if not nodes:
+        return {"path": [], "critical_path_s": 0.0, "nodes": []}
+    by_idx = {n.idx: n for n in nodes}
+    cur = max(nodes, key=lambda n: n.end)
+    path = [cur]
+    while cur.deps:
+        cur = max((by_idx[d] for d in cur.deps), key=lambda n: n.end)
+        path.append(cur)
+    path.reverse()
+    return {
+        "path": [f"{n.idx}:{n.task.get('agent')}" for n in path],
+        "critical_path_s": round(path[-1].end - path[0].start, 4),
+        "nodes": [
+            {
+                "idx": n.idx,
+                "agent": n.task.get("agent"),
+                "deps": n.deps,
+                "start_s": round(n.start, 4),
+                "end_s": round(n.end, 4),
+                "duration_s": round(n.end - n.start, 4),
+            }
+            for n in nodes
+        ],
+    }
@@ -1,6 +1,6 @@
 
 from typing import Dict
-from greenmcp.agents.all_agents import AGENTS
+from greenmcp.agents.all_agents import default_agents
 from .load_tools import load_tools_from_config  
 
 
@@ -10,17 +10,31 @@ def get_allow_map() -> dict[str, list[str]]:
     """İzin haritasını (agent -> [tool, ...]) döndürür."""
     return _ALLOW_MAP
 
-def build_tool_registry() -> Dict[str, object]:
+def set_allow_map(allow: dict[str, list[str]]) -> None:
+    """Sıcak yeniden yüklemede yeni haritayı tek atamayla yayınlar."""
+    global _ALLOW_MAP
+    _ALLOW_MAP = dict(allow or {})
+
+def load_tools_and_allow() -> tuple[Dict[str, object], dict[str, list[str]]]:
+    """tools.yaml → (tool nesneleri, allow-list); global haritaya dokunmaz."""
+    tools, allow, _ = load_tools_full()
+    return tools, allow
+
+def load_tools_full() -> tuple[Dict[str, object], dict[str, list[str]], dict[str, dict]]:
+    """tools.yaml → (tool nesneleri, allow-list, tool başına pool ayarı)."""
+    tools, meta = load_tools_from_config()
+    return tools, meta.get("allow", {}), meta.get("pools", {})
+
+def build_tool_registry(agents: Dict[str, object] | None = None) -> Dict[str, object]:
   
     # 1) Ajanları ekle
-    registry: Dict[str, object] = dict(AGENTS)
+    registry: Dict[str, object] = dict(default_agents() if agents is None else agents)
 
     # 2) Tool'ları config'ten yükle
-    tools, meta = load_tools_from_config()
+    tools, allow = load_tools_and_allow()
     registry.update(tools)
 
     # 3) allow-list bilgisini sakla
-    global _ALLOW_MAP
-    _ALLOW_MAP = meta.get("allow", {})
+    set_allow_map(allow)
 
     return registry
@@ -3,6 +3,8 @@ import json
 import re
 import unicodedata
 
+from .http_pool import get_client
+
 _NUM = r"(\d+(?:[.,]\d+)?)"
 
 # —— Varsayımlar / sabitler ——
@@ -207,10 +209,9 @@ class CalcTool:
             items_payload = _parse_natural_language(user_input or "")
 
         try:
-            with httpx.Client(timeout=self.timeout) as c:
-                r = c.post(f"{self.base_url}/calc", json=items_payload)
-                r.raise_for_status()
-                data = r.json()
+            r = get_client(self.timeout).post(f"{self.base_url}/calc", json=items_payload)
+            r.raise_for_status()
+            data = r.json()
 
             total = data.get("co2e_kg")
             items = data.get("items", [])
@@ -3,6 +3,8 @@ import re
 import unicodedata
 from typing import Optional, Tuple
 
+from .http_pool import get_client
+
 class WeatherTool:
    
     def __init__(self, base_url: str = "http://localhost:8002", timeout: int = 8):
@@ -78,12 +80,11 @@ class WeatherTool:
     def _call_geocode(self, q: str) -> Optional[dict]:
         url = f"{self.base_url}/geocode"
         try:
-            with httpx.Client(timeout=self.timeout) as c:
-                r = c.get(url, params={"q": q, "count": 1})
-                if r.status_code == 404:
-                    return None
-                r.raise_for_status()
-                data = r.json() or {}
+            r = get_client(self.timeout).get(url, params={"q": q, "count": 1})
+            if r.status_code == 404:
+                return None
+            r.raise_for_status()
+            data = r.json() or {}
         except httpx.HTTPError:
             return None
 
@@ -101,10 +102,9 @@ class WeatherTool:
     def _call_weather(self, lat: float, lon: float) -> Optional[dict]:
         url = f"{self.base_url}/weather"
         try:
-            with httpx.Client(timeout=self.timeout) as c:
-                r = c.get(url, params={"lat": lat, "lon": lon})
-                r.raise_for_status()
-                return r.json()
+            r = get_client(self.timeout).get(url, params={"lat": lat, "lon": lon})
+            r.raise_for_status()
+            return r.json()
         except httpx.HTTPError:
             return None
 
@@ -2,6 +2,8 @@ import httpx
 import json
 from typing import Any, Dict, Optional
 
+from .http_pool import get_client
+
 class HttpJsonTool:
     def __init__(self, base_url: str, path: str, method: str = "POST",
                  query_map: Optional[Dict[str, str]] = None,
@@ -52,15 +54,15 @@ class HttpJsonTool:
     def run(self, user_input: str, history=None) -> str:
         url = f"{self.base_url}{self.path}"
         try:
-            with httpx.Client(timeout=self.timeout, headers=self.headers) as c:
-                if self.method == "GET":
-                    r = c.get(url, params=self._build_query(user_input))
-                else:
-                    params = self._build_query(user_input)
-                    body = self._build_body(user_input)
-                    r = c.post(url, params=params, json=body) if isinstance(body,(dict,list)) else c.post(url, params=params, content=body)
-                r.raise_for_status()
-                data = r.json() if "application/json" in r.headers.get("content-type","") else {"text": r.text}
+            c = get_client(self.timeout, self.headers)
+            if self.method == "GET":
+                r = c.get(url, params=self._build_query(user_input))
+            else:
+                params = self._build_query(user_input)
+                body = self._build_body(user_input)
+                r = c.post(url, params=params, json=body) if isinstance(body,(dict,list)) else c.post(url, params=params, content=body)
+            r.raise_for_status()
+            data = r.json() if "application/json" in r.headers.get("content-type","") else {"text": r.text}
         except httpx.HTTPError as e:
             return f"[HATA] HttpJsonTool isteği başarısız: {e}"
 
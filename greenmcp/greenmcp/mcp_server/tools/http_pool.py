@@ -0,0 +1,74 @@
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from ...utils.recorder import upstream, current, is_offline, ReplayMiss
+
+# Tool'lar için paylaşılan, bağlantı havuzlu httpx.Client'lar.
+# Her çağrıda yeni Client açmak TCP/TLS el sıkışmasını tekrarlatır; toplu isteklerde
+# (/ask/batch) binlerce çağrı aynı keep-alive bağlantılarını kullanır.
+# httpx.Client thread-safe'tir; "llm" havuzundaki thread'ler aynı nesneyi paylaşabilir.
+
+_CLIENTS: Dict[tuple, httpx.Client] = {}
+_LOCK = threading.Lock()
+
+_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+
+class _RecordingTransport(httpx.BaseTransport):
+    """
+    Trafik kaydı/replay için ince sarmalayıcı (utils/recorder.py). Aktif izleme yoksa
+    istek doğrudan alttaki havuzlu transport'a gider; ek maliyet tek bir contextvar okumasıdır.
+    """
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if current() is None and not is_offline():
+            return self._inner.handle_request(request)
+
+        def _call() -> dict:
+            resp = self._inner.handle_request(request)
+            try:
+                body = resp.read()
+            finally:
+                resp.close()
+            return {"status": resp.status_code, "content_type": resp.headers.get("content-type", ""),
+                    "body": body.decode("utf-8", "replace")}
+
+        req = {"method": request.method, "url": str(request.url),
+               "body": request.read().decode("utf-8", "replace")}
+        target = f"{request.method} {request.url.host}:{request.url.port or ''}{request.url.path}"
+        try:
+            data = upstream("http", target, req, _call)
+        except ReplayMiss as e:
+            raise httpx.ConnectError(str(e), request=request) from e
+        headers = {"content-type": data["content_type"]} if data.get("content_type") else None
+        return httpx.Response(data["status"], headers=headers, content=data["body"].encode("utf-8"),
+                              request=request)
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+def get_client(timeout: float, headers: Optional[Dict[str, str]] = None) -> httpx.Client:
+    key = (float(timeout), tuple(sorted((headers or {}).items())))
+    c = _CLIENTS.get(key)
+    if c is None:
+        with _LOCK:
+            c = _CLIENTS.get(key)
+            if c is None:
+                transport = _RecordingTransport(httpx.HTTPTransport(limits=_LIMITS))
+                c = httpx.Client(timeout=timeout, headers=headers, transport=transport)
+                _CLIENTS[key] = c
+    return c
+
+
+def close_clients() -> None:
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for c in clients:
+        c.close()
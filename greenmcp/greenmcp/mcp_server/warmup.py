@@ -0,0 +1,211 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..agents.llm_runner import query_model
+from ..utils.async_exec import offload
+from ..utils.log import get_logger, event, INFO, WARNING
+
+_log = get_logger("warmup")
+
+# Ortam değişkenleri:
+#   DISABLE_WARMUP           → "1" ise ısıtma yapılmaz; tüm modeller "skipped" (hazır sayılır)
+#   WARMUP_READY_POLICY      → "all" | "dispatcher" | "any"  (/ready ne zaman 200 döner; varsayılan: dispatcher)
+#   WARMUP_ROUTE_WARM_ONLY   → "1" ise soğuk ajana gelen görev, ajanın yedeklerinden sıcak olana yönlendirilir
+#
+# Yedekler agent_configs.yaml'da ajan başına verilir (sırayla denenir); verilmezse yalnızca genel
+# amaçlı qa_agent. Başka bir uzman ajana (ör. hesaplama görevini report_agent'a) düşülmez:
+#   coach_agent:
+#     warm_fallback: [qa_agent]      # boş liste: bu ajan hiç yönlendirilmez
+
+PENDING, WARMING, READY, FAILED, SKIPPED = "pending", "warming", "ready", "failed", "skipped"
+_OK = (READY, SKIPPED)
+_DEFAULT_FALLBACK = ["qa_agent"]
+
+
+class WarmupTracker:
+    """Modelleri arka planda, eşzamanlı ısıtır ve model başına durum/yükleme süresi tutar."""
+
+    def __init__(self, dispatcher_cfg: dict, agent_cfgs: dict):
+        self._lock = threading.Lock()
+        self.dispatcher_model: Optional[str] = None
+        self.models: Dict[str, dict] = {}
+        self.agent_model: Dict[str, str] = {}
+        self.fallbacks: Dict[str, List[str]] = {}
+        self._apply(dispatcher_cfg, agent_cfgs)
+
+        self.components: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _apply(self, dispatcher_cfg: dict, agent_cfgs: dict) -> List[str]:
+        """Config'ten model listesini kurar; daha önce bilinmeyen (yeni) modelleri döndürür."""
+        dispatcher_model = (dispatcher_cfg or {}).get("model")
+        agent_model: Dict[str, str] = {}
+        fallbacks: Dict[str, List[str]] = {}
+        targets = []
+        if dispatcher_model:
+            targets.append(("dispatcher", dispatcher_model, (dispatcher_cfg or {}).get("backend") or "ollama"))
+        for name, cfg in (agent_cfgs or {}).items():
+            fb = (cfg or {}).get("warm_fallback", _DEFAULT_FALLBACK)
+            fallbacks[name] = [fb] if isinstance(fb, str) else list(fb or [])
+            model = (cfg or {}).get("model")
+            if not model:
+                continue
+            agent_model[name] = model
+            backend = (cfg or {}).get("backend") or os.getenv("DEFAULT_BACKEND", "ollama")
+            targets.append((name, model, backend))
+            # kademeli ajanın küçük modeli de ısıtılır (agents/cascade.py)
+            small = (cfg or {}).get("cascade")
+            if isinstance(small, dict) and small.get("model"):
+                targets.append((f"{name}:cascade", small["model"], small.get("backend") or backend))
+
+        # Aynı model birden çok ajanda kullanılıyorsa tek kez ısıtılır; mevcut modellerin durumu korunur
+        models: Dict[str, dict] = {}
+        new = []
+        with self._lock:
+            for owner, model, backend in targets:
+                st = models.get(model)
+                if st is None:
+                    old = self.models.get(model)
+                    if old is not None and old["backend"] == backend:
+                        # aynı nesne: sürmekte olan _warm() durumu buraya yazmaya devam eder
+                        st = old
+                        st["used_by"] = []
+                    else:
+                        st = {"state": PENDING, "backend": backend, "used_by": [], "load_s": None, "error": None}
+                        new.append(model)
+                    models[model] = st
+                st["used_by"].append(owner)
+            self.models = models
+            self.agent_model = agent_model
+            self.fallbacks = fallbacks
+            self.dispatcher_model = dispatcher_model
+        return new
+
+    def configure(self, dispatcher_cfg: dict, agent_cfgs: dict) -> None:
+        """Model listesini ısıtma başlatmadan kurar (açılış config'i ilk erişimde yüklenince)."""
+        self._apply(dispatcher_cfg, agent_cfgs)
+
+    async def update(self, dispatcher_cfg: dict, agent_cfgs: dict, timeout: float | None = None) -> List[str]:
+        """
+        Sıcak yeniden yükleme: yalnızca yeni modeller ısıtılır (mevcutların durumu korunur).
+        timeout verilirse ısıtma en fazla o kadar beklenir; yeni modellerin listesini döndürür.
+        """
+        new = self._apply(dispatcher_cfg, agent_cfgs)
+        if not new:
+            return new
+        if os.getenv("DISABLE_WARMUP", "0") == "1":
+            with self._lock:
+                for m in new:
+                    self.models[m]["state"] = SKIPPED
+            return new
+        job = asyncio.ensure_future(asyncio.gather(*[self._warm(m) for m in new]))
+        try:
+            await asyncio.wait_for(asyncio.shield(job), timeout)
+        except asyncio.TimeoutError:
+            event(_log, WARNING, "reload_warm_timeout", models=new, timeout_s=timeout)
+        return new
+
+    # ------------------------------------------------------------------
+
+    def start(self, components: Optional[Dict[str, Callable]] = None) -> None:
+        """
+        Startup hook'undan çağrılır; beklemez — sunucu hemen trafik kabul eder.
+        components: model dışı, arka planda yüklenecek bileşenler (ör. hafıza arka ucu);
+        durumları raporlanır ama /ready kararını etkilemez.
+        """
+        for name in components or {}:
+            self.components[name] = {"state": PENDING, "load_s": None, "error": None}
+        if os.getenv("DISABLE_WARMUP", "0") == "1":
+            for st in self.models.values():
+                st["state"] = SKIPPED
+            for st in self.components.values():
+                st["state"] = SKIPPED
+            return
+        jobs = [self._warm(m) for m in list(self.models)]
+        jobs += [self._load_component(n, fn) for n, fn in (components or {}).items()]
+        self._task = asyncio.ensure_future(asyncio.gather(*jobs))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _warm(self, model: str) -> None:
+        st = self.models.get(model)
+        if st is None:
+            return  # ısıtma başlamadan config'ten çıkarıldı
+        with self._lock:
+            st["state"] = WARMING
+        t0 = time.perf_counter()
+        try:
+            out = await offload("warmup", query_model, model, "ping",
+                                purpose="dispatcher", options={"num_predict": 1}, backend=st["backend"])
+            # query_model Ollama hatalarını metin olarak döndürür
+            if isinstance(out, str) and out.startswith("[HATA]"):
+                raise RuntimeError(out)
+            with self._lock:
+                st["state"] = READY
+                st["load_s"] = round(time.perf_counter() - t0, 3)
+            event(_log, INFO, "model_warm", model=model, backend=st["backend"], load_s=st["load_s"])
+        except Exception as e:
+            with self._lock:
+                st["state"] = FAILED
+                st["load_s"] = round(time.perf_counter() - t0, 3)
+                st["error"] = repr(e)
+            event(_log, WARNING, "model_warm_failed", model=model, backend=st["backend"], error=repr(e))
+
+    async def _load_component(self, name: str, fn: Callable) -> None:
+        st = self.components[name]
+        st["state"] = WARMING
+        t0 = time.perf_counter()
+        try:
+            await offload("warmup", fn)
+            st["state"] = READY
+        except Exception as e:
+            st["state"] = FAILED
+            st["error"] = repr(e)
+            event(_log, WARNING, "component_warm_failed", component=name, error=repr(e))
+        st["load_s"] = round(time.perf_counter() - t0, 3)
+
+    # ------------------------------------------------------------------
+
+    def is_warm(self, agent_name: str) -> bool:
+        model = self.agent_model.get(agent_name)
+        if model is None:
+            return True  # tool'lar ve bilinmeyenler için ısıtma yok
+        return self.models.get(model, {}).get("state") in _OK
+
+    def pick_warm(self, agent_name: str, candidates: List[str]) -> str:
+        """
+        WARMUP_ROUTE_WARM_ONLY açıksa soğuk ajan yerine, ajanın yedeklerinden (warm_fallback)
+        candidates içinde olan ilk sıcak olanı döndürür; yoksa ajanın kendisi.
+        """
+        if os.getenv("WARMUP_ROUTE_WARM_ONLY", "0") != "1" or self.is_warm(agent_name):
+            return agent_name
+        available = set(candidates)
+        for c in self.fallbacks.get(agent_name, _DEFAULT_FALLBACK):
+            if c != agent_name and c in available and self.is_warm(c):
+                return c
+        return agent_name
+
+    def ready(self) -> bool:
+        policy = os.getenv("WARMUP_READY_POLICY", "dispatcher")
+        states = [st["state"] for st in self.models.values()]
+        if not states:
+            return True
+        if policy == "all":
+            return all(s in _OK for s in states)
+        if policy == "any":
+            return any(s in _OK for s in states)
+        if self.dispatcher_model:
+            return self.models[self.dispatcher_model]["state"] in _OK
+        return any(s in _OK for s in states)
+
+    def status(self) -> dict:
+        with self._lock:
+            models = {m: {k: (list(v) if isinstance(v, list) else v) for k, v in st.items()}
+                      for m, st in self.models.items()}
+        components = {n: dict(st) for n, st in self.components.items()}
+        return {"ready": self.ready(), "models": models, "components": components}
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+from .memory_manager import get_collection, embed_query, is_remote
+from ..utils.log import get_logger, event, DEBUG, WARNING
+from ..utils.metrics import counter
+
+_log = get_logger("answer_cache")
+
+# Anlamsal yanıt önbelleği: yeniden ifade edilmiş sorular ("Karbon ayak izi nedir?" /
+# "karbon ayak izi ne demek") için model çağrısı yapılmadan kayıtlı yanıt döner.
+# Ajan başına açılır (agent_configs.yaml):
+#   qa_agent:
+#     answer_cache: true                       # veya {threshold: 0.9, ttl_s: 86400}
+# Ortam değişkenleri:
+#   ANSWER_CACHE_ENABLED   → "0" ise tüm ajanlarda kapalı (varsayılan: 1)
+#   ANSWER_CACHE_THRESHOLD → varsayılan kosinüs benzerlik eşiği (varsayılan: 0.9)
+#   ANSWER_CACHE_TTL_S     → varsayılan kayıt ömrü (varsayılan: 86400)
+#
+# Hafıza ile aynı Chroma istemcisi ve MiniLM embedding'i kullanılır ("answer_cache" koleksiyonu);
+# sorgu embedding'i embed_query LRU'sundan gelir. Kayıtlar kullanıcıya özeldir (yanıt o kullanıcının
+# hafıza/oturum bağlamıyla üretilir); önceki turlara atıf yapan sorular ("Peki bunu nasıl azaltırım?")
+# önbelleğe hiç bakmaz ve yazılmaz. MEMORY_BACKEND=http veya Chroma yoksa önbellek
+# devre dışıdır (aramalar "disabled" olarak sayılır, isabet oranına girmez); açılışta WARNING
+# loglanır ve /telemetry/summary'de ajanın önbelleği enabled=false + disabled_reason ile görünür.
+
+COLLECTION = "answer_cache"
+
+ANSWER_CACHE_REQUESTS = counter(
+    "greenmcp_answer_cache_total", "Anlamsal yanıt önbelleği sonuçları", ("agent", "result"),
+)
+ANSWER_CACHE_STORES = counter(
+    "greenmcp_answer_cache_stores_total", "Önbelleğe yazılan yanıtlar", ("agent",),
+)
+
+_COL = None
+
+
+def _collection():
+    global _COL
+    if _COL is None:
+        _COL = get_collection(COLLECTION)
+    return _COL
+
+
+_PUNCT = re.compile(r"[^\w\s]", re.UNICODE)
+# Önceki konuşmaya dayanan (bağlamsız anlamı olmayan) soru işaretleri
+_FOLLOW_UP = re.compile(
+    r"\b(peki|bunu|bunun|buna|bunda|bundan|bunlar\w*|şunu|şunun|şuna|onu|onun|ona|onda|ondan|"
+    r"öyleyse|o zaman|yukarıdaki|önceki|az önce|demin|aynı şey\w*)\b",
+    re.IGNORECASE,
+)
+
+
+def is_context_free(question: str) -> bool:
+    """Soru tek başına anlamlı mı? Önceki turlara atıf yapan sorular önbelleğe girmez."""
+    return bool(question and question.strip()) and not _FOLLOW_UP.search(question)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", _PUNCT.sub(" ", (text or "").casefold())).strip()
+
+
+class AnswerCache:
+    """Tek ajanın önbelleği; kayıtlar ortak koleksiyonda agent + user_id metadata'sıyla ayrılır."""
+
+    def __init__(self, agent: str, threshold: float | None = None, ttl_s: float | None = None):
+        self.agent = agent
+        self.threshold = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9")) if threshold is None else float(threshold)
+        self.ttl_s = float(os.getenv("ANSWER_CACHE_TTL_S", "86400")) if ttl_s is None else float(ttl_s)
+        self._lock = threading.Lock()
+        self._stats = {"hit": 0, "miss": 0, "expired": 0, "disabled": 0, "context": 0, "stored": 0}
+        self.disabled_reason: str | None = None   # None → etkin (ya da henüz denenmedi)
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            self._stats[result] += 1
+        ANSWER_CACHE_REQUESTS.inc(agent=self.agent, result=result)
+
+    def _unavailable(self) -> None:
+        if self.disabled_reason is None:
+            self.disabled_reason = "memory_backend_http" if is_remote() else "chroma_unavailable"
+            event(_log, WARNING, "answer_cache_disabled", agent=self.agent, reason=self.disabled_reason)
+
+    def _where(self, user_id: str) -> dict:
+        return {"$and": [{"agent": self.agent}, {"user_id": user_id}]}
+
+    def lookup(self, question: str, user_id: str) -> Optional[dict]:
+        """
+        Bu kullanıcının eşiği geçen en yakın kaydı varsa {answer, similarity, question, age_s} döner;
+        yoksa None.
+        """
+        if not is_context_free(question):
+            self._count("context")
+            return None
+        col = _collection()
+        if col is None:
+            self._unavailable()
+        vec = embed_query(question) if col is not None else None
+        if vec is None:
+            self._count("disabled")
+            return None
+        try:
+            res = col.query(query_embeddings=[vec], n_results=1, where=self._where(user_id))
+        except Exception as e:
+            event(_log, WARNING, "answer_cache_query_failed", agent=self.agent, error=repr(e))
+            self._count("disabled")
+            return None
+
+        ids = (res.get("ids") or [[]])[0]
+        if not ids:
+            self._count("miss")
+            return None
+        similarity = 1.0 - float((res.get("distances") or [[1.0]])[0][0])
+        meta = (res.get("metadatas") or [[{}]])[0][0] or {}
+        if similarity < self.threshold:
+            self._count("miss")
+            return None
+        age_s = time.time() - float(meta.get("ts") or 0)
+        if age_s > self.ttl_s:
+            self._count("expired")
+            try:
+                col.delete(ids=[ids[0]])
+            except Exception:
+                pass
+            return None
+
+        self._count("hit")
+        event(_log, DEBUG, "answer_cache_hit", agent=self.agent, similarity=round(similarity, 4))
+        return {
+            "answer": meta.get("answer", ""),
+            "similarity": round(similarity, 4),
+            "question": (res.get("documents") or [[""]])[0][0],
+            "age_s": round(age_s, 1),
+        }
+
+    def store(self, question: str, answer: str, user_id: str, model: str = "") -> None:
+        """Başarılı yanıtı kullanıcıya özel kaydeder; aynı (normalize) soru için önceki kayıt güncellenir."""
+        if not answer or answer.startswith("[HATA]") or not is_context_free(question):
+            return
+        col = _collection()
+        vec = embed_query(question) if col is not None else None
+        if vec is None:
+            return
+        key = f"{self.agent}\x00{user_id}\x00{_normalize(question)}"
+        doc_id = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        try:
+            col.upsert(ids=[doc_id], embeddings=[vec], documents=[question],
+                       metadatas=[{"agent": self.agent, "user_id": user_id, "answer": answer,
+                                   "model": model, "ts": time.time()}])
+        except Exception as e:
+            event(_log, WARNING, "answer_cache_store_failed", agent=self.agent, error=repr(e))
+            return
+        with self._lock:
+            self._stats["stored"] += 1
+        ANSWER_CACHE_STORES.inc(agent=self.agent)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        looked = s["hit"] + s["miss"] + s["expired"]
+        s["enabled"] = self.disabled_reason is None
+        s["disabled_reason"] = self.disabled_reason
+        s["hit_rate"] = round(s["hit"] / looked, 4) if looked else 0.0
+        s["threshold"] = self.threshold
+        s["ttl_s"] = self.ttl_s
+        return s
+
+
+def build_answer_caches(agent_configs: dict) -> dict:
+    """agent_configs.yaml'da answer_cache açık olan ajanlar için {ajan: AnswerCache}."""
+    if os.getenv("ANSWER_CACHE_ENABLED", "1") == "0":
+        return {}
+    caches = {}
+    for name, cfg in (agent_configs or {}).items():
+        opt = (cfg or {}).get("answer_cache")
+        if not opt:
+            continue
+        opt = opt if isinstance(opt, dict) else {}
+        caches[name] = AnswerCache(name, threshold=opt.get("threshold"), ttl_s=opt.get("ttl_s"))
+    if caches and is_remote():
+        # paylaşılan hafıza servisi ek koleksiyon sunmuyor → ajan config'i açık olsa da önbellek çalışmaz
+        event(_log, WARNING, "answer_cache_disabled", agents=sorted(caches), reason="memory_backend_http")
+        for cache in caches.values():
+            cache.disabled_reason = "memory_backend_http"
+    return caches
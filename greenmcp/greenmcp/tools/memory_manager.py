@@ -1,28 +1,104 @@
 
+import atexit
 import os
+import threading
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from difflib import get_close_matches
 
+from ..utils.log import get_logger, event, DEBUG, WARNING
+from ..utils.metrics import stage, counter, TASK_ERRORS
+from ..utils.profiling import profiled
+
+_log = get_logger("memory")
+
 _FALLBACK_STORE = defaultdict(list)
 
-_CHROMA_OK = False
-try:
-    import chromadb
-    from chromadb.utils import embedding_functions
-
-    _CHROMA_OK = True
-    _CHROMA_DIR = os.path.join(os.path.dirname(__file__), "..", "memory_store")
-    _client = chromadb.PersistentClient(path=_CHROMA_DIR)
-    _ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
-    _col = _client.get_or_create_collection(
-        name="chat_memory",
-        embedding_function=_ef
-    )
-except Exception:
-    _CHROMA_OK = False
+# Hafıza arka ucu:
+#   MEMORY_BACKEND     → "local" (varsayılan; süreç içi Chroma, yoksa bellek içi yedek)
+#                        | "http" (paylaşılan hafıza servisi; çok işçili / çok düğümlü kurulum)
+#                        | "memory" (yalnızca bellek içi yedek; Chroma/MiniLM yüklenmez — replay, testler)
+#   MEMORY_SERVICE_URL → "http" arka ucunda servis adresi (varsayılan: http://localhost:8010)
+#   MEMORY_STORE_DIR   → yerel Chroma klasörü (varsayılan: paket içindeki memory_store)
+_REMOTE = None
+_REMOTE_LOCK = threading.Lock()
+
+
+def _remote():
+    """MEMORY_BACKEND=http ise paylaşılan servis istemcisini döndürür, değilse None."""
+    global _REMOTE
+    if _REMOTE is None and os.getenv("MEMORY_BACKEND", "local") == "http":
+        with _REMOTE_LOCK:
+            if _REMOTE is None:
+                from .memory_remote import RemoteMemory
+                _REMOTE = RemoteMemory(os.getenv("MEMORY_SERVICE_URL", "http://localhost:8010"))
+    return _REMOTE
+
+
+def is_remote() -> bool:
+    return _remote() is not None
+
+
+def write_is_deferred() -> bool:
+    """add_* kayıtları write-behind tamponuna mı gidiyor? (bellek içi yedekte yazım anında görünür)"""
+    if _remote() is None and not _CHROMA_OK:
+        return False
+    return _BUFFER is not None
+
+# Chroma + MiniLM embedding ağır bağımlılıklardır (chromadb, sentence-transformers, torch);
+# modül import'unda değil, ilk hafıza işleminde (veya init_memory() ile) yüklenir.
+_CHROMA_OK: bool | None = None   # None → henüz denenmedi
+_client = None
+_ef = None
+_col = None
+_INIT_LOCK = threading.Lock()
+
+
+def _chroma_ready() -> bool:
+    global _CHROMA_OK, _client, _ef, _col
+    if _CHROMA_OK is not None:
+        return _CHROMA_OK
+    with _INIT_LOCK:
+        if _CHROMA_OK is not None:
+            return _CHROMA_OK
+        if os.getenv("MEMORY_BACKEND", "local") == "memory":
+            _CHROMA_OK = False
+            return _CHROMA_OK
+        try:
+            import chromadb
+            from chromadb.utils import embedding_functions
+
+            _CHROMA_DIR = os.getenv("MEMORY_STORE_DIR") or os.path.join(os.path.dirname(__file__), "..", "memory_store")
+            _client = chromadb.PersistentClient(path=_CHROMA_DIR)
+            _ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name="all-MiniLM-L6-v2"
+            )
+            _col = _client.get_or_create_collection(
+                name="chat_memory",
+                embedding_function=_ef
+            )
+            _CHROMA_OK = True
+        except Exception as e:
+            _CHROMA_OK = False
+            event(_log, WARNING, "chroma_unavailable", error=repr(e), fallback="in-memory")
+    return _CHROMA_OK
+
+
+def init_memory() -> bool:
+    """Hafıza arka ucunu önceden yükler (ör. sunucu ısıtması sırasında)."""
+    if _remote() is not None:
+        return True  # model/embedding servis sürecinde yüklü
+    return _chroma_ready()
+
+
+def get_collection(name: str):
+    """
+    Aynı Chroma istemcisi ve MiniLM embedding fonksiyonuyla ek bir koleksiyon (ör. yanıt önbelleği).
+    Uzaklık kosinüs: benzerlik = 1 - distance. http arka ucunda veya Chroma yoksa None.
+    """
+    if _remote() is not None or not _chroma_ready():
+        return None
+    return _client.get_or_create_collection(name=name, embedding_function=_ef, metadata={"hnsw:space": "cosine"})
 
 def _flat_list(maybe_list):
     if not maybe_list:
@@ -49,46 +125,315 @@ def _mk_where(user_id: str | None = None, session_id: str | None = None, role: s
         return clauses[0]
     return {"$and": clauses}
 
+# ---------------------- Write-behind tampon ----------------------
+#   MEMORY_WRITE_BEHIND       → "0" ise her ekleme anında _col.add (eski davranış)
+#   MEMORY_FLUSH_INTERVAL_S   → arka plan flush aralığı (varsayılan: 1.0)
+#   MEMORY_FLUSH_MAX          → bu kadar kayıt birikince hemen flush (varsayılan: 64)
+#   MEMORY_BUFFER_MAX         → tamponda bekleyebilecek azami kayıt; arka uç yazamazken (ör. Chroma
+#                               kesintisi) aşan en eski kayıtlar düşürülür (varsayılan: 10000)
+
+MEMORY_DROPPED = counter("greenmcp_memory_dropped_total", "Tampon dolduğu için yazılmadan düşürülen hafıza kayıtları")
+
+def _chroma_sink(documents: list[str], metadatas: list[dict], ids: list[str]) -> None:
+    _col.add(documents=documents, metadatas=metadatas, ids=ids)
+
+
+class _WriteBuffer:
+    """
+    Eklemeleri istekler arası biriktirir; arka plan thread'i bunları tek bir
+    sink çağrısında yazar (yerelde tek _col.add: tek embedding batch'i, tek SQLite commit;
+    http arka ucunda tek POST).
+    """
+    def __init__(self, interval: float, max_items: int, sink=_chroma_sink, capacity: int = 10000):
+        self.interval = interval
+        self.max_items = max_items
+        self.capacity = max(max_items, capacity)
+        self.sink = sink
+        self._items: list[tuple[str, dict, str]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, doc: str, meta: dict, doc_id: str | None = None) -> None:
+        with self._lock:
+            self._items.append((doc, meta, doc_id or str(uuid.uuid4())))
+            self._trim()
+            full = len(self._items) >= self.max_items
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def _trim(self) -> None:
+        # self._lock tutulurken çağrılır; kapasiteyi aşan en eski kayıtlar düşürülür
+        over = len(self._items) - self.capacity
+        if over > 0:
+            del self._items[:over]
+            MEMORY_DROPPED.inc(over)
+            event(_log, WARNING, "memory_buffer_dropped", count=over, capacity=self.capacity)
+
+    def pending(self, where: dict) -> list[tuple[str, dict]]:
+        """Henüz yazılmamış, metadata filtresine uyan kayıtlar (okuma tutarlılığı için)."""
+        with self._lock:
+            items = list(self._items)
+        return [(d, m) for d, m, _ in items if all(m.get(k) == v for k, v in where.items())]
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._items = self._items, []
+            if not batch:
+                return 0
+            try:
+                with stage("memory_flush"):
+                    self.sink(
+                        [d for d, _, _ in batch],
+                        [m for _, m, _ in batch],
+                        [i for _, _, i in batch],
+                    )
+            except Exception as e:
+                # yazılamayanlar bir sonraki flush'ta tekrar denenir (kapasite sınırı içinde)
+                with self._lock:
+                    self._items = batch + self._items
+                    self._trim()
+                TASK_ERRORS.inc(target="memory", kind="flush")
+                event(_log, WARNING, "memory_flush_failed", count=len(batch), error=repr(e))
+                return 0
+            event(_log, DEBUG, "memory_flush", count=len(batch))
+            # kayıtlar artık aramada görünür; tampondayken önbelleğe alınmış arama sonuçları düşsün
+            for user_id, sid in dict.fromkeys((m.get("user_id"), m.get("session_id")) for _, m, _ in batch):
+                if user_id:
+                    _notify(user_id, "flushed", None, sid)
+            return len(batch)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2 + 5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None and not self._stop.is_set():
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="memory-flush", daemon=True)
+                    self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+
+_BUFFER: _WriteBuffer | None = None
+_BUFFER_LOCK = threading.Lock()
+
+
+def _buffer() -> _WriteBuffer | None:
+    global _BUFFER
+    if _BUFFER is None and os.getenv("MEMORY_WRITE_BEHIND", "1") == "1":
+        with _BUFFER_LOCK:
+            if _BUFFER is None:
+                remote = _remote()
+                _BUFFER = _WriteBuffer(
+                    interval=float(os.getenv("MEMORY_FLUSH_INTERVAL_S", "1.0")),
+                    max_items=int(os.getenv("MEMORY_FLUSH_MAX", "64")),
+                    sink=remote.add_batch if remote is not None else _chroma_sink,
+                    capacity=int(os.getenv("MEMORY_BUFFER_MAX", "10000")),
+                )
+                atexit.register(_BUFFER.close)
+    return _BUFFER
+
+
+# ---------------------- Yazım dinleyicileri ----------------------
+# Önbellekler (ör. enrichment) yeni yazımlarda kendini artımlı güncelleyebilsin diye.
+# fn(user_id, role, content, session_id) — role="clear" ise ilgili kayıtlar silinmiştir;
+# role="flushed" ise kullanıcının o oturumdaki tampon kayıtları arka uca yazılmıştır (content=None).
+# Diğer roller için write_is_deferred(): kayıt tamponda mı (aramada ancak "flushed" ile görünür)?
+
+_WRITE_LISTENERS: list = []
+
+
+def add_write_listener(fn) -> None:
+    if fn not in _WRITE_LISTENERS:
+        _WRITE_LISTENERS.append(fn)
+
+
+def _notify(user_id: str, role: str, content: str | None, session_id: str | None) -> None:
+    for fn in _WRITE_LISTENERS:
+        try:
+            fn(user_id, role, content, session_id)
+        except Exception as e:
+            event(_log, WARNING, "write_listener_failed", error=repr(e))
+
+
+# Sorgu embedding'leri için küçük LRU (ör. /ask/batch'te tekrarlayan girdiler, özet/konu sorguları)
+_EMBED_CACHE: "OrderedDict[str, list]" = OrderedDict()
+_EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+_EMBED_LOCK = threading.Lock()
+
+
+def _embed_cache_put(text: str, vec: list) -> None:
+    with _EMBED_LOCK:
+        _EMBED_CACHE[text] = vec
+        _EMBED_CACHE.move_to_end(text)
+        while len(_EMBED_CACHE) > _EMBED_CACHE_SIZE:
+            _EMBED_CACHE.popitem(last=False)
+
+
+@profiled("memory.embed_query")
+def embed_query(text: str):
+    """Sorgu metnini bir kez embed eder; aynı metinle birden çok search_memory çağrısında kullanılır."""
+    if not text or _remote() is not None or not _chroma_ready():
+        return None  # http arka ucunda sorgu servis tarafında embed edilir
+    with _EMBED_LOCK:
+        hit = _EMBED_CACHE.get(text)
+        if hit is not None:
+            _EMBED_CACHE.move_to_end(text)
+            return hit
+    try:
+        vec = list(_ef([text])[0])
+    except Exception:
+        return None
+    _embed_cache_put(text, vec)
+    return vec
+
+
+def embed_queries(texts: list[str]) -> int:
+    """Önbellekte olmayan metinleri tek model çağrısında embed eder (toplu istekler için ön ısıtma)."""
+    if not texts or _remote() is not None or not _chroma_ready():
+        return 0
+    with _EMBED_LOCK:
+        missing = list(dict.fromkeys(t for t in texts if t and t not in _EMBED_CACHE))
+    if not missing:
+        return 0
+    try:
+        vecs = _ef(missing)
+    except Exception as e:
+        event(_log, WARNING, "embed_batch_failed", count=len(missing), error=repr(e))
+        return 0
+    for t, v in zip(missing, vecs):
+        _embed_cache_put(t, list(v))
+    return len(missing)
+
+
+def writes_are_cheap() -> bool:
+    """
+    add_*_to_memory çağrısı event loop'ta doğrudan yapılabilir mi? Tampon (write-behind) veya
+    bellek içi yedek varsa evet; MEMORY_WRITE_BEHIND=0 ile eşzamanlı Chroma/servis yazımı ise havuza gider.
+    """
+    if _remote() is None:
+        if _CHROMA_OK is None:
+            return False      # Chroma henüz yüklenmedi; ilk yazım yüklemeyi havuzda yapar
+        if not _CHROMA_OK:
+            return True
+    return _buffer() is not None
+
+
+def flush_memory() -> int:
+    """Tampondaki kayıtları hemen yazar; yazılan kayıt sayısını döndürür."""
+    return _BUFFER.flush() if _BUFFER is not None else 0
+
+
+def shutdown_memory() -> None:
+    """Kapanışta çağrılır: flush thread'ini durdurur ve kalan kayıtları yazar."""
+    if _BUFFER is not None:
+        _BUFFER.close()
+    if _REMOTE is not None:
+        _REMOTE.close()
+
+
+def _store(doc: str, meta: dict, doc_id: str | None = None) -> None:
+    """Tek kaydı etkin arka uca yazar (tampon → Chroma / servis; yoksa bellek içi yedek)."""
+    remote = _remote()
+    if remote is None and not _chroma_ready():
+        tag = f"__SID__:{meta.get('session_id')}__ROLE__:{meta.get('role')}__"
+        _FALLBACK_STORE[meta.get("user_id")].append(tag + doc)
+        return
+    buf = _buffer()
+    if buf is not None:
+        buf.add(doc, meta, doc_id)
+    elif remote is not None:
+        remote.add_batch([doc], [meta], [doc_id or str(uuid.uuid4())])
+    else:
+        _col.add(documents=[doc], metadatas=[meta], ids=[doc_id or str(uuid.uuid4())])
+
+
+def store_documents(documents: list[str], metadatas: list[dict], ids: list[str] | None = None) -> int:
+    """
+    Hafıza servisinin toplu yazım ucu için: hazır (doküman, metadata) kayıtlarını yazar.
+    İstemci zaten kendi tamponunda biriktirip gönderdiği için yerel tampona girmez; istek
+    döndüğünde kayıtlar aramada görünür ve Chroma'ya tek add ile yazılır.
+    """
+    ids = ids or [None] * len(documents)
+    rows = [(doc, meta or {}, doc_id or str(uuid.uuid4()))
+            for doc, meta, doc_id in zip(documents, metadatas, ids) if doc]
+    if not rows:
+        return 0
+    if _remote() is not None or not _chroma_ready():
+        for doc, meta, doc_id in rows:
+            _store(doc, meta, doc_id)
+        return len(rows)
+    with stage("memory_flush"):
+        _col.add(documents=[r[0] for r in rows], metadatas=[r[1] for r in rows], ids=[r[2] for r in rows])
+    return len(rows)
+
+
+def _pending_docs(user_id: str, session_id: str | None = None, role: str | None = None) -> list[tuple[str, dict]]:
+    if _BUFFER is None:
+        return []
+    where = {"user_id": user_id}
+    if session_id is not None:
+        where["session_id"] = session_id
+    if role is not None:
+        where["role"] = role
+    return _BUFFER.pending(where)
+
+
+@profiled("memory.add_message_to_memory")
 def add_message_to_memory(user_id: str, role: str, content: str, session_id: str | None = None):
     if not content:
         return
     sid = session_id or "global"
-    if _CHROMA_OK:
-        _col.add(
-            documents=[content],
-            metadatas=[{"user_id": user_id, "role": role, "session_id": sid}],
-            ids=[str(uuid.uuid4())]
-        )
-    else:
-        tag = f"__SID__:{sid}__ROLE__:{role}__"
-        _FALLBACK_STORE[user_id].append(tag + content)
+    _store(content, {"user_id": user_id, "role": role, "session_id": sid})
+    _notify(user_id, role, content, sid)
 
+@profiled("memory.add_pair_to_memory")
 def add_pair_to_memory(user_id: str, user_text: str, assistant_text: str, session_id: str | None = None):
     if not user_text and not assistant_text:
         return
     sid = session_id or "global"
     doc = f"[Soru]\n{user_text}\n\n[Yanıt]\n{assistant_text}"
-    if _CHROMA_OK:
-        _col.add(
-            documents=[doc],
-            metadatas=[{"user_id": user_id, "role": "pair", "session_id": sid}],
-            ids=[str(uuid.uuid4())]
-        )
-    else:
-        tag = f"__SID__:{sid}__ROLE__:pair__"
-        _FALLBACK_STORE[user_id].append(tag + doc)
+    _store(doc, {"user_id": user_id, "role": "pair", "session_id": sid})
+    _notify(user_id, "pair", doc, sid)
 
-def search_memory(user_id: str, query: str, top_k: int = 3, session_id: str | None = None):
+@profiled("memory.search_memory")
+def search_memory(user_id: str, query: str, top_k: int = 3, session_id: str | None = None,
+                  query_embedding=None):
     if not query:
         return []
 
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
+        try:
+            return remote.search(user_id, query, top_k, session_id)
+        except Exception as e:
+            event(_log, WARNING, "memory_remote_failed", op="search", error=repr(e))
+            return []
+
+    if _chroma_ready():
         where = _mk_where(user_id=user_id, session_id=session_id)
-        res = _col.query(
-            query_texts=[query],
-            n_results=top_k,
-            where=where
-        )
+        if query_embedding is not None:
+            res = _col.query(query_embeddings=[query_embedding], n_results=top_k, where=where)
+        else:
+            res = _col.query(
+                query_texts=[query],
+                n_results=top_k,
+                where=where
+            )
         docs = res.get("documents", [[]])[0]
         return _flat_list(docs)
     else:
@@ -99,32 +444,46 @@ def search_memory(user_id: str, query: str, top_k: int = 3, session_id: str | No
         texts = [x.split("__", 2)[-1] if x.startswith("__SID__") else x for x in pool]
         return get_close_matches(query, texts, n=top_k, cutoff=0.3)
 
+@profiled("memory.get_full_memory")
 def get_full_memory(user_id: str) -> list[str]:
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
+        try:
+            return remote.full(user_id) + [d for d, _ in _pending_docs(user_id)]
+        except Exception as e:
+            event(_log, WARNING, "memory_remote_failed", op="full", error=repr(e))
+            return []
+    if _chroma_ready():
         try:
             res = _col.get(where=_mk_where(user_id=user_id))
             docs = res.get("documents") or []
-            return _flat_list(docs)
+            return _flat_list(docs) + [d for d, _ in _pending_docs(user_id)]
         except Exception:
             return []
     else:
         items = _FALLBACK_STORE.get(user_id, [])
         return [x.split("__", 2)[-1] if x.startswith("__SID__") else x for x in items]
 
+@profiled("memory.add_summary")
 def add_summary(user_id: str, text: str, session_id: str | None = None):
     if not text:
         return
-    sid = session_id or "global"
-    if _CHROMA_OK:
-        add_message_to_memory(user_id, "summary", text, session_id=sid)
-    else:
-        tag = f"__SID__:{sid}__ROLE__:summary__"
-        _FALLBACK_STORE[user_id].append(tag + text)
+    add_message_to_memory(user_id, "summary", text, session_id=session_id or "global")
 
+@profiled("memory.get_recent_pairs")
 def get_recent_pairs(user_id: str, k: int = 3) -> list[str]:
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
         try:
-            res = _col.get(where=_mk_where(user_id=user_id))
+            pairs = remote.recent_pairs(user_id, k) + [d for d, _ in _pending_docs(user_id, role="pair")]
+            return pairs[-k:]
+        except Exception as e:
+            event(_log, WARNING, "memory_remote_failed", op="pairs", error=repr(e))
+            return []
+    if _chroma_ready():
+        try:
+            # yalnızca pair kayıtları çekilir (tüm kullanıcı koleksiyonu yerine)
+            res = _col.get(where=_mk_where(user_id=user_id, role="pair"))
             docs = res.get("documents") or []
             metas = res.get("metadatas") or []
             pairs = []
@@ -132,6 +491,7 @@ def get_recent_pairs(user_id: str, k: int = 3) -> list[str]:
                 role = (m or {}).get("role")
                 if role == "pair":
                     pairs.append(d if isinstance(d, str) else (d[0] if d else ""))
+            pairs.extend(d for d, _ in _pending_docs(user_id, role="pair"))
             return [p for p in pairs if p][-k:]
         except Exception:
             return []
@@ -141,10 +501,21 @@ def get_recent_pairs(user_id: str, k: int = 3) -> list[str]:
         pairs = [p.split("__", 2)[-1] if p.startswith("__SID__") else p for p in pairs]
         return pairs[-k:]
 
+@profiled("memory.get_recent_summary")
 def get_recent_summary(user_id: str, session_id: str | None = None) -> str | None:
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
+        pending = _pending_docs(user_id, session_id=session_id, role="summary")
+        if pending:
+            return pending[-1][0]
         try:
-            res = _col.get(where=_mk_where(user_id=user_id, session_id=session_id))
+            return remote.recent_summary(user_id, session_id)
+        except Exception as e:
+            event(_log, WARNING, "memory_remote_failed", op="summary", error=repr(e))
+            return None
+    if _chroma_ready():
+        try:
+            res = _col.get(where=_mk_where(user_id=user_id, session_id=session_id, role="summary"))
             docs = res.get("documents") or []
             metas = res.get("metadatas") or []
             sums = []
@@ -152,6 +523,7 @@ def get_recent_summary(user_id: str, session_id: str | None = None) -> str | Non
                 role = (m or {}).get("role")
                 if role == "summary":
                     sums.append(d if isinstance(d, str) else (d[0] if d else ""))
+            sums.extend(d for d, _ in _pending_docs(user_id, session_id=session_id, role="summary"))
             return sums[-1] if sums else None
         except Exception:
             return None
@@ -163,7 +535,12 @@ def get_recent_summary(user_id: str, session_id: str | None = None) -> str | Non
         return sums[-1].split("__", 2)[-1] if sums else None
 
 def clear_session_memory(user_id: str, session_id: str):
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
+        flush_memory()
+        remote.clear_session(user_id, session_id)
+    elif _chroma_ready():
+        flush_memory()  # tamponda bekleyenler de silinsin
         try:
             res = _col.get(where=_mk_where(user_id=user_id, session_id=session_id))
             ids = res.get("ids") or []
@@ -175,9 +552,15 @@ def clear_session_memory(user_id: str, session_id: str):
     else:
         items = _FALLBACK_STORE.get(user_id, [])
         _FALLBACK_STORE[user_id] = [x for x in items if not x.startswith(f"__SID__:{session_id}")]
+    _notify(user_id, "clear", None, session_id)
 
 def clear_user_memory(user_id: str):
-    if _CHROMA_OK:
+    remote = _remote()
+    if remote is not None:
+        flush_memory()
+        remote.clear_user(user_id)
+    elif _chroma_ready():
+        flush_memory()
         try:
             res = _col.get(where=_mk_where(user_id=user_id))
             ids = res.get("ids") or []
@@ -188,3 +571,4 @@ def clear_user_memory(user_id: str):
             pass
     else:
         _FALLBACK_STORE[user_id].clear()
+    _notify(user_id, "clear", None, None)
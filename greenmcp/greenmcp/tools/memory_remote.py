@@ -0,0 +1,53 @@
+import httpx
+
+# Paylaşılan hafıza servisi (mcp_server/memory_service.py) için HTTP istemcisi.
+# Çok işçili / çok düğümlü kurulumda her işçi yerel Chroma yerine bu servise yazar ve okur;
+# Chroma'nın SQLite dosyasına yalnızca servis süreci erişir.
+
+
+class RemoteMemory:
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+
+    def _get(self, path: str, **params):
+        r = self._client.get(path, params={k: v for k, v in params.items() if v is not None})
+        r.raise_for_status()
+        return r.json()
+
+    def _post(self, path: str, body: dict):
+        r = self._client.post(path, json=body)
+        r.raise_for_status()
+        return r.json()
+
+    # ——— yazım ———
+    def add_batch(self, documents: list[str], metadatas: list[dict], ids: list[str]) -> None:
+        self._post("/memory/add_batch", {"documents": documents, "metadatas": metadatas, "ids": ids})
+
+    def clear_session(self, user_id: str, session_id: str) -> None:
+        self._post("/memory/clear", {"user_id": user_id, "session_id": session_id})
+
+    def clear_user(self, user_id: str) -> None:
+        self._post("/memory/clear", {"user_id": user_id})
+
+    # ——— okuma ———
+    def search(self, user_id: str, query: str, top_k: int, session_id: str | None) -> list[str]:
+        return self._post("/memory/search", {
+            "user_id": user_id, "query": query, "top_k": top_k, "session_id": session_id,
+        }).get("documents", [])
+
+    def full(self, user_id: str) -> list[str]:
+        return self._get("/memory/full", user_id=user_id).get("documents", [])
+
+    def recent_pairs(self, user_id: str, k: int) -> list[str]:
+        return self._get("/memory/pairs", user_id=user_id, k=k).get("documents", [])
+
+    def recent_summary(self, user_id: str, session_id: str | None) -> str | None:
+        return self._get("/memory/summary", user_id=user_id, session_id=session_id).get("summary")
+
+    def close(self) -> None:
+        self._client.close()
@@ -1,3 +1,7 @@
+import time
+
+from .telemetry import collect, summarize
+from .profiling import profiled
 
 
 def _ensure_text_meta(res, agent_obj):
@@ -28,20 +32,48 @@ def _ensure_text_meta(res, agent_obj):
     return text, meta
 
 
-def run_agent_safe(agent_obj, user_text, history=None):
+def _error_text_meta(e: Exception, agent_obj):
+    text = f"[HATA] Ajan çalıştırma hatası: {e}"
+    meta = {
+        "agent": getattr(agent_obj, "name", lambda: None)() if hasattr(agent_obj, "name") else None,
+        "model": getattr(agent_obj, "model", None),
+        "backend": getattr(agent_obj, "backend", None),
+        "error": True,
+        "exception": repr(e),
+    }
+    return text, meta
+
+
+def _attach_generation(meta: dict, calls: list, wall_s: float) -> dict:
+    """
+    meta['generation']: model çağrılarının token/süre özeti.
+    meta['timing']: duvar süresi, model süresi ve aradaki (kendi kodumuz) fark.
+    """
+    gen = summarize(calls)
+    model_s = gen.get("total_s") or 0.0
+    meta["generation"] = gen
+    meta["timing"] = {
+        "wall_s": round(wall_s, 4),
+        "model_s": model_s,
+        "overhead_s": round(max(0.0, wall_s - model_s), 4),
+    }
+    return meta
+
+
+@profiled("run_agent_safe")
+def run_agent_safe(agent_obj, user_text, history=None, agent_name=None):
     """
     Ajanı güvenli çalıştır: çökmeden (text, meta) döndür.
+    agent_name verilirse telemetri bu etiketle toplanır ve meta['agent'] olarak yazılır.
     """
-    try:
-        raw = agent_obj.run(user_text, history=history or [])
-        return _ensure_text_meta(raw, agent_obj)
-    except Exception as e:
-        text = f"[HATA] Ajan çalıştırma hatası: {e}"
-        meta = {
-            "agent": getattr(agent_obj, "name", lambda: None)() if hasattr(agent_obj, "name") else None,
-            "model": getattr(agent_obj, "model", None),
-            "backend": getattr(agent_obj, "backend", None),
-            "error": True,
-            "exception": repr(e),
-        }
-        return text, meta
+    t0 = time.perf_counter()
+    with collect(agent_name) as calls:
+        try:
+            raw = agent_obj.run(user_text, history=history or [])
+            text, meta = _ensure_text_meta(raw, agent_obj)
+        except Exception as e:
+            text, meta = _error_text_meta(e, agent_obj)
+    if agent_name and not meta.get("agent"):
+        meta["agent"] = agent_name
+    return text, _attach_generation(meta, calls, time.perf_counter() - t0)
+
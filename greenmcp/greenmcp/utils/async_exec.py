@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Bloklayan işler için sınırlı thread havuzları:
+#   "llm"      → ajan / tool çalıştırma (uzun süren model ve HTTP çağrıları)
+#   "dispatch" → dispatcher kararı; ajanlar "llm" havuzunu doldursa da yeni istekler yönlendirilebilsin
+#   "memory"   → Chroma okuma/yazma (kısa, sık)
+#   "warmup"   → açılışta model ısıtma (istek havuzlarını meşgul etmesin)
+# pool ayarı olan ajan/tool'lar kendi havuzlarında çalışır (mcp_server/target_pools.py).
+_POOL_SIZES = {
+    "llm": int(os.getenv("MCP_LLM_WORKERS", "8")),
+    "dispatch": int(os.getenv("MCP_DISPATCH_WORKERS", "4")),
+    "memory": int(os.getenv("MCP_MEMORY_WORKERS", "4")),
+    "warmup": int(os.getenv("MCP_WARMUP_WORKERS", "4")),
+}
+
+_POOLS: dict[str, ThreadPoolExecutor] = {}
+_LOCK = threading.Lock()
+
+
+def get_pool(kind: str) -> ThreadPoolExecutor:
+    pool = _POOLS.get(kind)
+    if pool is None:
+        with _LOCK:
+            pool = _POOLS.get(kind)
+            if pool is None:
+                size = _POOL_SIZES.get(kind) or 4
+                pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"mcp-{kind}")
+                _POOLS[kind] = pool
+    return pool
+
+
+def submit(pool: ThreadPoolExecutor, fn, *args, **kwargs) -> asyncio.Future:
+    """fn'i verilen havuza gönderir (contextvars kopyalanır); beklenebilir future döner."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return loop.run_in_executor(pool, call)
+
+
+async def offload(kind: str, fn, *args, **kwargs):
+    """
+    fn'i ilgili havuzda çalıştırır; event loop bloklanmaz.
+    contextvars kopyalanır (telemetri/log kapsamları thread'e taşınır).
+    """
+    return await submit(get_pool(kind), fn, *args, **kwargs)
+
+
+# Kapanışta beklenmeyen havuzlar: dakikalar sürebilen model yüklemesi kapanışı bekletmesin
+_NO_WAIT = {"warmup"}
+
+
+def shutdown_pools(wait: bool = True) -> None:
+    with _LOCK:
+        pools = list(_POOLS.items())
+        _POOLS.clear()
+    for kind, p in pools:
+        if kind in _NO_WAIT:
+            p.shutdown(wait=False, cancel_futures=True)
+        else:
+            p.shutdown(wait=wait)
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Ortam değişkenleri:
+#   GREENMCP_LOG_LEVEL        → DEBUG | INFO | WARNING | ERROR   (varsayılan: INFO)
+#   GREENMCP_LOG_JSON         → "1" ise her kayıt tek satır JSON
+#   GREENMCP_LOG_SAMPLE       → DEBUG kayıtları için örnekleme oranı (0.0–1.0, varsayılan: 1.0)
+#   GREENMCP_LOG_MAX_FIELD    → metin formatında alan başına azami karakter (varsayılan: 300)
+
+_ROOT_NAME = "greenmcp"
+_configured = False
+
+
+def _max_field() -> int:
+    try:
+        return int(os.getenv("GREENMCP_LOG_MAX_FIELD", "300"))
+    except ValueError:
+        return 300
+
+
+class _SampleFilter(logging.Filter):
+    """DEBUG kayıtlarını (veya event(..., sample=x) ile işaretlenenleri) oranla geçirir."""
+    def __init__(self, default_rate: float):
+        super().__init__()
+        self.default_rate = default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample", None)
+        if rate is None:
+            rate = self.default_rate if record.levelno <= logging.DEBUG else 1.0
+        return rate >= 1.0 or random.random() < rate
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for k, v in (getattr(record, "fields", None) or {}).items():
+            out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        limit = _max_field()
+        ts = time.strftime("%H:%M:%S", time.localtime(record.created))
+        parts = [f"{ts} {record.levelname:<7} {record.name} {record.getMessage()}"]
+        for k, v in (getattr(record, "fields", None) or {}).items():
+            s = v if isinstance(v, str) else repr(v)
+            if len(s) > limit:
+                s = s[:limit] + "…"
+            parts.append(f"{k}={s}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _configure() -> None:
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    root = logging.getLogger(_ROOT_NAME)
+    level = getattr(logging, os.getenv("GREENMCP_LOG_LEVEL", "INFO").upper(), logging.INFO)
+    root.setLevel(level)
+    root.propagate = False
+
+    try:
+        rate = float(os.getenv("GREENMCP_LOG_SAMPLE", "1.0"))
+    except ValueError:
+        rate = 1.0
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_JsonFormatter() if os.getenv("GREENMCP_LOG_JSON", "0") == "1" else _TextFormatter())
+    handler.addFilter(_SampleFilter(rate))
+    root.addHandler(handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """'greenmcp.<name>' altında yapılandırılmış logger döndürür."""
+    _configure()
+    if not name.startswith(_ROOT_NAME):
+        name = f"{_ROOT_NAME}.{name}"
+    return logging.getLogger(name)
+
+
+def event(logger: logging.Logger, level: int, name: str, sample: float | None = None, **fields) -> None:
+    """
+    Yapılandırılmış olay kaydı. Seviye kapalıysa hiçbir biçimlendirme yapılmaz;
+    alanlar (ör. tensor, hafıza listesi) yalnızca kayıt yazılacaksa string'e çevrilir.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    extra = {"fields": fields}
+    if sample is not None:
+        extra["sample"] = sample
+    logger.log(level, name, extra=extra, stacklevel=2)
+
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
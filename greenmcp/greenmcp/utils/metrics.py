@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+from .profiling import span
+
+# Prometheus metin formatında (exposition format 0.0.4) küçük, bağımlılıksız metrik kaydı.
+# prometheus_client kurulu olmasa da /metrics çalışsın diye elle yazıldı.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels) -> None:
+        """Etiket serisini siler (ör. kaldırılan hedefin değeri /metrics'te kalmasın)."""
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *a, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kw):
+        super().__init__(*a, **kw)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, list] = {}  # [bucket_counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            row = self._values.get(k)
+            if row is None:
+                row = self._values[k] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for k, row in items:
+            for i, b in enumerate(self.buckets):
+                le = 'le="%s"' % b
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, le)} {row[i]}")
+            inf = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, inf)} {row[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, k)} {row[-2]}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, k)} {row[-1]}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, labels))
+
+
+def gauge(name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, labels, buckets=buckets))
+
+
+# ---------------------- Ortak GreenMCP metrikleri ----------------------
+
+STAGE_SECONDS = histogram(
+    "greenmcp_stage_seconds",
+    "MCPServer.run aşama süreleri (split, route, enrich, agent, tool, memory_write, memory_flush, summary)",
+    ("stage", "target", "model"),
+)
+TASK_ERRORS = counter(
+    "greenmcp_task_errors_total", "Ajan/tool görev hataları", ("target", "kind"),
+)
+HTTP_REQUESTS = counter(
+    "greenmcp_http_requests_total", "HTTP istekleri (yol, yöntem, durum kodu)", ("path", "method", "status"),
+)
+HTTP_SECONDS = histogram(
+    "greenmcp_http_request_seconds", "HTTP istek süresi", ("path", "method"),
+)
+HTTP_IN_FLIGHT = gauge(
+    "greenmcp_http_in_flight", "İşlenmekte olan HTTP istekleri",
+)
+GEN_TOKENS = counter(
+    "greenmcp_generation_tokens_total", "Model token sayıları (prompt/gen)", ("model", "agent", "kind"),
+)
+GEN_SECONDS = histogram(
+    "greenmcp_generation_seconds", "Model çağrı süresi (toplam)", ("model", "agent"),
+)
+SPEC_TOKENS = counter(
+    "greenmcp_spec_tokens_total",
+    "Spekülatif üretim sayaçları (generated/accepted/drafted token, target_steps)", ("model", "draft", "kind"),
+)
+
+
+@contextmanager
+def stage(name: str, target: str = "", model: str = ""):
+    """with stage("enrich"): ... — aşama süresini STAGE_SECONDS'a ve (profil açıksa) waterfall'a yazar."""
+    with span(name, target=target, model=model), STAGE_SECONDS.time(stage=name, target=target or "", model=model or ""):
+        yield
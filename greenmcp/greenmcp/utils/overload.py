@@ -0,0 +1,176 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from .log import get_logger, event, WARNING, INFO
+from .metrics import gauge
+
+_log = get_logger("overload")
+
+# Yük altında isteğe bağlı işleri bırakma (degradation) seviyeleri.
+# Ortam değişkenleri:
+#   DEGRADE_ENABLED           → "0" ise hiç devreye girmez (varsayılan: 1)
+#   DEGRADE_INFLIGHT_L1 / _L2 → eşzamanlı MCPServer.run sayısı eşikleri (varsayılan: 16 / 32)
+#   DEGRADE_LATENCY_L1_RATIO / _L2_RATIO → istek süresi EWMA'sının taban süreye oranı eşikleri
+#                               (varsayılan: 2.5 / 5)
+#   DEGRADE_LATENCY_DECAY_S   → istek gelmezken EWMA'nın tabana dönme yarı ömrü, sn (varsayılan: 30)
+#   DEGRADE_COOLDOWN_S        → seviye düşürmeden önce beklenen sakin süre (varsayılan: 10)
+#
+# Mutlak süre eşiği kullanılmaz: CPU'da tek bir 8B turu yüksüz sunucuda da saniyeler sürer. Taban süre,
+# tek başına çalışan (başka istekle çakışmayan) isteklerin yavaş EWMA'sıdır; gecikme sinyali yalnızca
+# bu taban ölçüldükten sonra ve ona göre göreli devreye girer.
+#   DEGRADE_MAX_TOKENS_FACTOR → seviye 2'de üretim token sınırı çarpanı (varsayılan: 0.5)
+#
+# Seviye 1: özet yok, İngilizce→Türkçe yeniden yazım yok, zenginleştirmede tek hafıza araması
+# Seviye 2: + dispatcher LLM yerine regex cümle bölme, + düşük max_tokens,
+#           + kademeli modelde (agents/cascade.py) büyük modele yükseltme yok
+
+NORMAL, LIGHT, HEAVY = 0, 1, 2
+
+_FEATURE_LEVEL: Dict[str, int] = {
+    "summary": LIGHT,
+    "rewrite": LIGHT,
+    "enrich": LIGHT,
+    "llm_split": HEAVY,
+    "max_tokens": HEAVY,
+    "cascade_escalate": HEAVY,
+}
+
+_LEVEL: contextvars.ContextVar[int] = contextvars.ContextVar("greenmcp_degrade_level", default=NORMAL)
+
+DEGRADE_LEVEL = gauge("greenmcp_degrade_level", "Aktif yük azaltma seviyesi (0=normal, 1=hafif, 2=ağır)")
+
+
+def current_level() -> int:
+    return _LEVEL.get()
+
+
+def degraded(feature: str) -> bool:
+    """Bu istekte `feature` bırakılmalı mı? (seviye istek başında sabitlenir, thread'lere taşınır)"""
+    return _LEVEL.get() >= _FEATURE_LEVEL.get(feature, HEAVY + 1)
+
+
+def scale_max_tokens(n: int) -> int:
+    if not degraded("max_tokens"):
+        return n
+    factor = float(os.getenv("DEGRADE_MAX_TOKENS_FACTOR", "0.5"))
+    return max(1, int(n * factor))
+
+
+def skipped_features(level: int) -> List[str]:
+    return [f for f, lv in _FEATURE_LEVEL.items() if level >= lv]
+
+
+class OverloadController:
+    """
+    Canlı ölçümlerden (eşzamanlı istek sayısı, istek süresi EWMA'sının taban süreye oranı) seviye belirler.
+    Yükselme anında, düşme ise DEGRADE_COOLDOWN_S boyunca düşük hedefte kalındıktan sonra
+    birer adım olur; böylece eşik çevresinde seviye titremez.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("DEGRADE_ENABLED", "1") == "1"
+        self.inflight_th = (int(os.getenv("DEGRADE_INFLIGHT_L1", "16")), int(os.getenv("DEGRADE_INFLIGHT_L2", "32")))
+        self.latency_th = (float(os.getenv("DEGRADE_LATENCY_L1_RATIO", "2.5")),
+                           float(os.getenv("DEGRADE_LATENCY_L2_RATIO", "5")))
+        self.decay_s = float(os.getenv("DEGRADE_LATENCY_DECAY_S", "30"))
+        self.cooldown_s = float(os.getenv("DEGRADE_COOLDOWN_S", "10"))
+        self.alpha = 0.2
+        self.baseline_alpha = 0.05
+        self.baseline_s = 0.0      # 0: henüz ölçülmedi
+        self._observed = time.monotonic()
+        self.level = NORMAL
+        self.inflight = 0
+        self._admitted = 0
+        self.latency_ewma = 0.0
+        self.degraded_requests = 0
+        self._changed = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self, now: float) -> None:
+        # son gözlemden bu yana geçen süreyle EWMA tabana doğru yarılanır (boşta takılı kalmaz)
+        if self.baseline_s and self.latency_ewma > self.baseline_s and self.decay_s > 0:
+            keep = 0.5 ** ((now - self._observed) / self.decay_s)
+            self.latency_ewma = self.baseline_s + (self.latency_ewma - self.baseline_s) * keep
+        self._observed = now
+
+    def latency_ratio(self) -> float:
+        return self.latency_ewma / self.baseline_s if self.baseline_s else 0.0
+
+    def _target(self) -> int:
+        ratio = self.latency_ratio()
+        if self.inflight >= self.inflight_th[1] or ratio >= self.latency_th[1]:
+            return HEAVY
+        if self.inflight >= self.inflight_th[0] or ratio >= self.latency_th[0]:
+            return LIGHT
+        return NORMAL
+
+    def _update(self) -> None:
+        # self._lock tutulurken çağrılır
+        now = time.monotonic()
+        self._decay(now)
+        target = self._target()
+        prev = self.level
+        if target > self.level:
+            self.level = target
+            self._changed = now
+        elif target < self.level and (now - self._changed) >= self.cooldown_s:
+            self.level -= 1
+            self._changed = now
+        if self.level != prev:
+            DEGRADE_LEVEL.set(self.level)
+            event(_log, WARNING if self.level > prev else INFO, "degrade_level",
+                  degrade_level=self.level, previous=prev, inflight=self.inflight,
+                  latency_ewma_s=round(self.latency_ewma, 3), baseline_s=round(self.baseline_s, 3))
+
+    @contextmanager
+    def admit(self):
+        """Bir isteği sayar; bu istek için geçerli seviyeyi contextvar'a yazar ve verir."""
+        if not self.enabled:
+            yield NORMAL
+            return
+        with self._lock:
+            self.inflight += 1
+            self._admitted += 1
+            seq = self._admitted
+            alone = self.inflight == 1
+            self._update()
+            level = self.level
+            if level:
+                self.degraded_requests += 1
+        token = _LEVEL.set(level)
+        t0 = time.perf_counter()
+        try:
+            yield level
+        finally:
+            _LEVEL.reset(token)
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self.inflight -= 1
+                self._decay(time.monotonic())
+                self.latency_ewma = dt if self.latency_ewma == 0.0 else (
+                    self.alpha * dt + (1 - self.alpha) * self.latency_ewma
+                )
+                # çakışmasız istek (başlarken de biterken de tek başına): yüksüz süreyi (taban) günceller
+                if alone and self.inflight == 0 and self._admitted == seq:
+                    self.baseline_s = dt if not self.baseline_s else (
+                        self.baseline_alpha * dt + (1 - self.baseline_alpha) * self.baseline_s
+                    )
+                self._update()
+
+    def status(self) -> dict:
+        with self._lock:
+            self._update()   # boşta geçen süre de hesaba katılsın
+            return {
+                "enabled": self.enabled,
+                "level": self.level,
+                "skipped": skipped_features(self.level),
+                "inflight": self.inflight,
+                "latency_ewma_s": round(self.latency_ewma, 3),
+                "baseline_s": round(self.baseline_s, 3),
+                "latency_ratio": round(self.latency_ratio(), 3),
+                "degraded_requests": self.degraded_requests,
+            }
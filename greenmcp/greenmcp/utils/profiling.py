@@ -0,0 +1,159 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# İstek bazında, isteğe bağlı profil modu.
+# Ortam değişkenleri:
+#   PROFILE_REQUESTS → "off" (varsayılan) | "admin" (X-Admin-Token == ADMIN_TOKEN) | "all"
+#   ADMIN_TOKEN      → "admin" politikasında beklenen başlık değeri
+#   PROFILE_DIR      → .prof dosyalarının yazıldığı klasör (varsayılan: <geçici klasör>/greenmcp-profiles;
+#                      paket klasörü salt okunur olabilir ve profiller kaynak ağacına karışmamalı)
+#
+# Aktif profil contextvar ile taşınır; offload() bağlamı kopyaladığı için havuz thread'lerinde de görünür.
+# span()     → yalnızca süre (waterfall satırı); async aşamalar için
+# profiled() → senkron fonksiyonlar için süre + cProfile (fonksiyon await etmediğinden başka isteklerle karışmaz)
+
+_ACTIVE: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "greenmcp_profile", default=None
+)
+_TLS = threading.local()
+
+_DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "greenmcp-profiles")
+
+
+def admin_token_ok(admin_token: str | None) -> bool:
+    """X-Admin-Token == ADMIN_TOKEN mi? Sabit sürede karşılaştırılır (zamanlama ile tahmin edilemesin)."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or admin_token is None:
+        return False
+    return hmac.compare_digest(admin_token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def profiling_allowed(admin_token: str | None) -> bool:
+    policy = os.getenv("PROFILE_REQUESTS", "off").lower()
+    if policy == "all":
+        return True
+    if policy == "admin":
+        return admin_token_ok(admin_token)
+    return False
+
+
+class RequestProfile:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.t0 = time.perf_counter()
+        self.closed = False
+        self._spans: List[Dict[str, Any]] = []
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float, labels: dict) -> None:
+        if self.closed:
+            return  # ör. yanıt döndükten sonra çalışan arka plan özeti
+        row = {
+            "name": name,
+            "start_ms": round((start - self.t0) * 1000, 2),
+            "dur_ms": round((end - start) * 1000, 2),
+            "thread": threading.current_thread().name,
+        }
+        row.update({k: v for k, v in labels.items() if v})
+        with self._lock:
+            self._spans.append(row)
+
+    def add_profile(self, prof: cProfile.Profile) -> None:
+        if self.closed:
+            return
+        with self._lock:
+            self._profiles.append(prof)
+
+    def waterfall(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self._spans, key=lambda r: r["start_ms"])
+
+    def dump(self, directory: str | None = None) -> str | None:
+        # pstats birleştirme + disk yazımı bloklar → event loop'ta değil offload() ile çağrılır
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        directory = directory or os.getenv("PROFILE_DIR") or _DEFAULT_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.abspath(os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.id}.prof"))
+        stats = pstats.Stats(profiles[0])
+        for p in profiles[1:]:
+            stats.add(p)
+        stats.dump_stats(path)
+        return path
+
+    def report(self) -> Dict[str, Any]:
+        """Profili kapatır ve waterfall'ı döner; .prof dosyası için dump() ayrıca (thread havuzunda) çağrılır."""
+        self.closed = True
+        return {
+            "id": self.id,
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 2),
+            "waterfall": self.waterfall(),
+            "file": None,
+        }
+
+
+@contextmanager
+def profile_request():
+    """Bu blok (ve ondan türeyen task/thread'ler) boyunca span'ler ve cProfile örnekleri toplanır."""
+    prof = RequestProfile()
+    token = _ACTIVE.set(prof)
+    try:
+        yield prof
+    finally:
+        _ACTIVE.reset(token)
+
+
+@contextmanager
+def span(name: str, **labels):
+    prof = _ACTIVE.get()
+    if prof is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        prof.add_span(name, start, time.perf_counter(), labels)
+
+
+def profiled(name: str):
+    """Senkron fonksiyon kancası: profil aktifse süreyi waterfall'a yazar ve cProfile altında çalıştırır."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            prof = _ACTIVE.get()
+            if prof is None:
+                return fn(*args, **kwargs)
+            cp = None
+            if not getattr(_TLS, "on", False):
+                cp = cProfile.Profile()
+                try:
+                    cp.enable()
+                    _TLS.on = True
+                except ValueError:
+                    cp = None  # başka bir profiler zaten aktif
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                if cp is not None:
+                    cp.disable()
+                    _TLS.on = False
+                    prof.add_profile(cp)
+                prof.add_span(name, start, end, {})
+        return wrapper
+    return deco
@@ -0,0 +1,340 @@
+import contextvars
+import hashlib
+import io
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .log import get_logger, event, INFO, WARNING
+
+_log = get_logger("recorder")
+
+# Trafik kaydı (isteğe bağlı; varsayılan kapalı):
+#   RECORD_PATH    → kayıt dosyası; ".zst" ile bitiyorsa zstd sıkıştırılır ('zstandard' paketi gerekir)
+#   RECORD_SAMPLE  → 0..1, kaydedilecek istek oranı (varsayılan: 1)
+#   RECORD_FLUSH_LINES      → bu kadar satırda bir dosyaya flush (varsayılan: 64)
+#   RECORD_FLUSH_INTERVAL_S → en geç bu aralıkta flush, sn (varsayılan: 5)
+#   RECORD_QUEUE_MAX        → yazılmayı bekleyen azami satır; doluysa kayıt düşürülür (varsayılan: 10000)
+#
+# Her satır bir istektir: sorgu, yönlendirme kararı, yanıt, gecikme ve istek boyunca yapılan
+# dış çağrılar (LLM istem/tamamlama, tool HTTP yanıtları). bench/replay.py bu kaydı yeni bir
+# derlemeye karşı, dış çağrıları kayıttan yanıtlayarak yeniden oynatır.
+
+_TRACE: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("greenmcp_trace", default=None)
+
+# replay sırasında True: izleme dışı (ör. arka plan özet) dış çağrılar da ağa çıkmaz
+_OFFLINE = False
+
+
+class ReplayMiss(Exception):
+    """Replay sırasında dış çağrının kayıtta karşılığı yok (veya kayıtta hata ile sonuçlanmış)."""
+
+
+def _key(kind: str, target: str, request: Any) -> str:
+    raw = json.dumps([kind, target, request], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Trace:
+    """
+    Tek isteğin dış çağrı izi. Kayıt modunda çağrılar eklenir; replay modunda kayıttaki
+    çağrılar önce tam anahtarla (aynı istek gövdesi), bulunamazsa aynı hedefe yapılmış
+    sıradaki kayıtla eşleştirilir (bağlam/hafıza farkı istemi değiştirmiş olabilir).
+    """
+
+    def __init__(self, request: dict, replay: Optional[List[dict]] = None, simulate_latency: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.events: List[dict] = []
+        self.route: Optional[list] = None
+        self.result: Optional[dict] = None
+        self.latency_s: Optional[float] = None
+        self.closed = False
+        self.replaying = replay is not None
+        self.simulate_latency = simulate_latency
+        self.hits = {"exact": 0, "fuzzy": 0, "miss": 0}
+        self._lock = threading.Lock()
+        self._recorded = list(replay or [])
+        self._used = [False] * len(self._recorded)
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        self._by_target: Dict[tuple, List[int]] = defaultdict(list)
+        for i, ev in enumerate(self._recorded):
+            self._by_key[ev.get("key")].append(i)
+            self._by_target[(ev.get("kind"), ev.get("target"))].append(i)
+
+    def _take(self, candidates: List[int]) -> Optional[int]:
+        for i in candidates:
+            if not self._used[i]:
+                self._used[i] = True
+                return i
+        return None
+
+    def replay(self, kind: str, target: str, request: Any) -> Any:
+        with self._lock:
+            if self.closed:
+                raise ReplayMiss(f"[HATA] İstek kapandıktan sonra dış çağrı: {kind} {target}")
+            i = self._take(self._by_key.get(_key(kind, target, request), []))
+            if i is not None:
+                self.hits["exact"] += 1
+            else:
+                i = self._take(self._by_target.get((kind, target), []))
+                if i is None:
+                    self.hits["miss"] += 1
+                    raise ReplayMiss(f"[HATA] Kayıtta yanıt yok: {kind} {target}")
+                self.hits["fuzzy"] += 1
+            ev = self._recorded[i]
+        if self.simulate_latency and ev.get("elapsed_s"):
+            time.sleep(ev["elapsed_s"])
+        if "error" in ev:
+            raise ReplayMiss(f"[HATA] Kayıtlı dış çağrı hatası: {ev['error']}")
+        return ev.get("response")
+
+    def note(self, kind: str, target: str, request: Any, elapsed_s: float,
+             response: Any = None, error: Optional[str] = None) -> None:
+        ev = {"kind": kind, "target": target, "key": _key(kind, target, request),
+              "request": request, "elapsed_s": round(elapsed_s, 4)}
+        if error is not None:
+            ev["error"] = error
+        else:
+            ev["response"] = response
+        with self._lock:
+            # istek yanıtlandıktan sonra biten arka plan çağrıları (ör. özet) bu izde yer almaz
+            if not self.closed:
+                self.events.append(ev)
+
+
+def current() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+def upstream(kind: str, target: str, request: Any, call: Callable[[], Any]) -> Any:
+    """
+    Dış çağrı sarmalayıcısı (LLM, tool HTTP).
+      - kayıt: call() çalışır, istek/yanıt/süre aktif izlemeye eklenir
+      - replay: kayıtlı yanıt döner, call() hiç çağrılmaz (karşılık yoksa ReplayMiss)
+      - izleme yoksa: doğrudan call()
+    request/yanıt JSON'a çevrilebilir olmalıdır.
+    """
+    trace = _TRACE.get()
+    if trace is None:
+        if _OFFLINE:
+            raise ReplayMiss(f"[HATA] Replay sırasında izleme dışı dış çağrı: {kind} {target}")
+        return call()
+    if trace.replaying:
+        return trace.replay(kind, target, request)
+    t0 = time.perf_counter()
+    try:
+        response = call()
+    except Exception as e:
+        trace.note(kind, target, request, time.perf_counter() - t0, error=repr(e))
+        raise
+    trace.note(kind, target, request, time.perf_counter() - t0, response=response)
+    return response
+
+
+def note_route(tasks: list) -> None:
+    """Dispatcher kararını (alt görevler) aktif izlemeye yazar."""
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.route = [{"agent": t.get("agent"), "input": t.get("input")} for t in tasks]
+
+
+# ---------------------- Dosya okuma/yazma ----------------------
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("[HATA] .zst kayıtları için 'zstandard' paketi gerekli (pip install zstandard).") from e
+    return zstandard
+
+
+class _Writer:
+    """
+    Satırları kuyruğa alır; serileştirme ve dosya yazımı arka plan thread'indedir (event loop
+    bloklanmaz). Flush N satırda bir veya zaman aralığıyla yapılır: zstd blokları büyük kalır,
+    süreç düşerse en fazla son flush'tan sonraki satırlar kaybolur.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.flush_lines = max(1, int(os.getenv("RECORD_FLUSH_LINES", "64")))
+        self.flush_interval = float(os.getenv("RECORD_FLUSH_INTERVAL_S", "5"))
+        self.dropped = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._raw = open(path, "ab")
+        # her açılış yeni bir zstd çerçevesi başlatır; okuyucu çerçeveleri art arda okur
+        self._fh = _zstd().ZstdCompressor(level=3).stream_writer(self._raw) if path.endswith(".zst") else self._raw
+        self._queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("RECORD_QUEUE_MAX", "10000")))
+        self._thread = threading.Thread(target=self._loop, name="recorder-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, obj: dict) -> bool:
+        """Kaydı kuyruğa ekler; kuyruk doluysa False (kayıt düşürülür)."""
+        try:
+            self._queue.put_nowait(obj)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _loop(self) -> None:
+        unflushed, last_flush = 0, time.monotonic()
+        while True:
+            try:
+                obj = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                obj = None
+            if obj is not None and obj is not _CLOSE:
+                line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+                self._fh.write(line.encode("utf-8"))
+                unflushed += 1
+            now = time.monotonic()
+            if unflushed and (obj is _CLOSE or unflushed >= self.flush_lines
+                              or now - last_flush >= self.flush_interval):
+                self._fh.flush()
+                unflushed, last_flush = 0, now
+            if obj is _CLOSE:
+                return
+
+    def close(self) -> None:
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._fh.close()
+
+
+_CLOSE = object()
+
+
+def read_log(path: str) -> Iterator[dict]:
+    """Kayıt dosyasındaki istekleri sırayla döndürür (.jsonl veya .zst)."""
+    with open(path, "rb") as raw:
+        if path.endswith(".zst"):
+            stream = _zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            stream = raw
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _compact_result(result: dict) -> dict:
+    items = []
+    for r in (result or {}).get("responses", []):
+        item = {"agent": r.get("agent"), "input": r.get("input")}
+        if "output" in r:
+            item["output"] = r["output"]
+        if "error" in r:
+            item["error"] = r["error"]
+        items.append(item)
+    return {"responses": items, "summary": (result or {}).get("summary")}
+
+
+# ---------------------- Kaydedici ----------------------
+
+class Recorder:
+    def __init__(self, path: Optional[str] = None, sample: Optional[float] = None):
+        self.path = path if path is not None else os.getenv("RECORD_PATH", "").strip()
+        self.sample = float(os.getenv("RECORD_SAMPLE", "1")) if sample is None else sample
+        self._writer: Optional[_Writer] = None
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.sample > 0
+
+    def _get_writer(self) -> _Writer:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = _Writer(self.path)
+                    event(_log, INFO, "recorder_open", path=self.path, sample=self.sample)
+        return self._writer
+
+    @contextmanager
+    def request(self, query: dict):
+        """
+        MCPServer.run() çevresinde kullanılır; izlemeyi (veya None) verir, çıkışta kaydı yazar.
+        Replay sırasında dışarıda kurulmuş izleme aynen kullanılır ve dosyaya yazılmaz.
+        """
+        outer = _TRACE.get()
+        if outer is not None and outer.replaying:
+            t0 = time.perf_counter()
+            try:
+                yield outer
+            finally:
+                outer.latency_s = time.perf_counter() - t0
+            return
+        if not self.enabled or (self.sample < 1 and random.random() >= self.sample):
+            yield None
+            return
+        trace = Trace({k: v for k, v in query.items() if k != "profile"})
+        token = _TRACE.set(trace)
+        t0 = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            _TRACE.reset(token)
+            trace.latency_s = time.perf_counter() - t0
+            with trace._lock:
+                trace.closed = True
+            self._write(trace)
+
+    def _write(self, trace: Trace) -> None:
+        try:
+            ok = self._get_writer().write({
+                "id": trace.id,
+                "ts": round(time.time(), 3),
+                "request": trace.request,
+                "route": trace.route,
+                "result": _compact_result(trace.result) if trace.result is not None else None,
+                "latency_s": round(trace.latency_s or 0.0, 4),
+                "events": trace.events,
+            })
+            if ok:
+                self.recorded += 1
+        except Exception as e:
+            event(_log, WARNING, "recorder_write_failed", path=self.path, error=repr(e))
+
+    def status(self) -> dict:
+        writer = self._writer
+        return {"enabled": self.enabled, "path": self.path or None, "sample": self.sample,
+                "recorded": self.recorded, "dropped": writer.dropped if writer is not None else 0}
+
+    def close(self) -> None:
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+
+
+@contextmanager
+def replaying(entry: dict, simulate_latency: bool = False):
+    """Kayıttaki bir isteği yeniden oynatmak için izleme kurar; dış çağrılar kayıttan yanıtlanır."""
+    trace = Trace(entry.get("request") or {}, replay=entry.get("events") or [], simulate_latency=simulate_latency)
+    token = _TRACE.set(trace)
+    try:
+        yield trace
+    finally:
+        _TRACE.reset(token)
+        with trace._lock:
+            trace.closed = True
+
+
+def set_offline(flag: bool) -> None:
+    """True iken izleme dışındaki dış çağrılar ReplayMiss fırlatır (replay aracı ağa çıkmaz)."""
+    global _OFFLINE
+    _OFFLINE = bool(flag)
+
+
+def is_offline() -> bool:
+    return _OFFLINE
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .log import get_logger, event, INFO
+
+_log = get_logger("shared_cache")
+
+# İşçiler/düğümler arası paylaşılan anahtar-değer önbelleği (oturum geçmişi vb.).
+# Ortam değişkenleri:
+#   CACHE_URL       → "redis://host:6379/0" ise Redis (veya uyumlu: Valkey, KeyDB); boşsa süreç içi LocalCache
+#   CACHE_LOCAL_MAX → LocalCache azami anahtar sayısı (LRU; varsayılan: 10000)
+#
+# LocalCache aynı arayüzü sunar; tek süreçte ve testlerde Redis yerine kullanılır.
+# Liste işlemleri (list_*) atomiktir: eşzamanlı eklemeler birbirini ezmez (Redis: RPUSH+LTRIM tek MULTI'de).
+
+
+class LocalCache:
+    shared = False
+
+    def __init__(self, max_keys: int | None = None):
+        self.max_keys = max_keys or int(os.getenv("CACHE_LOCAL_MAX", "10000"))
+        self._data: "OrderedDict[str, tuple[str | list, float | None]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str):
+        # self._lock tutulurken çağrılır
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and time.monotonic() > expires:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value, ttl_s: float | None) -> None:
+        # self._lock tutulurken çağrılır
+        self._data[key] = (value, (time.monotonic() + ttl_s) if ttl_s else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: str, ttl_s: float | None = None) -> None:
+        with self._lock:
+            self._put(key, value, ttl_s)
+
+    def list_get(self, key: str) -> list[str]:
+        with self._lock:
+            return list(self._get(key) or [])
+
+    def list_append(self, key: str, values: list[str], max_len: int, ttl_s: float | None = None) -> None:
+        """Sona ekler, son max_len öğeyi tutar ve TTL'i yeniler."""
+        with self._lock:
+            self._put(key, (list(self._get(key) or []) + list(values))[-max_len:], ttl_s)
+
+    def list_replace(self, key: str, values: list[str], max_len: int, ttl_s: float | None = None) -> None:
+        with self._lock:
+            self._put(key, list(values)[-max_len:], ttl_s)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class RedisCache:
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("[HATA] CACHE_URL için 'redis' paketi gerekli (pip install redis).") from e
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+        self.url = url
+
+    def get(self, key: str) -> Optional[str]:
+        return self._r.get(key)
+
+    def set(self, key: str, value: str, ttl_s: float | None = None) -> None:
+        # ms çözünürlük: 1 sn altı TTL'ler 0'a (süresiz) yuvarlanmasın
+        self._r.set(key, value, px=max(1, int(ttl_s * 1000)) if ttl_s else None)
+
+    def list_get(self, key: str) -> list[str]:
+        return list(self._r.lrange(key, 0, -1))
+
+    def list_append(self, key: str, values: list[str], max_len: int, ttl_s: float | None = None) -> None:
+        pipe = self._r.pipeline(transaction=True)
+        pipe.rpush(key, *values)
+        pipe.ltrim(key, -max_len, -1)
+        if ttl_s:
+            pipe.pexpire(key, max(1, int(ttl_s * 1000)))
+        pipe.execute()
+
+    def list_replace(self, key: str, values: list[str], max_len: int, ttl_s: float | None = None) -> None:
+        pipe = self._r.pipeline(transaction=True)
+        pipe.delete(key)
+        values = list(values)[-max_len:]
+        if values:
+            pipe.rpush(key, *values)
+            if ttl_s:
+                pipe.pexpire(key, max(1, int(ttl_s * 1000)))
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self._r.delete(key)
+
+    def size(self) -> int:
+        return int(self._r.dbsize())
+
+
+_CACHE = None
+_LOCK = threading.Lock()
+
+
+def get_shared_cache():
+    global _CACHE
+    if _CACHE is None:
+        with _LOCK:
+            if _CACHE is None:
+                url = os.getenv("CACHE_URL", "").strip()
+                _CACHE = RedisCache(url) if url else LocalCache()
+                event(_log, INFO, "shared_cache", backend=type(_CACHE).__name__)
+    return _CACHE
@@ -0,0 +1,203 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .metrics import GEN_TOKENS, GEN_SECONDS, SPEC_TOKENS
+
+# Tek bir model çağrısının ölçümleri (süreler saniye):
+#   model, backend, prompt_tokens, gen_tokens, ttft_s, prefill_s, decode_s, total_s, tok_s
+
+_CURRENT: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "greenmcp_gen_calls", default=None
+)
+
+
+def make_stats(model: str, backend: str, prompt_tokens: int, gen_tokens: int,
+               total_s: float, ttft_s: Optional[float] = None,
+               prefill_s: Optional[float] = None, decode_s: Optional[float] = None) -> Dict[str, Any]:
+    if decode_s is None and ttft_s is not None:
+        decode_s = max(0.0, total_s - ttft_s)
+    tok_s = (gen_tokens / decode_s) if decode_s else ((gen_tokens / total_s) if total_s else 0.0)
+    return {
+        "model": model,
+        "backend": backend,
+        "prompt_tokens": int(prompt_tokens or 0),
+        "gen_tokens": int(gen_tokens or 0),
+        "ttft_s": None if ttft_s is None else round(ttft_s, 4),
+        "prefill_s": None if prefill_s is None else round(prefill_s, 4),
+        "decode_s": None if decode_s is None else round(decode_s, 4),
+        "total_s": round(total_s, 4),
+        "tok_s": round(tok_s, 2),
+    }
+
+
+def ollama_stats(model: str, data: dict, wall_s: float) -> Dict[str, Any]:
+    """Ollama yanıtındaki *_count / *_duration (ns) alanlarından ölçüm üretir."""
+    ns = 1e-9
+    load_s = (data.get("load_duration") or 0) * ns
+    prefill_s = (data.get("prompt_eval_duration") or 0) * ns
+    decode_s = (data.get("eval_duration") or 0) * ns
+    total_s = (data.get("total_duration") or 0) * ns or wall_s
+    stats = make_stats(
+        model, "ollama",
+        prompt_tokens=data.get("prompt_eval_count") or 0,
+        gen_tokens=data.get("eval_count") or 0,
+        total_s=total_s,
+        ttft_s=load_s + prefill_s,
+        prefill_s=prefill_s,
+        decode_s=decode_s,
+    )
+    # logprobs istenmişse (agents/cascade.py) ortalama token log-olasılığı
+    logprobs = [lp.get("logprob") for lp in (data.get("logprobs") or []) if isinstance(lp, dict)]
+    logprobs = [lp for lp in logprobs if lp is not None]
+    if logprobs:
+        stats["mean_logprob"] = round(sum(logprobs) / len(logprobs), 4)
+    return stats
+
+
+# ---------------------- Toplama (model × ajan) ----------------------
+
+class _Aggregator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[tuple, Dict[str, float]] = {}
+
+    def add(self, agent: str, stats: Dict[str, Any]) -> None:
+        key = (stats.get("model") or "?", agent or "-")
+        with self._lock:
+            row = self._rows.setdefault(key, {
+                "calls": 0, "prompt_tokens": 0, "gen_tokens": 0,
+                "total_s": 0.0, "decode_s": 0.0, "ttft_s": 0.0,
+            })
+            row["calls"] += 1
+            row["prompt_tokens"] += stats.get("prompt_tokens") or 0
+            row["gen_tokens"] += stats.get("gen_tokens") or 0
+            row["total_s"] += stats.get("total_s") or 0.0
+            row["decode_s"] += stats.get("decode_s") or 0.0
+            row["ttft_s"] += stats.get("ttft_s") or 0.0
+        # /metrics için aynı ölçümler Prometheus sayaçlarına da yazılır
+        GEN_TOKENS.inc(stats.get("prompt_tokens") or 0, model=key[0], agent=key[1], kind="prompt")
+        GEN_TOKENS.inc(stats.get("gen_tokens") or 0, model=key[0], agent=key[1], kind="gen")
+        GEN_SECONDS.observe(stats.get("total_s") or 0.0, model=key[0], agent=key[1])
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [(k, dict(v)) for k, v in self._rows.items()]
+        out = []
+        for (model, agent), r in rows:
+            n = r["calls"] or 1
+            out.append({
+                "model": model,
+                "agent": agent,
+                "calls": r["calls"],
+                "prompt_tokens": r["prompt_tokens"],
+                "gen_tokens": r["gen_tokens"],
+                "avg_ttft_s": round(r["ttft_s"] / n, 4),
+                "avg_total_s": round(r["total_s"] / n, 4),
+                "tok_s": round(r["gen_tokens"] / r["decode_s"], 2) if r["decode_s"] else 0.0,
+            })
+        return out
+
+
+AGGREGATE = _Aggregator()
+
+
+def record(stats: Dict[str, Any]) -> None:
+    """Backend'lerden çağrılır; aktif collect() kapsamı yoksa ajan etiketi '-' olur."""
+    calls = _CURRENT.get()
+    if calls is not None:
+        calls.append(stats)
+    else:
+        AGGREGATE.add("-", stats)
+
+
+def current_calls() -> Optional[List[Dict[str, Any]]]:
+    """Etkin collect() kapsamının çağrı listesi (kapsam yoksa None)."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def collect(agent: Optional[str] = None):
+    """
+    Kapsam içindeki tüm model çağrılarını toplar; çıkışta agent etiketiyle
+    AGGREGATE'e işler. contextvars sayesinde to_thread/executor içinde de çalışır.
+    """
+    calls: List[Dict[str, Any]] = []
+    token = _CURRENT.set(calls)
+    try:
+        yield calls
+    finally:
+        _CURRENT.reset(token)
+        for st in calls:
+            AGGREGATE.add(agent or "-", st)
+
+
+def summarize(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Bir ajan turundaki çağrıları meta['generation'] için özetler."""
+    if not calls:
+        return {"calls": 0}
+    gen = sum(c.get("gen_tokens") or 0 for c in calls)
+    decode = sum(c.get("decode_s") or 0.0 for c in calls)
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(c.get("prompt_tokens") or 0 for c in calls),
+        "gen_tokens": gen,
+        "ttft_s": calls[0].get("ttft_s"),
+        "total_s": round(sum(c.get("total_s") or 0.0 for c in calls), 4),
+        "tok_s": round(gen / decode, 2) if decode else 0.0,
+        "per_call": calls,
+    }
+
+
+# ---------------------- Spekülatif üretim (model × taslak) ----------------------
+
+class _SpecAggregator:
+    """
+    Assisted generation kabul oranı ve adım başına token, (hedef, taslak) çifti başına toplanır:
+      - her hedef adımı 1 "bonus" token + kabul edilen taslak tokenları üretir → kabul ≈ üretilen - hedef adımı
+      - taslak modelin her forward'u bir aday token önerir
+      - tokens_per_step, klasik decode'a (1 token/adım) göre teorik hızlanmadır
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[tuple, Dict[str, float]] = {}
+
+    def add(self, model: str, draft: str, gen_tokens: int, target_steps: int, draft_steps: int,
+            total_s: float) -> Dict[str, float]:
+        accepted = max(0, gen_tokens - target_steps)
+        with self._lock:
+            row = self._rows.setdefault((model, draft), {
+                "calls": 0, "gen_tokens": 0, "accepted": 0, "target_steps": 0, "draft_steps": 0, "total_s": 0.0,
+            })
+            row["calls"] += 1
+            row["gen_tokens"] += gen_tokens
+            row["accepted"] += accepted
+            row["target_steps"] += target_steps
+            row["draft_steps"] += draft_steps
+            row["total_s"] += total_s
+        for kind, n in (("generated", gen_tokens), ("accepted", accepted),
+                        ("drafted", draft_steps), ("target_steps", target_steps)):
+            SPEC_TOKENS.inc(n, model=model, draft=draft, kind=kind)
+        return {
+            "acceptance": round(accepted / draft_steps, 4) if draft_steps else 0.0,
+            "tokens_per_step": round(gen_tokens / target_steps, 2) if target_steps else 0.0,
+            "tok_s": round(gen_tokens / total_s, 1) if total_s > 0 else 0.0,
+        }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [(k, dict(v)) for k, v in self._rows.items()]
+        return [{
+            "model": model,
+            "draft": draft,
+            "calls": r["calls"],
+            "gen_tokens": r["gen_tokens"],
+            "acceptance": round(r["accepted"] / r["draft_steps"], 4) if r["draft_steps"] else 0.0,
+            "tokens_per_step": round(r["gen_tokens"] / r["target_steps"], 2) if r["target_steps"] else 0.0,
+            "tok_s": round(r["gen_tokens"] / r["total_s"], 1) if r["total_s"] else 0.0,
+        } for (model, draft), r in rows]
+
+
+SPEC_AGGREGATE = _SpecAggregator()
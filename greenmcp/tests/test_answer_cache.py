@@ -0,0 +1,76 @@
+import pytest
+
+from greenmcp.tools import answer_cache
+
+
+class FakeCollection:
+    """Chroma koleksiyonunun önbelleğin kullandığı kısmı; tüm kayıtlar aynı vektöre sahip (benzerlik 1.0)."""
+
+    def __init__(self):
+        self.rows = {}
+
+    @staticmethod
+    def _match(meta: dict, where: dict) -> bool:
+        if "$and" in where:
+            return all(FakeCollection._match(meta, w) for w in where["$and"])
+        return all(meta.get(k) == v for k, v in where.items())
+
+    def query(self, query_embeddings, n_results, where):
+        hits = [(i, doc, meta) for i, (doc, meta) in self.rows.items() if self._match(meta, where)][:n_results]
+        return {
+            "ids": [[h[0] for h in hits]],
+            "documents": [[h[1] for h in hits]],
+            "metadatas": [[h[2] for h in hits]],
+            "distances": [[0.0 for _ in hits]],
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for i, doc, meta in zip(ids, documents, metadatas):
+            self.rows[i] = (doc, meta)
+
+    def delete(self, ids):
+        for i in ids:
+            self.rows.pop(i, None)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    col = FakeCollection()
+    monkeypatch.setattr(answer_cache, "_collection", lambda: col)
+    monkeypatch.setattr(answer_cache, "embed_query", lambda text: [1.0, 0.0])
+    return answer_cache.AnswerCache("qa_agent", threshold=0.9, ttl_s=3600)
+
+
+def test_same_question_is_not_shared_between_users(cache):
+    cache.store("Karbon ayak izi nedir?", "A kullanıcısının bağlamıyla yanıt", user_id="user_a")
+
+    assert cache.lookup("Karbon ayak izi nedir?", user_id="user_b") is None
+    hit = cache.lookup("karbon ayak izi nedir", user_id="user_a")
+    assert hit is not None and hit["answer"] == "A kullanıcısının bağlamıyla yanıt"
+
+    cache.store("Karbon ayak izi nedir?", "B kullanıcısının yanıtı", user_id="user_b")
+    assert cache.lookup("Karbon ayak izi nedir?", user_id="user_a")["answer"] == "A kullanıcısının bağlamıyla yanıt"
+    assert cache.lookup("Karbon ayak izi nedir?", user_id="user_b")["answer"] == "B kullanıcısının yanıtı"
+
+
+def test_follow_up_questions_bypass_cache(cache):
+    cache.store("Peki bunu nasıl azaltırım?", "önceki konuşmaya bağlı yanıt", user_id="user_a")
+    assert cache.stats()["stored"] == 0
+    assert cache.lookup("Peki bunu nasıl azaltırım?", user_id="user_a") is None
+    assert cache.stats()["context"] == 1
+
+
+def test_http_memory_backend_reports_configured_cache_as_disabled(monkeypatch):
+    monkeypatch.setattr(answer_cache, "is_remote", lambda: True)
+    monkeypatch.setattr(answer_cache, "_collection", lambda: None)
+    caches = answer_cache.build_answer_caches({"qa_agent": {"answer_cache": True}, "coach_agent": {}})
+    assert list(caches) == ["qa_agent"]
+
+    stats = caches["qa_agent"].stats()
+    assert stats["enabled"] is False and stats["disabled_reason"] == "memory_backend_http"
+    assert caches["qa_agent"].lookup("Karbon ayak izi nedir?", user_id="user_a") is None
+    assert caches["qa_agent"].stats()["disabled"] == 1
+
+
+def test_local_cache_reports_enabled(cache):
+    assert cache.stats()["enabled"] is True and cache.stats()["disabled_reason"] is None
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from greenmcp.agents import cascade, llm_runner
+
+ENGLISH = "You can reduce your footprint by using public transportation every day."
+
+
+@pytest.fixture
+def rewrites(monkeypatch):
+    calls = []
+
+    def fake_rewrite(model, text):
+        calls.append((model, text))
+        return "Toplu taşıma kullanarak ayak izinizi azaltabilirsiniz."
+
+    monkeypatch.setattr(llm_runner, "_rewrite_turkish_ollama", fake_rewrite)
+    return calls
+
+
+def _generate(seen):
+    def generate(model, backend, small, logprobs):
+        seen.append((model, small))
+        return ENGLISH if small else "Büyük modelin Türkçe yanıtı burada yer alıyor."
+    return generate
+
+
+def test_accepted_small_english_answer_is_rewritten(rewrites):
+    c = cascade.Cascade("qa_agent", "small", "ollama", "large", "ollama", max_tokens=256, min_confidence=0.5)
+    seen = []
+    text, meta = c.run("Karbon ayak izi nedir?", _generate(seen))
+    assert meta["cascade"]["result"] == "small"
+    assert seen == [("small", True)]
+    assert rewrites == [("small", ENGLISH)]
+    assert text.startswith("Toplu taşıma")
+
+
+def test_english_small_answer_escalates_with_default_threshold(rewrites):
+    c = cascade.Cascade("qa_agent", "small", "ollama", "large", "ollama", max_tokens=256, min_confidence=0.6)
+    seen = []
+    text, meta = c.run("Karbon ayak izi nedir?", _generate(seen))
+    assert meta["cascade"]["result"] == "escalated"
+    assert seen == [("small", True), ("large", False)]
+    assert rewrites == [] and text.startswith("Büyük modelin")
@@ -0,0 +1,66 @@
+import asyncio
+
+from greenmcp.mcp_server.enrichment import ContextEnricher, EnrichmentCache
+from greenmcp.tools import memory_manager
+
+
+def test_buffer_flush_drops_cached_searches():
+    cache = EnrichmentCache(ttl_s=300)
+    written = []
+    buf = memory_manager._WriteBuffer(interval=60, max_items=100,
+                                      sink=lambda docs, metas, ids: written.extend(docs))
+    e = cache.entry("user_a")
+    cache.put_search(e, (None, "enerji", 2), ["eski sonuç"])
+
+    buf.add("[Soru]\nEnerji?\n\n[Yanıt]\nTasarruf edin.", {"user_id": "user_a", "role": "pair"})
+    cache.on_write("user_a", "pair", "[Soru]\nEnerji?\n\n[Yanıt]\nTasarruf edin.", "global")
+    # tampondayken yapılan arama yeni kaydı görmez ve önbelleğe girer
+    cache.put_search(e, (None, "enerji", 2), ["eski sonuç"])
+
+    assert buf.flush() == 1 and written
+    assert not e.searches
+
+
+def test_search_started_before_write_is_not_cached():
+    cache = EnrichmentCache(ttl_s=300)
+    e = cache.entry("user_a")
+    version = e.search_version
+    cache.on_write("user_a", "flushed", None, None)
+    cache.put_search(e, (None, "enerji", 2), ["yazımdan önceki sonuç"], version)
+    assert not e.searches
+
+
+def test_write_drops_only_searches_that_can_see_it(monkeypatch):
+    monkeypatch.setattr(memory_manager, "_BUFFER", None)
+    cache = EnrichmentCache(ttl_s=300)
+    e = cache.entry("user_a")
+    for sid in (None, "s1", "s2"):
+        cache.put_search(e, (sid, "enerji", 3), [f"{sid} sonucu"])
+
+    cache.on_write("user_a", "pair", "[Soru]\nA\n\n[Yanıt]\nB", "s1")
+    assert list(e.searches) == [("s2", "enerji", 3)]
+
+
+def test_buffered_write_keeps_searches_until_flush(monkeypatch):
+    monkeypatch.setattr("greenmcp.mcp_server.enrichment.write_is_deferred", lambda: True)
+    cache = EnrichmentCache(ttl_s=300)
+    e = cache.entry("user_a")
+    cache.put_search(e, ("s1", "enerji", 3), ["sonuç"])
+
+    cache.on_write("user_a", "pair", "[Soru]\nA\n\n[Yanıt]\nB", "s1")
+    assert ("s1", "enerji", 3) in e.searches
+    cache.on_write("user_a", "flushed", None, "s1")
+    assert not e.searches
+
+
+def test_read_overlapping_a_write_is_not_cached():
+    enricher = ContextEnricher(EnrichmentCache(ttl_s=300))
+    e = enricher.cache.entry("user_a")
+
+    def slow_summary():
+        # okuma sürerken yeni özet yazılır; eski okuma sonucu onu ezmemeli
+        enricher.cache.on_write("user_a", "summary", "yeni özet", "global")
+        return "eski özet"
+
+    assert asyncio.run(enricher._cached(e, "summary", slow_summary)) == "eski özet"
+    assert e.summary == "yeni özet"
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from greenmcp.bench.importtime import measure
+
+
+def test_server_import_stays_within_budget():
+    budget = float(os.getenv("IMPORT_BUDGET_S", "1.0"))
+    try:
+        total_s, rows = measure("greenmcp.main", runs=3)
+    except RuntimeError as e:
+        pytest.skip(f"sunucu bağımlılıkları kurulu değil: {str(e).splitlines()[-1]}")
+    slowest = sorted(rows, reverse=True)[:5]
+    assert total_s <= budget, f"greenmcp.main import {total_s:.3f} sn > {budget:.3f} sn; en pahalı: {slowest}"
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from greenmcp.utils import profiling
+
+
+def test_admin_token_check(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert not profiling.admin_token_ok("anything")
+
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert profiling.admin_token_ok("s3cret")
+    assert not profiling.admin_token_ok("s3cre")
+    assert not profiling.admin_token_ok(None)
+    assert not profiling.admin_token_ok("şifre")
+
+    monkeypatch.setenv("PROFILE_REQUESTS", "admin")
+    assert profiling.profiling_allowed("s3cret")
+    assert not profiling.profiling_allowed("wrong")
+
+
+def test_profiles_default_outside_package():
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(profiling.__file__)))
+    default = os.path.abspath(profiling._DEFAULT_DIR)
+    assert default.startswith(os.path.abspath(tempfile.gettempdir()))
+    assert not default.startswith(package_dir)
+
+
+def test_report_does_not_touch_disk_and_dump_writes_profile(tmp_path):
+    with profiling.profile_request() as prof:
+        profiling.profiled("adim")(sum)(range(100))
+    report = prof.report()
+    assert report["file"] is None and [r["name"] for r in report["waterfall"]] == ["adim"]
+    assert not list(tmp_path.iterdir())
+
+    path = prof.dump(str(tmp_path))
+    assert path and os.path.exists(path)
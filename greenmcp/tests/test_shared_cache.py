@@ -0,0 +1,80 @@
+import threading
+
+from greenmcp.mcp_server.session_store import SessionStore
+from greenmcp.utils import shared_cache
+from greenmcp.utils.shared_cache import LocalCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_set_and_delete():
+    cache = LocalCache(max_keys=10)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    cache.delete("a")
+    assert cache.get("a") is None and cache.size() == 0
+
+
+def test_ttl_expires_keys(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(shared_cache.time, "monotonic", clock)
+    cache = LocalCache(max_keys=10)
+    cache.set("short", "x", ttl_s=0.5)
+    cache.set("forever", "y")
+    clock.now += 0.4
+    assert cache.get("short") == "x"
+    clock.now += 0.2
+    assert cache.get("short") is None
+    assert cache.get("forever") == "y"
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = LocalCache(max_keys=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_list_append_trims_and_replace_resets():
+    cache = LocalCache(max_keys=10)
+    cache.list_append("l", ["1", "2"], max_len=3)
+    cache.list_append("l", ["3", "4"], max_len=3)
+    assert cache.list_get("l") == ["2", "3", "4"]
+    cache.list_replace("l", ["x"], max_len=3)
+    assert cache.list_get("l") == ["x"]
+    assert cache.list_get("missing") == []
+
+
+def test_shared_session_appends_from_many_threads_are_not_lost():
+    store = SessionStore(max_messages=1000, ttl_s=60, cache=LocalCache())
+    assert store.shared
+
+    def worker(n):
+        for i in range(50):
+            store.append("u", "s", [{"role": "user", "content": f"{n}-{i}"}])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    history = store.history("u", "s")
+    assert len(history) == 200
+    assert {m["content"] for m in history} == {f"{n}-{i}" for n in range(4) for i in range(50)}
+
+
+def test_shared_session_keeps_last_messages():
+    store = SessionStore(max_messages=3, ttl_s=60, cache=LocalCache())
+    store.replace("u", "s", [{"role": "user", "content": str(i)} for i in range(5)])
+    store.append("u", "s", [{"role": "assistant", "content": "5"}])
+    assert [m["content"] for m in store.history("u", "s")] == ["3", "4", "5"]
@@ -0,0 +1,63 @@
+import asyncio
+
+from greenmcp.mcp_server.summary_worker import SummaryWorker
+
+HISTORY = [{"role": "user", "content": str(i)} for i in range(8)]
+
+
+def _worker(calls: list, **kw) -> SummaryWorker:
+    def fn(user_id, history, session_id=None):
+        calls.append(len(history))
+    return SummaryWorker(fn, every_turns=1, concurrency=1, **kw)
+
+
+def test_each_turn_pushes_the_deadline_and_latest_history_is_summarized():
+    calls = []
+
+    async def scenario():
+        w = _worker(calls, debounce_s=0.2, max_wait_s=5)
+        w.submit("u", "s", HISTORY)
+        for n in range(1, 4):
+            await asyncio.sleep(0.1)
+            w.submit("u", "s", HISTORY + [{"role": "user", "content": "yeni"}] * n)
+        await asyncio.sleep(0.1)
+        assert calls == []          # son turdan beri 0.2 sn geçmedi
+        await asyncio.sleep(0.3)
+        assert w.stats()["scheduled"] == 1 and w.stats()["deduped"] == 3
+
+    asyncio.run(scenario())
+    assert calls == [len(HISTORY) + 3]
+
+
+def test_max_wait_caps_the_delay_for_a_busy_session():
+    calls = []
+
+    async def scenario():
+        w = _worker(calls, debounce_s=0.2, max_wait_s=0.3)
+        w.submit("u", "s", HISTORY)
+        for _ in range(5):
+            await asyncio.sleep(0.1)
+            w.submit("u", "s", HISTORY)
+        # turlar hiç 0.2 sn ara vermedi; yine de ilk özet 0.3 sn'de üretildi
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_memory_clear_cancels_pending_summaries():
+    calls = []
+
+    async def scenario():
+        w = _worker(calls, debounce_s=0.2, max_wait_s=5)
+        w.submit("u", "s1", HISTORY)
+        w.submit("u", "s2", HISTORY)
+        w.submit("v", "s1", HISTORY)
+        w.on_write("u", "clear", None, "s1")      # clear_session_memory
+        await asyncio.sleep(0)
+        assert w.stats()["pending"] == 2
+        w.on_write("u", "clear", None, None)      # clear_user_memory
+        await asyncio.sleep(0.3)
+        assert w.stats()["cancelled"] == 2
+
+    asyncio.run(scenario())
+    assert calls == [len(HISTORY)]
@@ -0,0 +1,18 @@
+from greenmcp.mcp_server.target_pools import POOL_ACTIVE, POOL_LIMIT, build_pools
+
+
+def _targets(gauge) -> set:
+    return {line.split('target="')[1].split('"')[0] for line in gauge._samples()}
+
+
+def test_retired_pool_removes_its_gauges_but_not_its_successors():
+    old = build_pools({"pool_test_kept": {"concurrency": 2}, "pool_test_removed": {"concurrency": 1}})
+    new = build_pools({"pool_test_kept": {"concurrency": 4}}, old)
+    for target, pool in old.items():
+        if new.get(target) is not pool:
+            pool.close()
+
+    assert "pool_test_removed" not in _targets(POOL_ACTIVE) | _targets(POOL_LIMIT)
+    assert 'greenmcp_pool_concurrency{target="pool_test_kept"} 4.0' in POOL_LIMIT._samples()
+    new["pool_test_kept"].close()
+    assert "pool_test_kept" not in _targets(POOL_LIMIT)
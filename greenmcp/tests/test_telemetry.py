@@ -0,0 +1,17 @@
+from greenmcp.utils.metrics import SPEC_TOKENS
+from greenmcp.utils.telemetry import _SpecAggregator
+
+
+def test_speculative_stats_are_aggregated_per_model_and_draft():
+    agg = _SpecAggregator()
+    rates = agg.add("target-a", "draft-x", gen_tokens=30, target_steps=10, draft_steps=40, total_s=2.0)
+    assert rates == {"acceptance": 0.5, "tokens_per_step": 3.0, "tok_s": 15.0}
+    agg.add("target-a", "draft-x", gen_tokens=10, target_steps=10, draft_steps=40, total_s=2.0)
+    agg.add("target-b", "draft-x", gen_tokens=5, target_steps=5, draft_steps=0, total_s=1.0)
+
+    rows = {(r["model"], r["draft"]): r for r in agg.snapshot()}
+    assert rows[("target-a", "draft-x")]["calls"] == 2
+    assert rows[("target-a", "draft-x")]["acceptance"] == 0.25
+    assert rows[("target-a", "draft-x")]["tokens_per_step"] == 2.0
+    assert rows[("target-b", "draft-x")]["acceptance"] == 0.0
+    assert 'greenmcp_spec_tokens_total{model="target-a",draft="draft-x",kind="accepted"} 20.0' in SPEC_TOKENS._samples()
@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from greenmcp.agents.backends import transformers_backend as hf
+
+
+@pytest.fixture(params=["hf-internal-testing/llama-tokenizer", "Qwen/Qwen2.5-0.5B-Instruct"])
+def tokenizer(request, monkeypatch):
+    try:
+        tok = transformers.AutoTokenizer.from_pretrained(request.param)
+    except Exception as e:
+        pytest.skip(f"tokenizer yüklenemedi: {e!r}")
+    monkeypatch.setattr(hf, "_load", lambda model_id: (tok, None))
+    hf._template_parts.cache_clear()
+    yield request.param, tok
+    hf._template_parts.cache_clear()
+
+
+@pytest.mark.parametrize("user", [
+    "Bugün 12 km araba kullandım.",
+    "İstanbul'da hava nasıl?",
+    "'tırnakla' başlayan soru",
+])
+@pytest.mark.parametrize("system", ["", "Sen çevre dostu bir asistansın."])
+def test_cached_template_matches_full_encoding(tokenizer, system, user):
+    model_id, tok = tokenizer
+    ids = hf._encode_prompt(model_id, tok, system, user)[0].tolist()
+    assert ids == hf._full_prompt_ids(tok, system, user.strip())
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from greenmcp.mcp_server.warmup import READY, WarmupTracker
+
+AGENTS = {
+    "coach_agent": {"model": "coach"},
+    "report_agent": {"model": "report", "warm_fallback": []},
+    "qa_agent": {"model": "qa"},
+    "narrative_agent": {"model": "narrative"},
+}
+
+
+def test_cold_agent_falls_back_only_to_configured_agents(monkeypatch):
+    monkeypatch.setenv("WARMUP_ROUTE_WARM_ONLY", "1")
+    w = WarmupTracker({}, AGENTS)
+    w.models["narrative"]["state"] = READY
+
+    # sıcak olan tek ajan yedek değil → yönlendirme yok
+    assert w.pick_warm("coach_agent", list(AGENTS)) == "coach_agent"
+
+    w.models["qa"]["state"] = READY
+    assert w.pick_warm("coach_agent", list(AGENTS)) == "qa_agent"
+    assert w.pick_warm("report_agent", list(AGENTS)) == "report_agent"